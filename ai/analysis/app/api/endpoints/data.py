@@ -105,13 +105,13 @@ async def run_baseline_analysis(
             logger.info(f"Baseline predictions saved for {file_id}")
 
         # Update Redis status to none after baseline completion
-        redis_client.set_csv_status(file_id, "none")
+        await redis_client.set_csv_status(file_id, "none")
         logger.info(f"All analysis completed for {file_id}, status set to none")
 
     except Exception as e:
         logger.error(f"Baseline analysis failed for {file_id}: {str(e)}")
         # Update Redis status to none even on failure
-        redis_client.set_csv_status(file_id, "none")
+        await redis_client.set_csv_status(file_id, "none")
     finally:
         if db:
             db.close()
@@ -132,10 +132,10 @@ async def run_prophet_analysis(
             db = next(get_db())
 
         # Update status to analyzing
-        redis_client.set_csv_status(file_id, "analyzing")
+        await redis_client.set_csv_status(file_id, "analyzing")
 
         # Get file metadata from Redis
-        file_metadata = redis_client.get_file_metadata(file_id)
+        file_metadata = await redis_client.get_file_metadata(file_id)
         if not file_metadata:
             raise ValueError(f"File metadata not found for {file_id}")
 
@@ -144,7 +144,8 @@ async def run_prophet_analysis(
         if not s3_key:
             raise ValueError(f"S3 key not found for {file_id}")
 
-        csv_data = await s3_client.fetch_csv_data(file_id, s3_key)
+        segment_keys = [segment['key'] for segment in file_metadata.get('segments', [])]
+        csv_data = await s3_client.fetch_csv_data(file_id, s3_key, segment_keys)
         if csv_data is None:
             raise ValueError(f"Failed to fetch CSV data for {file_id}")
 
@@ -335,7 +336,7 @@ async def run_prophet_analysis(
                     **current_month_result,
                     'baseline_predictions': None  # Will be updated when baseline completes
                 }
-                redis_client.set_analysis_metadata(file_id, analysis_metadata)
+                await redis_client.set_analysis_metadata(file_id, analysis_metadata)
 
             logger.info(f"Current month analysis completed for {file_id}, baseline running in background")
         else:
@@ -363,10 +364,10 @@ async def run_prophet_analysis(
                 db.close()
 
         # Store error metadata for debugging
-        redis_client.set_analysis_metadata(file_id, {"error": str(e)})
+        await redis_client.set_analysis_metadata(file_id, {"error": str(e)})
 
         # Update Redis status to none on failure (since baseline won't run)
-        redis_client.set_csv_status(file_id, "none")
+        await redis_client.set_csv_status(file_id, "none")
     finally:
         # Always close the db connection
         if db:
@@ -436,7 +437,7 @@ async def calculate_monthly_leak(
 
     # No predictions yet, need to run analysis
     # Check if file exists in Redis
-    file_metadata = redis_client.get_file_metadata(file_id)
+    file_metadata = await redis_client.get_file_metadata(file_id)
     if not file_metadata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -444,7 +445,7 @@ async def calculate_monthly_leak(
         )
 
     # Check if analysis is already running
-    current_status = redis_client.get_csv_status(file_id)
+    current_status = await redis_client.get_csv_status(file_id)
     if current_status == 'analyzing':
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -559,7 +560,7 @@ async def get_leak_data(
     
     if not predictions:
         # Check if analysis is in progress
-        analysis_status = redis_client.get_csv_status(file_id)
+        analysis_status = await redis_client.get_csv_status(file_id)
         if analysis_status == 'analyzing':
             raise HTTPException(
                 status_code=status.HTTP_202_ACCEPTED,
@@ -676,7 +677,7 @@ async def get_baseline_predictions(
 
     if not baselines:
         # Get file metadata to check data range
-        file_metadata = redis_client.get_file_metadata(file_id)
+        file_metadata = await redis_client.get_file_metadata(file_id)
 
         error_detail = {
             "error": "No baseline predictions available",
@@ -896,7 +897,7 @@ async def get_doojo_data(
     import pandas as pd
 
     # Check if analysis is in progress
-    analysis_status = redis_client.get_csv_status(file_id)
+    analysis_status = await redis_client.get_csv_status(file_id)
     if analysis_status == 'analyzing':
         raise HTTPException(
             status_code=status.HTTP_202_ACCEPTED,
@@ -904,7 +905,7 @@ async def get_doojo_data(
         )
 
     # Get file metadata from Redis
-    file_metadata = redis_client.get_file_metadata(file_id)
+    file_metadata = await redis_client.get_file_metadata(file_id)
     if not file_metadata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -919,7 +920,8 @@ async def get_doojo_data(
         )
 
     # Fetch CSV data from S3
-    csv_data = await s3_client.fetch_csv_data(file_id, s3_key)
+    segment_keys = [segment['key'] for segment in file_metadata.get('segments', [])]
+    csv_data = await s3_client.fetch_csv_data(file_id, s3_key, segment_keys)
     if csv_data is None or csv_data.empty:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
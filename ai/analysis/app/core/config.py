@@ -22,6 +22,9 @@ class Settings(BaseSettings):
     REDIS_PORT: int = Field(default=None, env="REDIS_PORT")
     REDIS_DB: int = Field(default=None, env="REDIS_DB")
     REDIS_PASSWORD: Optional[str] = Field(default=None, env="REDIS_PASSWORD")
+    REDIS_POOL_SIZE: int = Field(default=20, env="REDIS_POOL_SIZE")
+    REDIS_POOL_TIMEOUT: int = Field(default=5, env="REDIS_POOL_TIMEOUT")
+    REDIS_SOCKET_TIMEOUT: int = Field(default=5, env="REDIS_SOCKET_TIMEOUT")
     
     # MinIO/S3 Settings (for fetching CSV files)
     MINIO_ENDPOINT: str = Field(default=None, env="MINIO_ENDPOINT")
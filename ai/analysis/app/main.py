@@ -6,6 +6,7 @@ import logging
 from app.api.router import api_router
 from app.core.config import settings
 from app.models.database import init_db
+from app.core.redis import init_redis, close_redis, get_command_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,12 +14,18 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """Initialize database and Redis pool on startup"""
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized")
+    try:
+        await init_redis()
+    except Exception as e:
+        # Connections are retried lazily by the pool on the next command
+        logger.error(f"Failed to connect to Redis: {e}")
     yield
     logger.info("Shutting down...")
+    await close_redis()
 
 
 app = FastAPI(
@@ -66,6 +73,12 @@ async def root():
     }
 
 
+@app.get("/metrics/redis", include_in_schema=False)
+async def redis_metrics():
+    """Redis pool usage and per-command latency"""
+    return get_command_stats()
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "analysis"}
\ No newline at end of file
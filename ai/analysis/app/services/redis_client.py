@@ -1,105 +1,107 @@
 """
 Redis client for managing analysis job status
 """
-import redis
 import json
 import logging
-from typing import Optional, Dict, Any
-import os
+from typing import Optional, Dict
+
+from redis.exceptions import RedisError
+
+from app.core.redis import get_redis, set_with_ttl, get_json
 
 logger = logging.getLogger(__name__)
 
+# Analysis metadata expiry (24 hours)
+ANALYSIS_METADATA_TTL = 86400
+
+# csv-manager stores each file as one hash holding metadata and status
+CSV_FILE_KEY = "csv:file:{file_id}"
+
+# Hash fields stored as integers by csv-manager
+CSV_INT_FIELDS = ("size_bytes",)
+
+# Hash fields stored as JSON by csv-manager (manifest of appended segments)
+CSV_JSON_FIELDS = ("segments",)
+
+# csv-manager's status change channel (waiting clients are notified through it)
+CSV_EVENTS_CHANNEL = "csv:events:{file_id}"
+
+# Set status only if the file hash exists (never create partial hashes) and
+# publish it on the file's event channel when it changes.
+# KEYS[1] file hash; ARGV[1] new status; ARGV[2] event channel
+SET_STATUS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local current = redis.call('HGET', KEYS[1], 'status')
+redis.call('HSET', KEYS[1], 'status', ARGV[1])
+if current ~= ARGV[1] then
+    redis.call('PUBLISH', ARGV[2], ARGV[1])
+end
+return 1
+"""
+
 
 class RedisClient:
     """Redis client for status management"""
     
     def __init__(self):
-        self.redis_host = os.getenv("REDIS_HOST", "localhost")
-        self.redis_port = int(os.getenv("REDIS_PORT", 6379))
-        self.redis_db = int(os.getenv("REDIS_DB", 0))
-        
-        try:
-            self.client = redis.Redis(
-                host=self.redis_host,
-                port=self.redis_port,
-                db=self.redis_db,
-                decode_responses=True
-            )
-            self.client.ping()
-            logger.info(f"Connected to Redis at {self.redis_host}:{self.redis_port}")
-        except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            self.client = None
+        self.client = get_redis()
+        self._set_status = self.client.register_script(SET_STATUS_SCRIPT)
     
-    def set_analysis_metadata(self, file_id: str, metadata: Dict):
+    async def set_analysis_metadata(self, file_id: str, metadata: Dict):
         """Set analysis metadata for a file"""
-        if not self.client:
-            logger.warning("Redis not available, skipping metadata update")
-            return
-        
         try:
-            # Set metadata
             meta_key = f"analysis:metadata:{file_id}"
-            self.client.set(meta_key, json.dumps(metadata))
-            
-            # Set expiry (24 hours)
-            self.client.expire(meta_key, 86400)
-            
+            await set_with_ttl(meta_key, json.dumps(metadata), ANALYSIS_METADATA_TTL)
             logger.info(f"Set analysis metadata for {file_id}")
-        except Exception as e:
+        except RedisError as e:
             logger.error(f"Failed to set metadata: {e}")
     
-    def get_csv_status(self, file_id: str) -> Optional[str]:
+    async def get_csv_status(self, file_id: str) -> Optional[str]:
         """Get CSV processing status for a file"""
-        if not self.client:
-            return None
-        
         try:
-            status_key = f"csv:status:{file_id}"
-            return self.client.get(status_key)
-        except Exception as e:
+            return await self.client.hget(CSV_FILE_KEY.format(file_id=file_id), "status")
+        except RedisError as e:
             logger.error(f"Failed to get status: {e}")
             return None
     
-    def get_analysis_metadata(self, file_id: str) -> Optional[Dict]:
+    async def get_analysis_metadata(self, file_id: str) -> Optional[Dict]:
         """Get analysis metadata for a file"""
-        if not self.client:
-            return None
-        
         try:
-            meta_key = f"analysis:metadata:{file_id}"
-            data = self.client.get(meta_key)
-            return json.loads(data) if data else None
-        except Exception as e:
+            return await get_json(f"analysis:metadata:{file_id}")
+        except (RedisError, json.JSONDecodeError) as e:
             logger.error(f"Failed to get metadata: {e}")
             return None
     
-    def set_csv_status(self, file_id: str, status: str):
+    async def set_csv_status(self, file_id: str, status: str):
         """Update CSV file status in csv-manager's Redis namespace"""
-        if not self.client:
-            logger.warning("Redis not available, skipping CSV status update")
-            return
-        
         try:
-            # Update status in csv-manager's namespace
-            status_key = f"csv:status:{file_id}"
-            self.client.set(status_key, status)
-            logger.info(f"Updated CSV status for {file_id}: {status}")
-        except Exception as e:
+            # Update status field of csv-manager's file hash
+            if await self._set_status(
+                keys=[CSV_FILE_KEY.format(file_id=file_id)],
+                args=[status, CSV_EVENTS_CHANNEL.format(file_id=file_id)]
+            ):
+                logger.info(f"Updated CSV status for {file_id}: {status}")
+            else:
+                logger.warning(f"CSV file {file_id} not found, status '{status}' not set")
+        except RedisError as e:
             logger.error(f"Failed to update CSV status: {e}")
     
-    def get_file_metadata(self, file_id: str) -> Optional[Dict]:
+    async def get_file_metadata(self, file_id: str) -> Optional[Dict]:
         """Get file metadata from csv-manager's Redis namespace"""
-        if not self.client:
-            return None
-        
         try:
-            # Try to get metadata by ID
-            meta_key = f"csv:metadata:id:{file_id}"
-            data = self.client.get(meta_key)
-            if data:
-                return json.loads(data)
-            return None
-        except Exception as e:
+            raw = await self.client.hgetall(CSV_FILE_KEY.format(file_id=file_id))
+            if not raw:
+                return None
+            metadata = {k: v for k, v in raw.items() if k != "status"}
+            for field in CSV_INT_FIELDS:
+                if field in metadata:
+                    metadata[field] = int(metadata[field])
+            for field in CSV_JSON_FIELDS:
+                if field in metadata:
+                    metadata[field] = json.loads(metadata[field])
+            return metadata
+        except (RedisError, ValueError) as e:
             logger.error(f"Failed to get file metadata: {e}")
-            return None
\ No newline at end of file
+            return None
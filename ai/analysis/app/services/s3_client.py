@@ -6,7 +6,7 @@ from botocore.client import Config
 import pandas as pd
 import io
 import logging
-from typing import Optional
+from typing import List, Optional
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -39,29 +39,43 @@ class S3Client:
             logger.error(f"Failed to initialize S3 client: {e}")
             raise
     
-    async def fetch_csv_data(self, file_id: str, s3_key: str) -> Optional[pd.DataFrame]:
+    async def fetch_csv_data(
+        self,
+        file_id: str,
+        s3_key: str,
+        segment_keys: Optional[List[str]] = None
+    ) -> Optional[pd.DataFrame]:
         """
         Fetch CSV data from S3/MinIO
         
+        Rows appended through csv-manager live in segment objects until they
+        are compacted; they are concatenated after the base object in
+        manifest order, so callers always see the merged file.
+        
         Args:
             file_id: File identifier
-            s3_key: S3 object key
+            s3_key: S3 object key of the base object
+            segment_keys: S3 keys of appended segments (file metadata 'segments')
             
         Returns:
             DataFrame with CSV data or None
         """
         try:
-            # Get object from S3
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=s3_key
-            )
+            frames = []
+            for key in [s3_key] + list(segment_keys or []):
+                # Get object from S3
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=key
+                )
+                
+                # Read CSV data
+                csv_content = response['Body'].read()
+                frames.append(pd.read_csv(io.BytesIO(csv_content)))
             
-            # Read CSV data
-            csv_content = response['Body'].read()
-            df = pd.read_csv(io.BytesIO(csv_content))
+            df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
             
-            logger.info(f"Fetched CSV data for file_id {file_id}: {len(df)} rows")
+            logger.info(f"Fetched CSV data for file_id {file_id}: {len(df)} rows ({len(frames) - 1} segments)")
             return df
             
         except Exception as e:
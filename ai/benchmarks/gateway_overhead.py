@@ -0,0 +1,142 @@
+"""
+Gateway proxy overhead benchmark
+
+Sends the same request directly to an upstream and through the gateway at
+a fixed concurrency and reports the latency the gateway adds per request.
+A stub upstream answering instantly isolates the proxy cost (connection
+handling, header and body copying) from service work.
+
+Usage:
+    # 1. Stub upstream (serves the classifier, analysis and csv-manager routes)
+    python gateway_overhead.py serve-stub --port 8091
+
+    # 2. Gateway pointed at the stub (from ai/gateway)
+    CLASSIFIER_SERVICE_URL=http://127.0.0.1:8091 ANALYSIS_SERVICE_URL=http://127.0.0.1:8091 \\
+        CSV_MANAGER_SERVICE_URL=http://127.0.0.1:8091 uvicorn app.main:app --port 8000
+
+    # 3. Measure
+    python gateway_overhead.py run --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Dict
+
+import httpx
+
+from load import LoadResult, run_load
+
+# Single classification request used for both paths
+CLASSIFY_PARAMS = {
+    "merchant_name": "스타벅스 강남점",
+    "amount": 4800,
+    "transaction_date_time": "2025-09-05T10:12:00Z"
+}
+
+
+def serve_stub(args) -> None:
+    """Upstream that answers every proxied route immediately"""
+    import uvicorn
+    from fastapi import FastAPI, Request
+
+    stub = FastAPI(title="Gateway benchmark stub")
+    body = {"category": "카페", "subcategory": "커피전문점", "confidence": 0.95, "padding": "x" * args.body_bytes}
+
+    @stub.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @stub.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
+    async def answer(path: str, request: Request):
+        await request.body()
+        return body
+
+    uvicorn.run(stub, host=args.host, port=args.port, log_level="warning")
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    name: str,
+    url: str,
+    requests: int,
+    concurrency: int
+) -> LoadResult:
+    result = LoadResult(name, concurrency)
+
+    async def operation(number: int) -> int:
+        response = await client.get(url, params=CLASSIFY_PARAMS)
+        response.raise_for_status()
+        return 1
+
+    # Warm up connections on both sides before measuring
+    await run_load(LoadResult(name, concurrency), concurrency * 2, operation)
+    await run_load(result, requests, operation)
+    return result
+
+
+async def run(args) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        direct = await measure(
+            client, "direct", f"{args.upstream_url.rstrip('/')}/ai/classify", args.requests, args.concurrency
+        )
+        gateway = await measure(
+            client, "gateway", f"{args.gateway_url.rstrip('/')}/api/ai/classify", args.requests, args.concurrency
+        )
+
+    direct_report = direct.to_dict()
+    gateway_report = gateway.to_dict()
+    overhead = {}
+    if "latency_ms" in direct_report and "latency_ms" in gateway_report:
+        overhead = {
+            key: round(gateway_report["latency_ms"][key] - direct_report["latency_ms"][key], 1)
+            for key in ("p50", "p95", "p99")
+        }
+    return {"direct": direct_report, "gateway": gateway_report, "overhead_ms": overhead}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for name in ("direct", "gateway"):
+        result = report[name]
+        latency = result.get("latency_ms", {})
+        print(
+            f"{name:8} {result['succeeded']}/{result['requests']} ok, {result['requests_per_s']} req/s, "
+            f"p50 {latency.get('p50')}ms, p95 {latency.get('p95')}ms, p99 {latency.get('p99')}ms, "
+            f"errors {result['errors'] or 'none'}"
+        )
+    overhead = report["overhead_ms"]
+    if overhead:
+        print(f"overhead p50 {overhead['p50']}ms, p95 {overhead['p95']}ms, p99 {overhead['p99']}ms per request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway proxy overhead benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stub = commands.add_parser("serve-stub", help="Run the stub upstream")
+    stub.add_argument("--host", default="127.0.0.1")
+    stub.add_argument("--port", type=int, default=8091)
+    stub.add_argument("--body-bytes", type=int, default=200, help="Padding added to each response body")
+
+    measure_parser = commands.add_parser("run", help="Measure direct and proxied latency")
+    measure_parser.add_argument("--upstream-url", default="http://127.0.0.1:8091")
+    measure_parser.add_argument("--gateway-url", default="http://127.0.0.1:8000")
+    measure_parser.add_argument("--requests", type=int, default=2000)
+    measure_parser.add_argument("--concurrency", type=int, default=20)
+    measure_parser.add_argument("--timeout", type=float, default=30.0)
+    measure_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args()
+    if args.command == "serve-stub":
+        serve_stub(args)
+        return
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Load benchmarks for the classifier and analysis services
+
+Drives the running services over HTTP at a fixed concurrency and reports
+latency percentiles, throughput and LLM calls per transaction. Run the
+services with GMS_BASE_URL pointing at mock_llm_server.py, whose /stats
+endpoint supplies the call counts, to benchmark without the live GMS
+endpoint.
+
+Scenarios:
+    classify-single  GET  /ai/classify (single transactions)
+    process-batch    POST /ai/classify (batch jobs, polled until done)
+    doojo            GET  /ai/data/doojo
+
+Usage:
+    python load.py classify-single --requests 1000 --concurrency 50
+    python load.py process-batch --file-id <id> --jobs 4 --concurrency 2
+    python load.py process-batch --upload-rows 20000 --token <admin JWT>
+    python load.py doojo --file-id <id> --requests 100 --concurrency 10
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+# Merchant names drawn for synthetic transactions (rules match some of them)
+MERCHANTS = [
+    "스타벅스 강남점", "GS25 역삼점", "이마트 성수점", "카카오T 택시", "올리브영 명동",
+    "CGV 용산", "교보문고 광화문", "배달의민족", "쿠팡", "다이소 홍대점"
+]
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(share * len(ordered)))
+    return ordered[rank - 1]
+
+
+def synthetic_merchant(rng: random.Random, unique: int) -> str:
+    """Known brand or one of `unique` made-up names the rules do not match"""
+    if rng.random() < 0.3:
+        return rng.choice(MERCHANTS)
+    return f"테스트가맹점{rng.randrange(unique):05d}"
+
+
+def synthetic_csv(rows: int, unique: int, seed: int) -> bytes:
+    """CSV in the upload format (csv-manager's required columns)"""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+    lines = ["transaction_date_time,category,merchant_name,amount"]
+    for _ in range(rows):
+        timestamp = start + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        merchant = synthetic_merchant(rng, unique).replace(",", " ")
+        lines.append(f"{timestamp:%Y-%m-%d %H:%M:%S},기타,{merchant},{rng.randint(1000, 200000)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class LoadResult:
+    """Latencies and outcomes of one scenario run"""
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.rows = 0
+        self.elapsed = 0.0
+        self.llm: Optional[Dict[str, Any]] = None
+
+    def record_error(self, error: str) -> None:
+        self.errors[error] = self.errors.get(error, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = {
+            "scenario": self.name,
+            "concurrency": self.concurrency,
+            "requests": len(self.latencies) + sum(self.errors.values()),
+            "succeeded": len(self.latencies),
+            "errors": self.errors,
+            "elapsed_s": round(self.elapsed, 3),
+            "requests_per_s": round(len(self.latencies) / self.elapsed, 2) if self.elapsed else None,
+            "rows": self.rows,
+            "rows_per_s": round(self.rows / self.elapsed, 2) if self.elapsed else None
+        }
+        if self.latencies:
+            report["latency_ms"] = {
+                "p50": round(percentile(self.latencies, 0.50) * 1000, 1),
+                "p95": round(percentile(self.latencies, 0.95) * 1000, 1),
+                "p99": round(percentile(self.latencies, 0.99) * 1000, 1),
+                "max": round(max(self.latencies) * 1000, 1)
+            }
+        if self.llm is not None:
+            report["llm"] = self.llm
+            report["llm_calls_per_transaction"] = (
+                round(self.llm["calls"] / self.rows, 4) if self.rows else None
+            )
+        return report
+
+
+class MockStatsClient:
+    """Call counters of mock_llm_server.py (disabled without a URL)"""
+
+    def __init__(self, client: httpx.AsyncClient, url: Optional[str]):
+        self.client = client
+        self.url = url.rstrip("/") if url else None
+
+    async def reset(self) -> None:
+        if self.url:
+            response = await self.client.post(f"{self.url}/stats/reset")
+            response.raise_for_status()
+
+    async def read(self) -> Optional[Dict[str, Any]]:
+        if not self.url:
+            return None
+        response = await self.client.get(f"{self.url}/stats")
+        response.raise_for_status()
+        return response.json()
+
+
+async def run_load(
+    result: LoadResult,
+    total: int,
+    operation: Callable[[int], Awaitable[int]]
+) -> None:
+    """
+    Run `total` operations with `result.concurrency` workers.
+
+    Each operation returns the number of transactions it handled; failures
+    are counted by exception type (or HTTP status).
+    """
+    counter = iter(range(total))
+
+    async def worker():
+        for number in counter:
+            start = time.perf_counter()
+            try:
+                rows = await operation(number)
+            except httpx.HTTPStatusError as e:
+                result.record_error(f"http_{e.response.status_code}")
+                continue
+            except Exception as e:
+                result.record_error(type(e).__name__)
+                continue
+            result.latencies.append(time.perf_counter() - start)
+            result.rows += rows
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(result.concurrency)))
+    result.elapsed = time.perf_counter() - start
+
+
+async def classify_single(args, client: httpx.AsyncClient, result: LoadResult) -> None:
+    rng = random.Random(args.seed)
+    url = f"{args.classifier_url.rstrip('/')}/ai/classify"
+
+    async def operation(number: int) -> int:
+        response = await client.get(url, params={
+            "merchant_name": synthetic_merchant(rng, args.merchants),
+            "amount": rng.randint(1000, 200000),
+            "transaction_date_time": datetime.now().isoformat()
+        })
+        response.raise_for_status()
+        return 1
+
+    await run_load(result, args.requests, operation)
+
+
+async def upload_file(args, client: httpx.AsyncClient) -> str:
+    """Upload a synthetic CSV through csv-manager and return its file_id"""
+    content = synthetic_csv(args.upload_rows, args.merchants, args.seed)
+    response = await client.post(
+        f"{args.csv_manager_url.rstrip('/')}/api/ai/csv/upload",
+        files={"file": ("benchmark.csv", io.BytesIO(content), "text/csv")}
+    )
+    response.raise_for_status()
+    return response.json()["file_id"]
+
+
+async def process_batch(args, client: httpx.AsyncClient, result: LoadResult) -> None:
+    base_url = f"{args.classifier_url.rstrip('/')}/ai/classify"
+    file_id = args.file_id or await upload_file(args, client)
+
+    job_ids: List[str] = []
+
+    async def operation(number: int) -> int:
+        response = await client.post(base_url, params={"file_id": file_id})
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+
+        deadline = time.monotonic() + args.job_timeout
+        while True:
+            await asyncio.sleep(args.poll_interval)
+            response = await client.get(f"{base_url}/status", params={"job_id": job_id})
+            response.raise_for_status()
+            job = response.json()
+            if job["status"] == "completed":
+                job_ids.append(job_id)
+                return 0
+            if job["status"] == "failed":
+                raise RuntimeError(f"Job {job_id} failed: {job.get('message')}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} not finished after {args.job_timeout}s")
+
+    await run_load(result, args.jobs, operation)
+    if not job_ids:
+        return
+
+    # Every job classifies the same file; rows are counted once from a
+    # result (header excluded), outside the measured time
+    lines = 0
+    async with client.stream("GET", f"{base_url}/download", params={"job_id": job_ids[0]}) as download:
+        download.raise_for_status()
+        async for chunk in download.aiter_bytes():
+            lines += chunk.count(b"\n")
+    result.rows = max(lines - 1, 0) * len(job_ids)
+
+
+async def doojo(args, client: httpx.AsyncClient, result: LoadResult) -> None:
+    url = f"{args.analysis_url.rstrip('/')}/ai/data/doojo"
+    params = {"file_id": args.file_id}
+    if args.year:
+        params["year"] = args.year
+    if args.month:
+        params["month"] = args.month
+
+    async def operation(number: int) -> int:
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        months = response.json()["doojo"]
+        return sum(month["categories_count"] for month in months)
+
+    await run_load(result, args.requests, operation)
+
+
+SCENARIOS = {
+    "classify-single": classify_single,
+    "process-batch": process_batch,
+    "doojo": doojo
+}
+
+
+async def run(args) -> Dict[str, Any]:
+    scenario = SCENARIOS[args.scenario]
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=args.timeout) as client:
+        mock = MockStatsClient(client, args.mock_url)
+        result = LoadResult(args.scenario, args.concurrency)
+        await mock.reset()
+        await scenario(args, client, result)
+        result.llm = await mock.read()
+    return result.to_dict()
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"scenario {report['scenario']} (concurrency {report['concurrency']})")
+    print(
+        f"  requests {report['succeeded']}/{report['requests']} ok in {report['elapsed_s']}s "
+        f"({report['requests_per_s']} req/s), errors {report['errors'] or 'none'}"
+    )
+    if "latency_ms" in report:
+        latency = report["latency_ms"]
+        print(f"  latency p50 {latency['p50']}ms, p95 {latency['p95']}ms, p99 {latency['p99']}ms, max {latency['max']}ms")
+    print(f"  rows {report['rows']:,} ({report['rows_per_s']} rows/s)")
+    if "llm" in report:
+        llm = report["llm"]
+        print(
+            f"  llm calls {llm['calls']} ({report['llm_calls_per_transaction']} per transaction), "
+            f"responses {llm['responses']}, max in flight {llm['max_in_flight']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmarks for the classifier and analysis services")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--classifier-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--analysis-url", default="http://127.0.0.1:8002")
+    parser.add_argument("--csv-manager-url", default="http://127.0.0.1:8003")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8099", help="mock_llm_server.py (empty to skip call counts)")
+    parser.add_argument("--token", default=None, help="Bearer token sent with every request")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Requests (classify-single, doojo)")
+    parser.add_argument("--jobs", type=int, default=1, help="Batch jobs (process-batch)")
+    parser.add_argument("--file-id", default=None, help="Uploaded file (process-batch, doojo)")
+    parser.add_argument("--upload-rows", type=int, default=5000, help="Rows of the synthetic upload without --file-id")
+    parser.add_argument("--merchants", type=int, default=500, help="Distinct synthetic merchant names")
+    parser.add_argument("--year", type=int, default=None, help="doojo year")
+    parser.add_argument("--month", type=int, default=None, help="doojo month")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between job status polls")
+    parser.add_argument("--job-timeout", type=float, default=3600.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.scenario == "doojo" and not args.file_id:
+        parser.error("doojo needs --file-id")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+OpenAI-compatible mock LLM server for offline benchmarks
+
+Serves POST /v1/chat/completions like the GMS endpoint:
+- Structured outputs (response_format json_schema) are answered with a
+  JSON document generated from the schema. Numbered transactions in the
+  prompt ("[1]", "[2]", ...) get one item each, and categories are picked
+  from the prompt's category list, so the classifier's validation accepts
+  the answers.
+- Plain completions (doojo advice messages) get a short text answer.
+
+Latency, error rate and rate limiting are configurable to reproduce a
+slow or overloaded upstream. GET /stats reports the calls received and
+POST /stats/reset clears them, so a benchmark can count LLM calls per
+transaction.
+
+Usage:
+    python mock_llm_server.py --port 8099 --latency-ms 400 --jitter-ms 200 \\
+        --error-rate 0.01 --rpm-limit 600
+
+Then point the services at it:
+    GMS_BASE_URL=http://127.0.0.1:8099/v1 GMS_API_KEY=test
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Categories used when the prompt does not list any
+DEFAULT_CATEGORIES = {"기타": ["기타"]}
+
+# "## 카테고리 정의" section of the classifier's system prompt and its
+# "- 식비: 한식, 중식, ..." lines
+CATEGORY_SECTION = re.compile(r"^## 카테고리 정의\n(.*?)(?=^#|\Z)", re.MULTILINE | re.DOTALL)
+CATEGORY_LINE = re.compile(r"^- ([^:\n]+): (.+)$", re.MULTILINE)
+
+# "[3]" transaction numbers of a multi-transaction prompt
+ITEM_NUMBER = re.compile(r"^\[(\d+)\]$", re.MULTILINE)
+
+# "가맹점: ..." lines of a transaction
+MERCHANT_LINE = re.compile(r"^가맹점: (.*)$", re.MULTILINE)
+
+
+class MockBehaviour:
+    """Latency, failure and rate-limit settings of the mock upstream"""
+
+    def __init__(
+        self,
+        latency_ms: float = 300.0,
+        jitter_ms: float = 100.0,
+        per_item_ms: float = 20.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        rpm_limit: int = 0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_item_ms = per_item_ms  # Extra latency per answered transaction
+        self.error_rate = error_rate  # Share of calls answered with 500
+        self.rate_limit_rate = rate_limit_rate  # Share of calls answered with 429
+        self.rpm_limit = rpm_limit  # Calls per rolling minute before 429s (0 = unlimited)
+        self.retry_after = retry_after  # Retry-After header of 429 responses
+        self.random = random.Random(seed)
+
+
+class MockStats:
+    """Calls received since the last reset"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.started_at = time.time()
+        self.calls = 0
+        self.structured_calls = 0
+        self.items = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.responses: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "since": self.started_at,
+            "calls": self.calls,
+            "structured_calls": self.structured_calls,
+            "items": self.items,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "responses": {str(code): count for code, count in sorted(self.responses.items())},
+            "max_in_flight": self.max_in_flight
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (Korean text is about one token per 2 characters)"""
+    return max(1, len(text) // 2)
+
+
+def parse_categories(messages: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Category definitions listed in the system prompt"""
+    for message in messages:
+        if message.get("role") != "system":
+            continue
+        section = CATEGORY_SECTION.search(message.get("content") or "")
+        if section is None:
+            continue
+        found = {
+            category.strip(): [sub.strip() for sub in subcategories.split(",")]
+            for category, subcategories in CATEGORY_LINE.findall(section.group(1))
+        }
+        if found:
+            return found
+    return DEFAULT_CATEGORIES
+
+
+def parse_transactions(prompt: str) -> List[Tuple[int, str]]:
+    """(number, merchant) of each numbered transaction, or one unnumbered one"""
+    numbers = [int(number) for number in ITEM_NUMBER.findall(prompt)]
+    merchants = MERCHANT_LINE.findall(prompt)
+    if not numbers:
+        return [(1, merchants[0] if merchants else prompt)]
+    return list(zip(numbers, merchants + [""] * (len(numbers) - len(merchants))))
+
+
+def pick_label(merchant: str, categories: Dict[str, List[str]]) -> Tuple[str, str]:
+    """Deterministic category/subcategory for a merchant name"""
+    digest = int(hashlib.md5(merchant.encode("utf-8")).hexdigest(), 16)
+    names = list(categories)
+    category = names[digest % len(names)]
+    subcategories = categories[category] or [""]
+    return category, subcategories[(digest // len(names)) % len(subcategories)]
+
+
+class SchemaFaker:
+    """Generates a document matching a JSON schema for one transaction list"""
+
+    def __init__(self, schema: Dict[str, Any], transactions: List[Tuple[int, str]], categories: Dict[str, List[str]]):
+        self.definitions = schema.get("$defs", schema.get("definitions", {}))
+        self.transactions = transactions
+        self.categories = categories
+
+    def resolve(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        while "$ref" in schema:
+            schema = self.definitions[schema["$ref"].rsplit("/", 1)[-1]]
+        return schema
+
+    def generate(self, schema: Dict[str, Any], number: int, merchant: str) -> Any:
+        schema = self.resolve(schema)
+        for combinator in ("anyOf", "oneOf", "allOf"):
+            if combinator in schema:
+                options = [self.resolve(option) for option in schema[combinator]]
+                concrete = [option for option in options if option.get("type") != "null"]
+                return self.generate((concrete or options)[0], number, merchant)
+        if "enum" in schema:
+            return schema["enum"][0]
+        if "const" in schema:
+            return schema["const"]
+
+        kind = schema.get("type")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if k != "null"), "null")
+        if kind == "object":
+            return self.generate_object(schema, number, merchant)
+        if kind == "array":
+            item_schema = self.resolve(schema.get("items", {}))
+            if "index" in item_schema.get("properties", {}):
+                return [self.generate(item_schema, n, m) for n, m in self.transactions]
+            return [self.generate(item_schema, number, merchant)]
+        if kind == "integer":
+            return number
+        if kind == "number":
+            return 0.9
+        if kind == "boolean":
+            return True
+        if kind == "null":
+            return None
+        return "mock"
+
+    def generate_object(self, schema: Dict[str, Any], number: int, merchant: str) -> Dict[str, Any]:
+        category, subcategory = pick_label(merchant, self.categories)
+        document = {}
+        for name, property_schema in schema.get("properties", {}).items():
+            if name == "index":
+                document[name] = number
+            elif name == "category":
+                document[name] = category
+            elif name == "subcategory":
+                document[name] = subcategory
+            elif name == "confidence":
+                document[name] = 0.9
+            elif name == "reasoning":
+                document[name] = f"{merchant} → {category}/{subcategory}"
+            else:
+                document[name] = self.generate(property_schema, number, merchant)
+        return document
+
+
+def build_answer(body: Dict[str, Any]) -> Tuple[str, int]:
+    """Response content for a chat completion request and the items it answers"""
+    messages = body.get("messages", [])
+    prompt = next(
+        (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"),
+        ""
+    )
+    transactions = parse_transactions(prompt)
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") != "json_schema":
+        return "이번 달은 이 가게 지출을 조금만 줄여보자.", 1
+
+    schema = response_format["json_schema"]["schema"]
+    faker = SchemaFaker(schema, transactions, parse_categories(messages))
+    number, merchant = transactions[0]
+    document = faker.generate(schema, number, merchant)
+    return json.dumps(document, ensure_ascii=False), len(transactions)
+
+
+def create_app(behaviour: MockBehaviour) -> FastAPI:
+    app = FastAPI(title="Mock LLM Server")
+    stats = MockStats()
+    recent_calls: Deque[float] = deque()
+
+    def error(status_code: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        stats.responses[status_code] += 1
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"message": message, "type": "mock_error", "code": status_code}},
+            headers=headers
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.calls += 1
+
+        now = time.monotonic()
+        while recent_calls and now - recent_calls[0] >= 60:
+            recent_calls.popleft()
+        rate_limited = behaviour.rpm_limit and len(recent_calls) >= behaviour.rpm_limit
+        if rate_limited or behaviour.random.random() < behaviour.rate_limit_rate:
+            return error(429, "Rate limit reached", {"retry-after": str(behaviour.retry_after)})
+        recent_calls.append(now)
+
+        content, items = build_answer(body)
+        if (body.get("response_format") or {}).get("type") == "json_schema":
+            stats.structured_calls += 1
+
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            delay = behaviour.latency_ms + behaviour.per_item_ms * items
+            delay += behaviour.random.uniform(-behaviour.jitter_ms, behaviour.jitter_ms)
+            await asyncio.sleep(max(delay, 0.0) / 1000)
+        finally:
+            stats.in_flight -= 1
+
+        if behaviour.random.random() < behaviour.error_rate:
+            return error(500, "Mock upstream failure")
+
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in body.get("messages", []))
+        completion_tokens = estimate_tokens(content)
+        stats.items += items
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.responses[200] += 1
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.to_dict()
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.reset()
+        return stats.to_dict()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Base latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +/- latency jitter")
+    parser.add_argument("--per-item-ms", type=float, default=20.0, help="Extra latency per answered transaction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls rejected with 429")
+    parser.add_argument("--rpm-limit", type=int, default=0, help="Calls per minute before 429s (0 = unlimited)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds of 429 responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    behaviour = MockBehaviour(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        per_item_ms=args.per_item_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm_limit=args.rpm_limit,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(behaviour), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
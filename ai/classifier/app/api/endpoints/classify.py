@@ -1,17 +1,34 @@
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, StreamingResponse
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Depends, Body
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from datetime import datetime
+import logging
+
+from app.core.config import settings
 
 from app.models.schemas import (
     SingleClassificationResponse,
+    BulkTransaction,
+    BulkClassificationResponse,
     BatchClassificationResponse,
-    ClassificationStatus
+    ClassificationStatus,
+    JobStatus
 )
-from app.services.classifier_service import ClassifierService
+from app.services.classifier_service import ClassifierService, get_classifier_service
+from app.services.classification_cache import classification_cache
+from app.services.local_model import local_model
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Content types of the downloadable result formats
+RESULT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "ndjson": "application/x-ndjson"
+}
+
 
 @router.get("")
 async def classify_single(
@@ -19,7 +36,7 @@ async def classify_single(
     amount: float = Query(..., description="Transaction amount"),
     transaction_date_time: datetime = Query(..., description="Transaction timestamp in ISO 8601 format"),
     description: Optional[str] = Query(None, description="Optional transaction description"),
-    classifier_service: ClassifierService = Depends(lambda: ClassifierService())
+    classifier_service: ClassifierService = Depends(get_classifier_service)
 ):
     """
     카테고리 분류 (단건)
@@ -57,7 +74,7 @@ async def classify_single(
 async def classify_batch(
     file_id: str = Query(..., description="File ID from CSV upload"),
     background_tasks: BackgroundTasks = BackgroundTasks(),
-    classifier_service: ClassifierService = Depends(lambda: ClassifierService())
+    classifier_service: ClassifierService = Depends(get_classifier_service)
 ):
     """
     카테고리 분류 (배치)
@@ -75,8 +92,10 @@ async def classify_batch(
         import uuid
         from datetime import datetime
 
-        # Generate job ID
+        # Generate job ID and register the job, so status and download
+        # requests to any replica find it right away
         job_id = str(uuid.uuid4())
+        await classifier_service.create_job(job_id, file_id)
 
         # Start background processing
         background_tasks.add_task(
@@ -97,26 +116,230 @@ async def classify_batch(
         raise HTTPException(status_code=500, detail=f"Failed to start batch classification: {str(e)}")
 
 
+@router.post("/bulk")
+async def classify_bulk(
+    transactions: List[BulkTransaction] = Body(
+        ...,
+        max_length=settings.BULK_MAX_TRANSACTIONS,
+        description="Transactions to classify"
+    ),
+    classifier_service: ClassifierService = Depends(get_classifier_service)
+):
+    """
+    카테고리 분류 (다건, 동기)
+
+    Classify a JSON array of transactions in one request and return the
+    results in input order. Transactions of the same merchant (normalized
+    name and amount range) are classified once, and the remaining distinct
+    merchants are sent to the LLM together, BATCH_SIZE per request.
+
+    Example:
+    POST /api/ai/classify/bulk
+    [{"merchant_name": "스타벅스", "amount": 4800, "transaction_date_time": "2025-09-05T10:12:00Z"}]
+
+    Returns:
+        Category classification result for each transaction
+    """
+    try:
+        results = await classifier_service.classify_many([
+            {
+                "merchant_name": transaction.merchant_name,
+                "amount": transaction.amount,
+                "timestamp": transaction.transaction_date_time,
+                "description": transaction.description
+            }
+            for transaction in transactions
+        ])
+
+        return BulkClassificationResponse(
+            total=len(results),
+            results=[
+                SingleClassificationResponse(
+                    merchant_name=transaction.merchant_name,
+                    amount=transaction.amount,
+                    category=result["category"],
+                    subcategory=result.get("subcategory"),
+                    confidence=result["confidence"],
+                    timestamp=transaction.transaction_date_time
+                )
+                for transaction, result in zip(transactions, results)
+            ]
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk classification failed: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def classification_cache_stats():
+    """
+    분류 캐시 통계
+
+    Hit/miss counters of the normalized-merchant classification cache
+    (in-process LRU and Redis) since the process started.
+
+    Example:
+    GET /api/ai/classify/cache/stats
+
+    Returns:
+        Cache size, hits per tier, misses and hit rate
+    """
+    return classification_cache.stats()
+
+
+@router.get("/model/stats")
+async def local_model_stats(
+    classifier_service: ClassifierService = Depends(get_classifier_service)
+):
+    """
+    로컬 분류 모델 상태 및 처리 비율
+
+    Active local model version with its holdout evaluation, and the share
+    of transactions answered by rules, the local model, the cache and the
+    LLM since the process started.
+
+    Example:
+    GET /api/ai/classify/model/stats
+
+    Returns:
+        Model metadata and per-step counts and shares
+    """
+    return {
+        "model": local_model.info(),
+        "traffic": classifier_service.traffic_stats()
+    }
+
+
+@router.post("/model/train")
+async def train_local_model(
+    training_data_key: Optional[str] = Query(
+        None, description="Optional batch job result object key (e.g. classified/<job_id>.csv)"
+    ),
+    model_name: Optional[str] = Query(
+        None, description="Version name: letters, digits, '.', '_' and '-' (defaults to a timestamp)"
+    ),
+    classifier_service: ClassifierService = Depends(get_classifier_service)
+):
+    """
+    로컬 분류 모델 학습
+
+    Train a new version of the local merchant model from rule keywords,
+    labels recorded from confident LLM classifications and an optional
+    batch job result in MinIO, and activate it.
+
+    Example:
+    POST /api/ai/classify/model/train
+
+    Returns:
+        Metadata of the new version, including holdout accuracy
+    """
+    try:
+        return await classifier_service.train_model(training_data_key, model_name)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Model training failed: {e}")
+        raise HTTPException(status_code=500, detail="Model training failed")
+
+
+@router.get("/status")
+async def classification_job_status(
+    job_id: str = Query(..., description="Job ID from batch classification"),
+    classifier_service: ClassifierService = Depends(get_classifier_service)
+):
+    """
+    카테고리 분류 작업 상태 조회
+
+    Status and progress of a batch classification job. Job state is shared
+    through Redis, so any classifier replica can answer.
+
+    Example:
+    GET /api/ai/classify/status?job_id=abc-123
+
+    Returns:
+        Job status, progress (0-100) and error message if the job failed
+    """
+    job = await classifier_service.get_job_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    if job.status == JobStatus.PROCESSING:
+        message = f"{job.processed_records} records processed"
+    else:
+        message = job.error_message
+
+    return ClassificationStatus(
+        job_id=job.job_id,
+        status=job.status,
+        progress=job.progress,
+        message=message
+    )
+
+
+@router.post("/resume")
+async def resume_batch(
+    job_id: str = Query(..., description="Job ID of a failed or interrupted batch classification"),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    classifier_service: ClassifierService = Depends(get_classifier_service)
+):
+    """
+    카테고리 분류 (배치) 재개
+
+    Resume a failed batch job, or one whose replica stopped, from its last
+    checkpoint. Rows already written to the result object are not
+    classified again.
+
+    Example:
+    POST /api/ai/classify/resume?job_id=abc-123
+
+    Returns:
+        Job ID and status of the resumed job
+    """
+    try:
+        job = await classifier_service.claim_resume(job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    background_tasks.add_task(
+        classifier_service.process_batch,
+        job_id=job_id,
+        csv_key=job.file_id,
+        options={}
+    )
+
+    return BatchClassificationResponse(
+        job_id=job_id,
+        status="processing",
+        message=f"Batch classification resumed after {job.processed_records} records",
+        created_at=job.created_at
+    )
+
+
 @router.get("/download")
 async def download_classified_file(
     job_id: str = Query(..., description="Job ID from batch classification"),
-    classifier_service: ClassifierService = Depends(lambda: ClassifierService())
+    format: Literal["csv", "parquet", "ndjson"] = Query("csv", description="Result file format"),
+    classifier_service: ClassifierService = Depends(get_classifier_service)
 ):
     """
     카테고리 분류된 파일 다운로드
 
-    Download the CSV file with category classifications added.
-    The file must have been previously processed through the classify endpoint.
+    Download the file with category classifications added, as CSV,
+    Parquet or NDJSON. The file must have been previously processed
+    through the classify endpoint.
 
     Example:
-    GET /api/ai/classify/download?job_id=abc-123
+    GET /api/ai/classify/download?job_id=abc-123&format=parquet
 
     Returns:
-        CSV file with category column added to original data
+        File with category, subcategory and confidence columns added to
+        the original data
     """
     try:
-        import os
-
         # Check job status
         job = await classifier_service.get_job_status(job_id)
 
@@ -130,19 +353,19 @@ async def download_classified_file(
             )
 
         # Get result file
-        result_file = await classifier_service.get_result_file(job_id)
+        result = await classifier_service.get_result_file(job_id, format)
 
-        if not result_file or not os.path.exists(result_file):
+        if result is None:
             raise HTTPException(status_code=404, detail="Result file not found")
 
-        # Return file
-        return FileResponse(
-            path=result_file,
-            media_type='text/csv',
-            filename=f"classified_{job_id}.csv"
+        # Stream file
+        return StreamingResponse(
+            result,
+            media_type=RESULT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="classified_{job_id}.{format}"'}
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
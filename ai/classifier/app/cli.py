@@ -0,0 +1,91 @@
+"""
+Maintenance commands for the classifier
+
+Usage:
+    python -m app.cli train-model [--csv PATH ...] [--version NAME]
+    python -m app.cli activate-model VERSION
+    python -m app.cli list-models
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.redis import close_redis
+from app.services.local_model import local_model
+from app.services.training_data import collect_samples
+
+
+async def train_model(args: argparse.Namespace) -> int:
+    """Train and activate a new local model version"""
+    samples, sources = await collect_samples(args.csv)
+    try:
+        metadata = local_model.train(samples, sources, args.version)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(json.dumps(metadata, ensure_ascii=False))
+    return 0
+
+
+async def activate_model(args: argparse.Namespace) -> int:
+    """Activate a stored version (roll forward or back)"""
+    try:
+        local_model.activate(args.version)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(json.dumps(local_model.info(), ensure_ascii=False))
+    return 0
+
+
+async def list_models(args: argparse.Namespace) -> int:
+    """Print stored versions, newest first"""
+    local_model.load()
+    active = local_model.metadata["version"] if local_model.metadata else None
+    for metadata in local_model.versions():
+        print(json.dumps({**metadata, "active": metadata["version"] == active}, ensure_ascii=False))
+    return 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run a command and release the Redis pool afterwards"""
+    try:
+        return await args.func(args)
+    finally:
+        await close_redis()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="classifier maintenance commands"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train = subparsers.add_parser(
+        "train-model",
+        help="Train a local model version from rules, recorded LLM labels and CSV files"
+    )
+    train.add_argument("--csv", action="append", default=[], metavar="PATH", help="Labelled CSV file (repeatable)")
+    train.add_argument("--version", help="Version name (defaults to a timestamp)")
+    train.set_defaults(func=train_model)
+
+    activate = subparsers.add_parser("activate-model", help="Make a stored model version active")
+    activate.add_argument("version", metavar="VERSION", help="Version to activate")
+    activate.set_defaults(func=activate_model)
+
+    listing = subparsers.add_parser("list-models", help="List stored model versions")
+    listing.set_defaults(func=list_models)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
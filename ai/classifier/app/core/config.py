@@ -28,20 +28,62 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: str = "expense-classifier-bucket"
     AWS_REGION: str = "us-east-1"
     
+    # MinIO (csv-manager's uploads are read from and results written to MINIO_BUCKET)
+    MINIO_ENDPOINT: Optional[str] = None
+    MINIO_ACCESS_KEY: Optional[str] = None
+    MINIO_SECRET_KEY: Optional[str] = None
+    MINIO_BUCKET: str = "csv"
+    MINIO_SECURE: bool = True
+    VERIFY_SSL: bool = True
+    
     # OpenAI GPT Configuration (via GMS)
     GMS_API_KEY: Optional[str] = None
     GMS_BASE_URL: str = "https://gms.ssafy.io/gmsapi/api.openai.com/v1"
     OPENAI_MODEL: str = "gpt-5-nano"
     OPENAI_MAX_TOKENS: int = 4000
+    OPENAI_BATCH_MAX_TOKENS: int = 16000  # Multi-transaction requests answer BATCH_SIZE items
     OPENAI_TEMPERATURE: float = 0.3
     
     # Classification Settings
-    BATCH_SIZE: int = 10  # Smaller batches for API rate limits
-    MAX_WORKERS: int = 4
-    CONFIDENCE_THRESHOLD: float = 0.7
+    BATCH_SIZE: int = 25  # Transactions per LLM request in batch classification
+    CLASSIFY_WINDOW_SIZE: int = 500  # Rows read, classified and written per step of a batch job
+    BULK_MAX_TRANSACTIONS: int = 5000  # Transactions accepted by one POST /classify/bulk request
+    CLASSIFY_RESULT_PREFIX: str = "classified/"  # Result object key prefix in MINIO_BUCKET
+    CLASSIFY_RESULT_PART_SIZE: int = 8 * 1024 * 1024  # Multipart part size, also the checkpoint interval (min 5 MiB)
+    CLASSIFY_JOB_STALE_AFTER: int = 300  # Seconds without progress before a processing job can be resumed
+    MAX_WORKERS: int = 4  # Concurrent LLM requests per process
+    CONFIDENCE_THRESHOLD: float = 0.7  # Local model answers at or above it; LLM answers at or above it become training labels
     DEFAULT_CATEGORY: str = "Other"
-    GPT_TIMEOUT: int = 30  # seconds
-    GPT_RETRY_COUNT: int = 3
+    GPT_TIMEOUT: int = 30  # seconds, single-transaction request
+    GPT_BATCH_TIMEOUT: int = 120  # seconds, multi-transaction request
+    GPT_RETRY_COUNT: int = 3  # Retries after rate limits, timeouts and 5xx errors
+    GPT_RETRY_BACKOFF: float = 1.0  # seconds, doubled per retry (with jitter)
+    GPT_RETRY_MAX_BACKOFF: float = 30.0
+    OPENAI_REQUESTS_PER_MINUTE: int = 500
+    OPENAI_TOKENS_PER_MINUTE: int = 200000
+    
+    # Classification cache (normalized merchant + amount bucket)
+    CLASSIFY_CACHE_SIZE: int = 10000  # In-process LRU entries
+    CLASSIFY_CACHE_TTL: int = 2592000  # Redis entry lifetime (30 days)
+    CLASSIFY_JOB_TTL: int = 604800  # Batch job state kept in Redis (7 days)
+    
+    # Deterministic merchant rules evaluated before the LLM
+    MERCHANT_RULES_PATH: Optional[str] = None  # Defaults to app/data/merchant_rules.json
+    
+    # Local merchant model (character n-gram Naive Bayes) consulted before the LLM
+    LOCAL_MODEL_ENABLED: bool = True
+    LOCAL_MODEL_DIR: str = "./models/merchant_nb"  # Versioned model files and CURRENT pointer
+    LOCAL_MODEL_MIN_SAMPLES: int = 100  # Minimum labelled merchants to train
+    LOCAL_MODEL_RELOAD_INTERVAL: int = 60  # Seconds between checks for a newly activated version
+    
+    # Redis (optional - the in-process cache is used alone if REDIS_HOST is unset)
+    REDIS_HOST: Optional[str] = None
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
+    REDIS_POOL_SIZE: int = 20  # Max pooled connections per process
+    REDIS_POOL_TIMEOUT: int = 5  # Seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: int = 5
     
     # Logging
     LOG_LEVEL: str = "INFO"
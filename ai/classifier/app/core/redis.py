@@ -0,0 +1,206 @@
+"""
+Shared async Redis access with connection pooling and command latency metrics
+
+Every Redis call in the service goes through the client returned by
+get_redis(). The module is mirrored in each service that talks to Redis,
+since every service is built from its own context.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class CommandStats:
+    """Per-command call counts, errors and latency histogram"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, command: str, elapsed_ms: float, failed: bool = False):
+        entry = self._stats.get(command)
+        if entry is None:
+            entry = {
+                "calls": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            }
+            self._stats[command] = entry
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        if failed:
+            entry["errors"] += 1
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                entry["buckets"][i] += 1
+                break
+        else:
+            entry["buckets"][-1] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for command, entry in sorted(self._stats.items()):
+            labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["gt_1000ms"]
+            result[command] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "histogram": dict(zip(labels, entry["buckets"]))
+            }
+        return result
+
+    def reset(self):
+        self._stats.clear()
+
+
+command_stats = CommandStats()
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline that records the latency of each execute() round trip"""
+
+    async def execute(self, raise_on_error: bool = True):
+        name = "MULTI" if (self.is_transaction or self.explicit_transaction) else "PIPELINE"
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await super().execute(raise_on_error)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            command_stats.record(name, (time.perf_counter() - start) * 1000, failed)
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Async Redis client that records the latency of every command"""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            command_stats.record(str(args[0]).upper(), (time.perf_counter() - start) * 1000, failed)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+_client: Optional[InstrumentedRedis] = None
+
+
+def get_redis() -> InstrumentedRedis:
+    """Get or create the pooled async Redis client (connections are opened lazily)"""
+    global _client
+    if _client is None:
+        pool = aioredis.BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+            max_connections=settings.REDIS_POOL_SIZE,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            retry_on_timeout=True,
+            health_check_interval=30
+        )
+        _client = InstrumentedRedis(connection_pool=pool)
+        logger.info(
+            f"Redis pool created for {settings.REDIS_HOST}:{settings.REDIS_PORT} "
+            f"(max {settings.REDIS_POOL_SIZE} connections)"
+        )
+    return _client
+
+
+def create_subscriber_client() -> aioredis.Redis:
+    """
+    Dedicated client for a long-lived pub/sub subscription.
+
+    Kept out of the shared pool, since a subscription holds its connection
+    for good, and without a socket timeout, which would drop (and silently
+    resubscribe) an idle subscription; health check pings and TCP
+    keepalive detect dead connections instead.
+    """
+    return aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_timeout=None,
+        socket_keepalive=True,
+        health_check_interval=30
+    )
+
+
+async def init_redis() -> None:
+    """Verify Redis connectivity (called from the application lifespan)"""
+    await get_redis().ping()
+    logger.info("Redis connection successful")
+
+
+async def close_redis() -> None:
+    """Close the client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def set_with_ttl(key: str, value: str, ttl: int) -> None:
+    """Set a value and its expiry atomically (SET EX, one round trip)"""
+    await get_redis().set(key, value, ex=ttl)
+
+
+async def get_json(key: str) -> Optional[Any]:
+    """Get and decode a JSON value"""
+    data = await get_redis().get(key)
+    return json.loads(data) if data else None
+
+
+async def set_json(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Encode and set a JSON value, optionally with an expiry"""
+    await get_redis().set(key, json.dumps(value), ex=ttl)
+
+
+async def mget_json(keys: List[str]) -> List[Optional[Any]]:
+    """Get and decode several JSON values in one round trip"""
+    if not keys:
+        return []
+    return [json.loads(data) if data else None for data in await get_redis().mget(keys)]
+
+
+def get_command_stats() -> Dict[str, Any]:
+    """Snapshot of per-command latency metrics and pool usage"""
+    pool = get_redis().connection_pool
+    return {
+        "pool": {
+            "max_connections": pool.max_connections,
+            "in_use": len(pool._in_use_connections),
+            "available": len(pool._available_connections)
+        },
+        "commands": command_stats.snapshot()
+    }
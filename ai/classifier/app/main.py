@@ -1,13 +1,59 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.core.config import settings
+from app.core.redis import init_redis, close_redis
+from app.services.classifier_service import get_classifier_service
+from app.services.llm_client import llm_client
+from app.services.local_model import local_model
+
+logger = logging.getLogger(__name__)
+
+
+async def reload_local_model():
+    """Pick up model versions activated by other replicas, off the event loop"""
+    while True:
+        await asyncio.sleep(settings.LOCAL_MODEL_RELOAD_INTERVAL)
+        try:
+            await asyncio.to_thread(local_model.load)
+        except Exception as e:
+            logger.error(f"Failed to reload local merchant model: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Redis backs the shared classification cache and job store; without it
+    # both are process-local
+    if settings.REDIS_HOST:
+        try:
+            await init_redis()
+        except Exception as e:
+            logger.error(f"Redis connection failed, classification cache is process-local: {e}")
+    # Build the service once (category table, shared LLM client) before serving
+    get_classifier_service()
+    try:
+        local_model.load()
+    except Exception as e:
+        logger.error(f"Failed to load local merchant model, using LLM only: {e}")
+    reload_task = asyncio.create_task(reload_local_model())
+    yield
+    reload_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await reload_task
+    await llm_client.close()
+    await close_redis()
+
 
 app = FastAPI(
     title="Expense Classifier Service",
     version="1.0.0",
-    description="AI-powered expense categorization service"
+    description="AI-powered expense categorization service",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -42,6 +42,18 @@ class SingleClassificationResponse(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+class BulkTransaction(BaseModel):
+    merchant_name: str
+    amount: float
+    transaction_date_time: Optional[datetime] = None
+    description: Optional[str] = None
+
+
+class BulkClassificationResponse(BaseModel):
+    total: int
+    results: List[SingleClassificationResponse]  # In request order
+
+
 class BatchClassificationRequest(BaseModel):
     csv_key: str = Field(..., description="S3 key or file reference for CSV")
     options: Optional[Dict[str, Any]] = Field(default_factory=dict)
@@ -58,6 +70,7 @@ class BatchClassificationResponse(BaseModel):
 
 class ClassificationJob(BaseModel):
     job_id: str
+    file_id: Optional[str] = None
     status: JobStatus
     progress: float = Field(ge=0.0, le=100.0)
     total_records: int
@@ -66,8 +79,9 @@ class ClassificationJob(BaseModel):
     created_at: datetime
     updated_at: datetime
     completed_at: Optional[datetime] = None
-    result_file: Optional[str] = None
+    result_file: Optional[str] = None  # Result object key in MinIO
     error_message: Optional[str] = None
+    checkpoint: Optional[Dict[str, Any]] = None  # Uploaded result parts and the rows they cover
 
 
 class ClassificationStatus(BaseModel):
@@ -0,0 +1,245 @@
+"""
+Two-tier classification cache keyed by normalized merchant and amount bucket
+
+Tier 1 is an in-process LRU, tier 2 is Redis with a TTL shared by all
+classifier replicas (skipped when REDIS_HOST is not configured). Concurrent
+lookups of the same key wait for a single classification.
+"""
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_json, get_redis, mget_json, set_json
+from app.services.merchant_normalizer import classification_key
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "classify:merchant:"
+
+
+class ClassificationCache:
+    """In-process LRU in front of Redis, with hit/miss counters"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(merchant_name: str, amount: float) -> Optional[str]:
+        """Cache key, or None for names that normalize to nothing"""
+        merchant, bucket = classification_key(merchant_name, amount)
+        if not merchant:
+            return None
+        return f"{CACHE_KEY_PREFIX}{bucket}:{merchant}"
+
+    async def get_or_classify(
+        self,
+        merchant_name: str,
+        amount: float,
+        classify: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Return the cached classification or compute it with `classify`.
+
+        Only results with a positive confidence are cached, so fallback
+        answers after LLM failures are retried next time.
+        """
+        key = self.cache_key(merchant_name, amount)
+        if key is None:
+            return await classify()
+
+        cached = self._get_local(key)
+        if cached is not None:
+            self.local_hits += 1
+            return dict(cached)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return dict(await asyncio.shield(pending))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._get_remote(key)
+            if result is not None:
+                self.redis_hits += 1
+            else:
+                self.misses += 1
+                result = await classify()
+                if result.get("confidence", 0) > 0:
+                    await self._set_remote(key, result)
+            if result.get("confidence", 0) > 0:
+                self._set_local(key, result)
+            future.set_result(result)
+            return dict(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved for when there are none
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def get_or_classify_many(
+        self,
+        items: List[Tuple[str, float]],
+        classify_batch: Callable[[List[int]], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch variant of get_or_classify for (merchant_name, amount) items.
+
+        Each distinct key is resolved once: from the LRU, from a lookup
+        already in flight, from Redis (one MGET) or by `classify_batch`,
+        which receives the indexes of the items to classify and returns
+        their results in the same order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        owned: "OrderedDict[str, List[int]]" = OrderedDict()
+        waiting: Dict[int, asyncio.Future] = {}
+        uncached: List[int] = []
+
+        for index, (merchant_name, amount) in enumerate(items):
+            key = self.cache_key(merchant_name, amount)
+            cached = self._get_local(key) if key is not None else None
+            if key is None:
+                uncached.append(index)
+            elif key in owned:
+                self.coalesced += 1
+                owned[key].append(index)
+            elif cached is not None:
+                self.local_hits += 1
+                results[index] = dict(cached)
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[index] = self._inflight[key]
+            else:
+                owned[key] = [index]
+
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in owned}
+        self._inflight.update(futures)
+        try:
+            found = dict(zip(owned, await self._get_remote_many(list(owned))))
+            missing = [key for key, result in found.items() if result is None]
+            self.redis_hits += len(found) - len(missing)
+            self.misses += len(missing)
+
+            targets = [owned[key][0] for key in missing] + uncached
+            if targets:
+                classified = await classify_batch(targets)
+                found.update(zip(missing, classified))
+                for index, result in zip(uncached, classified[len(missing):]):
+                    results[index] = result
+                await self._set_remote_many({
+                    key: found[key] for key in missing if found[key].get("confidence", 0) > 0
+                })
+
+            for key, indexes in owned.items():
+                result = found[key]
+                if result.get("confidence", 0) > 0:
+                    self._set_local(key, result)
+                futures[key].set_result(result)
+                for index in indexes:
+                    results[index] = dict(result)
+        except asyncio.CancelledError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            raise
+        finally:
+            for key in owned:
+                del self._inflight[key]
+
+        for index, pending in waiting.items():
+            results[index] = dict(await asyncio.shield(pending))
+        return results
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _set_local(self, key: str, result: Dict[str, Any]) -> None:
+        self._entries[key] = dict(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_remote(self, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.REDIS_HOST:
+            return None
+        try:
+            return await get_json(key)
+        except (RedisError, ValueError) as e:
+            logger.warning(f"Classification cache read failed for {key}: {e}")
+            return None
+
+    async def _get_remote_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not settings.REDIS_HOST or not keys:
+            return [None] * len(keys)
+        try:
+            return await mget_json(keys)
+        except (RedisError, ValueError) as e:
+            logger.warning(f"Classification cache read failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+    async def _set_remote(self, key: str, result: Dict[str, Any]) -> None:
+        if not settings.REDIS_HOST:
+            return
+        try:
+            await set_json(key, result, ttl=self.ttl)
+        except RedisError as e:
+            logger.warning(f"Classification cache write failed for {key}: {e}")
+
+    async def _set_remote_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not settings.REDIS_HOST or not entries:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key, result in entries.items():
+                pipe.set(key, json.dumps(result), ex=self.ttl)
+            await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Classification cache write failed for {len(entries)} keys: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit rate since process start"""
+        hits = self.local_hits + self.redis_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "redis_enabled": bool(settings.REDIS_HOST),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+classification_cache = ClassificationCache(
+    max_entries=settings.CLASSIFY_CACHE_SIZE,
+    ttl=settings.CLASSIFY_CACHE_TTL
+)
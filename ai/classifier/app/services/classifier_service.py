@@ -1,9 +1,9 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 from datetime import datetime
+import asyncio
 import logging
 import json
-import os
-from openai import OpenAI
+import posixpath
 from pydantic import BaseModel
 
 from app.models.schemas import (
@@ -13,6 +13,23 @@ from app.models.schemas import (
     ClassificationResult
 )
 from app.core.config import settings
+from app.services.classification_cache import classification_cache
+from app.services.csv_metadata import get_file_metadata, object_keys
+from app.services.job_store import job_store
+from app.services.llm_client import llm_client
+from app.services.local_model import local_model
+from app.services.object_storage import (
+    RESULT_ENCODING,
+    CsvObjectReader,
+    MultipartResultWriter,
+    create_s3_client,
+    iter_ndjson,
+    iter_object,
+    object_exists,
+    write_parquet
+)
+from app.services.rule_matcher import merchant_rules
+from app.services.training_data import collect_samples, record_labels
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +42,19 @@ class TransactionClassificationWithCoT(BaseModel):
     subcategory: str
     confidence: float
 
+# Internal batch schema: one indexed item per transaction in the request
+class BatchItemClassificationWithCoT(BaseModel):
+    """Classification of one numbered transaction in a batch request"""
+    index: int  # Transaction number as given in the prompt (1-based)
+    reasoning: str
+    category: str
+    subcategory: str
+    confidence: float
+
+class BatchClassificationWithCoT(BaseModel):
+    """Internal schema for multi-transaction requests"""
+    items: List[BatchItemClassificationWithCoT]
+
 # External schema (without reasoning)
 class TransactionClassification(BaseModel):
     """External schema for API response"""
@@ -39,16 +69,13 @@ class ClassifierService:
     """
 
     def __init__(self):
-        # Initialize OpenAI client with GMS endpoint
-        self.client = OpenAI(
-            api_key=settings.GMS_API_KEY,
-            base_url=settings.GMS_BASE_URL
-        )
-        self.model = settings.OPENAI_MODEL
+        # Shared rate-limited async client for the GMS endpoint
+        self.llm = llm_client
         self.categories = self._load_categories()
-        self.jobs = {}  # In-memory job storage (use Redis/DB in production)
-        self.results_path = "./classification_results"
-        os.makedirs(self.results_path, exist_ok=True)
+        self.job_store = job_store  # Redis-backed, shared by replicas
+        # Transactions by the step that answered them (cache = total - others)
+        self.served = {"total": 0, "rules": 0, "local_model": 0, "llm": 0}
+        self._s3_client = None  # Created on first batch job (MinIO)
         
     def _load_categories(self) -> Dict[str, List[str]]:
         """Load expense categories and subcategories with detailed definitions"""
@@ -128,6 +155,88 @@ class ClassifierService:
             }
         ]
 
+    def _get_batch_few_shot_examples(self) -> List[Dict[str, str]]:
+        """Few-shot examples combined into one numbered batch request and answer"""
+        examples = self._get_few_shot_examples()
+        requests = [example["content"] for example in examples[0::2]]
+        answers = [json.loads(example["content"]) for example in examples[1::2]]
+        return [
+            {
+                "role": "user",
+                "content": "\n\n".join(
+                    f"[{index}]\n{content}" for index, content in enumerate(requests, start=1)
+                )
+            },
+            {
+                "role": "assistant",
+                "content": json.dumps(
+                    {"items": [
+                        {"index": index, **answer} for index, answer in enumerate(answers, start=1)
+                    ]},
+                    ensure_ascii=False
+                )
+            }
+        ]
+
+    def _build_system_prompt(self, batch: bool = False) -> str:
+        """System prompt with role, category definitions, guidelines and rubric"""
+        category_info = "\n".join([
+            f"- {cat}: {', '.join(subcats)}"
+            for cat, subcats in self.categories.items()
+        ])
+
+        if batch:
+            response_format = """## 응답 형식
+- 번호가 매겨진 여러 거래가 주어집니다. 모든 거래에 대해 items 목록에 하나씩 답합니다.
+- index: 거래 번호 ([1], [2], ...의 숫자)
+- reasoning: 단계별 추론 과정 (내부용, 외부 노출 안 됨)
+- category: 선택한 주 카테고리
+- subcategory: 선택한 세부 카테고리
+- confidence: 분류 신뢰도 (0.0 ~ 1.0)
+- 각 거래는 독립적으로 판단합니다."""
+        else:
+            response_format = """## 응답 형식
+- reasoning: 단계별 추론 과정 (내부용, 외부 노출 안 됨)
+- category: 선택한 주 카테고리
+- subcategory: 선택한 세부 카테고리
+- confidence: 분류 신뢰도 (0.0 ~ 1.0)"""
+
+        return f"""당신은 한국 소비자 금융 거래 카테고리 분류 전문가입니다.
+
+## 역할 (Role)
+- 가맹점 정보, 거래 금액, 거래 시간을 기반으로 13개 카테고리 중 가장 적합한 카테고리를 선택합니다.
+- 단계별 추론(Chain of Thought)을 통해 신중하게 판단합니다.
+- 경계가 애매한 케이스는 브랜드, 금액, 문맥을 종합적으로 고려합니다.
+
+## 카테고리 정의
+{category_info}
+
+{self._get_category_guidelines()}
+
+{response_format}
+
+## 신뢰도 기준
+- 0.9 이상: 명확한 브랜드/키워드 매칭
+- 0.7~0.9: 강한 추론 근거 존재
+- 0.5~0.7: 문맥적 추론
+- 0.5 미만: 불확실"""
+
+    def _format_transaction(
+        self,
+        merchant_name: str,
+        amount: float,
+        timestamp: Optional[datetime] = None,
+        description: Optional[str] = None
+    ) -> str:
+        """Transaction details as shown to the model"""
+        timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M") if timestamp else "N/A"
+        message = f"""가맹점: {merchant_name}
+금액: {amount:,.0f}원
+일시: {timestamp_str}"""
+        if description:
+            message += f"\n설명: {description}"
+        return message
+
     def _apply_rule_based_postprocessing(
         self,
         merchant_name: str,
@@ -137,56 +246,19 @@ class ClassifierService:
         confidence: float
     ) -> Dict[str, Any]:
         """Apply rule-based post-processing for edge cases"""
-        merchant_lower = merchant_name.lower()
-
-        # Rule 1: Known cafe chains should always be "카페"
-        cafe_keywords = ['스타벅스', 'starbucks', '투썸', 'twosome', '이디야', 'ediya',
-                        '커피빈', 'coffee bean', '할리스', 'hollys', '파스쿠찌', 'pascucci',
-                        '메가커피', 'mega', '컴포즈커피', 'compose']
-        if any(kw in merchant_lower for kw in cafe_keywords):
-            if category != "카페":
-                logger.info(f"Rule correction: {merchant_name} → 카페 (was: {category})")
-                return {"category": "카페", "subcategory": "커피전문점", "confidence": 0.95}
-
-        # Rule 2: Convenience stores
-        convenience_keywords = ['gs25', 'cu', '세븐일레븐', '7-eleven', '이마트24', 'emart24',
-                               '미니스톱', 'ministop']
-        if any(kw in merchant_lower for kw in convenience_keywords):
-            if category != "마트/편의점":
-                logger.info(f"Rule correction: {merchant_name} → 마트/편의점 (was: {category})")
-                return {"category": "마트/편의점", "subcategory": "편의점", "confidence": 0.95}
-
-        # Rule 3: Drugstores (cosmetics)
-        drugstore_keywords = ['올리브영', 'olive young', '왓슨스', 'watsons', '롭스', 'lohbs']
-        if any(kw in merchant_lower for kw in drugstore_keywords):
-            if category != "패션/미용":
-                logger.info(f"Rule correction: {merchant_name} → 패션/미용 (was: {category})")
-                return {"category": "패션/미용", "subcategory": "화장품", "confidence": 0.90}
-
-        # Rule 4: Fast food chains
-        fastfood_keywords = ['맥도날드', 'mcdonald', '버거킹', 'burger king', '롯데리아', 'lotteria',
-                            'kfc', '맘스터치', "mom's touch", '서브웨이', 'subway']
-        if any(kw in merchant_lower for kw in fastfood_keywords):
-            if category != "식비":
-                logger.info(f"Rule correction: {merchant_name} → 식비 (was: {category})")
-                return {"category": "식비", "subcategory": "패스트푸드", "confidence": 0.93}
-
-        # Rule 5: Large supermarkets
-        supermarket_keywords = ['이마트', 'emart', '홈플러스', 'homeplus', '롯데마트', 'lotte mart',
-                               '코스트코', 'costco', '트레이더스', 'traders']
-        if any(kw in merchant_lower for kw in supermarket_keywords):
-            if category != "마트/편의점":
-                logger.info(f"Rule correction: {merchant_name} → 마트/편의점 (was: {category})")
-                return {"category": "마트/편의점", "subcategory": "대형마트", "confidence": 0.93}
-
-        # Rule 6: Electronics stores (even if name contains "mart")
-        electronics_keywords = ['하이마트', 'himart', '전자랜드', 'electroland', '일렉트로마트', 'electromart']
-        if any(kw in merchant_lower for kw in electronics_keywords):
-            if category != "생활용품":
-                logger.info(f"Rule correction: {merchant_name} → 생활용품 (was: {category})")
-                return {"category": "생활용품", "subcategory": "가전제품", "confidence": 0.90}
-
-        # Rule 7: High amount adjustments (likely home appliances or furniture)
+        # Known merchant chains (compiled keyword rules, longest keyword wins)
+        rule = merchant_rules.match(merchant_name)
+        if rule is not None:
+            if category != rule["category"]:
+                logger.info(f"Rule correction: {merchant_name} → {rule['category']} (was: {category})")
+                return {
+                    "category": rule["category"],
+                    "subcategory": rule["subcategory"],
+                    "confidence": rule["confidence"]
+                }
+            return {"category": category, "subcategory": subcategory, "confidence": confidence}
+
+        # High amount adjustments (likely home appliances or furniture)
         if amount >= 500000 and category in ["마트/편의점", "기타"]:
             logger.info(f"Rule correction: High amount {amount} → 생활용품")
             return {"category": "생활용품", "subcategory": "가전제품", "confidence": 0.80}
@@ -194,12 +266,89 @@ class ClassifierService:
         # No correction needed
         return {"category": category, "subcategory": subcategory, "confidence": confidence}
     
+    def _classify_with_rules(self, merchant_name: str) -> Optional[Dict[str, Any]]:
+        """Classification from a deterministic merchant rule, if one matches"""
+        rule = merchant_rules.match(merchant_name)
+        if rule is None:
+            return None
+        logger.debug(f"Rule match for {merchant_name}: {rule['rule']} ({rule['keyword']})")
+        return {
+            "category": rule["category"],
+            "subcategory": rule["subcategory"],
+            "confidence": rule["confidence"]
+        }
+
+    def _classify_with_local_model(self, merchant_name: str, amount: float) -> Optional[Dict[str, Any]]:
+        """Classification from the local model, if it is confident enough"""
+        if not settings.LOCAL_MODEL_ENABLED:
+            return None
+        prediction = local_model.predict(merchant_name)
+        if prediction is None or prediction["confidence"] < settings.CONFIDENCE_THRESHOLD:
+            return None
+        return self._apply_rule_based_postprocessing(merchant_name=merchant_name, amount=amount, **prediction)
+
+    def traffic_stats(self) -> Dict[str, Any]:
+        """Share of transactions answered by rules, local model, cache and LLM"""
+        total = self.served["total"]
+        counts = {
+            "rules": self.served["rules"],
+            "local_model": self.served["local_model"],
+            "cache": total - self.served["rules"] - self.served["local_model"] - self.served["llm"],
+            "llm": self.served["llm"]
+        }
+        return {
+            "total": total,
+            "counts": counts,
+            "shares": {step: round(count / total, 4) if total else 0.0 for step, count in counts.items()}
+        }
+
     async def classify_single(
         self,
         merchant_name: str,
         amount: float,
         timestamp: Optional[datetime] = None,
         description: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Classify a single expense transaction, reusing cached classifications
+
+        Results are cached by normalized merchant name (branch suffixes,
+        case and spacing removed) and amount bucket, so repeated merchants
+        and other branches of the same merchant skip the LLM call.
+        Transactions with a description bypass the cache since it changes
+        the prompt. Merchants matching a deterministic rule skip both, and
+        so do merchants the local model classifies with a confidence of at
+        least CONFIDENCE_THRESHOLD.
+        """
+        self.served["total"] += 1
+        rule_result = self._classify_with_rules(merchant_name)
+        if rule_result is not None:
+            self.served["rules"] += 1
+            return rule_result
+
+        if description:
+            self.served["llm"] += 1
+            return await self._classify_with_llm(merchant_name, amount, timestamp, description)
+
+        local_result = self._classify_with_local_model(merchant_name, amount)
+        if local_result is not None:
+            self.served["local_model"] += 1
+            return local_result
+
+        async def classify_with_llm() -> Dict[str, Any]:
+            self.served["llm"] += 1
+            result = await self._classify_with_llm(merchant_name, amount, timestamp)
+            await record_labels([(merchant_name, result)])
+            return result
+
+        return await classification_cache.get_or_classify(merchant_name, amount, classify_with_llm)
+
+    async def _classify_with_llm(
+        self,
+        merchant_name: str,
+        amount: float,
+        timestamp: Optional[datetime] = None,
+        description: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Classify a single expense transaction using GPT-5-nano with CoT and structured outputs
@@ -211,44 +360,8 @@ class ClassifierService:
         4. Return only final classification (without reasoning)
         """
         try:
-            # Build category information for the prompt
-            category_info = "\n".join([
-                f"- {cat}: {', '.join(subcats)}"
-                for cat, subcats in self.categories.items()
-            ])
-
-            # Enhanced system prompt with role definition and rubric
-            system_prompt = f"""당신은 한국 소비자 금융 거래 카테고리 분류 전문가입니다.
-
-## 역할 (Role)
-- 가맹점 정보, 거래 금액, 거래 시간을 기반으로 13개 카테고리 중 가장 적합한 카테고리를 선택합니다.
-- 단계별 추론(Chain of Thought)을 통해 신중하게 판단합니다.
-- 경계가 애매한 케이스는 브랜드, 금액, 문맥을 종합적으로 고려합니다.
-
-## 카테고리 정의
-{category_info}
-
-{self._get_category_guidelines()}
-
-## 응답 형식
-- reasoning: 단계별 추론 과정 (내부용, 외부 노출 안 됨)
-- category: 선택한 주 카테고리
-- subcategory: 선택한 세부 카테고리
-- confidence: 분류 신뢰도 (0.0 ~ 1.0)
-
-## 신뢰도 기준
-- 0.9 이상: 명확한 브랜드/키워드 매칭
-- 0.7~0.9: 강한 추론 근거 존재
-- 0.5~0.7: 문맥적 추론
-- 0.5 미만: 불확실"""
-
-            # Prepare user message with transaction info
-            timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M") if timestamp else "N/A"
-            user_message = f"""가맹점: {merchant_name}
-금액: {amount:,.0f}원
-일시: {timestamp_str}"""
-            if description:
-                user_message += f"\n설명: {description}"
+            system_prompt = self._build_system_prompt()
+            user_message = self._format_transaction(merchant_name, amount, timestamp, description)
 
             # Build messages with few-shot examples
             messages = [
@@ -262,16 +375,13 @@ class ClassifierService:
             messages.append({"role": "user", "content": user_message})
 
             # Call OpenAI API with CoT schema (includes reasoning)
-            completion = self.client.beta.chat.completions.parse(
-                model=self.model,
+            result = await self.llm.parse(
                 messages=messages,
                 response_format=TransactionClassificationWithCoT,
-                max_completion_tokens=settings.OPENAI_MAX_TOKENS
+                max_completion_tokens=settings.OPENAI_MAX_TOKENS,
+                timeout=settings.GPT_TIMEOUT
             )
 
-            # Extract structured output with reasoning
-            result = completion.choices[0].message.parsed
-
             logger.debug(f"GPT reasoning for {merchant_name}: {result.reasoning}")
 
             # Apply rule-based post-processing
@@ -298,6 +408,181 @@ class ClassifierService:
                 "subcategory": "기타",
                 "confidence": 0.0
             }
+
+    async def classify_many(
+        self,
+        transactions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several transactions with as few LLM calls as possible
+
+        Each transaction is a dict with merchant_name, amount and optional
+        timestamp and description. Rule matches, confident local model
+        predictions and cached merchants are answered directly, every
+        distinct remaining merchant is classified once, BATCH_SIZE
+        transactions per LLM request. Results are returned in input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(transactions)
+        cacheable: List[int] = []
+        uncacheable: List[int] = []
+
+        self.served["total"] += len(transactions)
+        for index, transaction in enumerate(transactions):
+            rule_result = self._classify_with_rules(transaction["merchant_name"])
+            if rule_result is not None:
+                self.served["rules"] += 1
+                results[index] = rule_result
+                continue
+            if transaction.get("description"):
+                uncacheable.append(index)
+                continue
+            local_result = self._classify_with_local_model(transaction["merchant_name"], transaction["amount"])
+            if local_result is not None:
+                self.served["local_model"] += 1
+                results[index] = local_result
+            else:
+                cacheable.append(index)
+
+        if uncacheable:
+            self.served["llm"] += len(uncacheable)
+            classified = await self._classify_batch_with_llm([transactions[i] for i in uncacheable])
+            for index, result in zip(uncacheable, classified):
+                results[index] = result
+
+        async def classify_with_llm(targets: List[int]) -> List[Dict[str, Any]]:
+            batch = [transactions[cacheable[target]] for target in targets]
+            self.served["llm"] += len(batch)
+            classified = await self._classify_batch_with_llm(batch)
+            await record_labels(zip((t["merchant_name"] for t in batch), classified))
+            return classified
+
+        if cacheable:
+            classified = await classification_cache.get_or_classify_many(
+                [(transactions[i]["merchant_name"], transactions[i]["amount"]) for i in cacheable],
+                classify_with_llm
+            )
+            for index, result in zip(cacheable, classified):
+                results[index] = result
+
+        return results
+
+    async def _classify_batch_with_llm(
+        self,
+        transactions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify transactions with the LLM in requests of BATCH_SIZE
+
+        Requests run concurrently; the shared client bounds concurrency and
+        applies the rate limits.
+        """
+        chunks = await asyncio.gather(*[
+            self._classify_chunk(transactions[start:start + settings.BATCH_SIZE])
+            for start in range(0, len(transactions), settings.BATCH_SIZE)
+        ])
+        return [result for chunk in chunks for result in chunk]
+
+    async def _classify_chunk(
+        self,
+        chunk: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify one chunk in a single request, splitting and retrying the
+        transactions without a valid answer
+
+        A failed request or missing, duplicated or invalid items are retried
+        in two halves; single transactions fall back to the per-transaction
+        request, which returns the default category if that fails too.
+        """
+        if not chunk:
+            return []
+        if len(chunk) == 1:
+            transaction = chunk[0]
+            return [await self._classify_with_llm(
+                transaction["merchant_name"],
+                transaction["amount"],
+                transaction.get("timestamp"),
+                transaction.get("description")
+            )]
+
+        answered = await self._request_batch_classification(chunk)
+        failed = [position for position in range(len(chunk)) if position not in answered]
+        if failed:
+            logger.warning(
+                f"Batch classification answered {len(answered)}/{len(chunk)} transactions, "
+                f"retrying {len(failed)} in halves"
+            )
+            retry = [chunk[position] for position in failed]
+            middle = len(retry) // 2
+            first, second = await asyncio.gather(
+                self._classify_chunk(retry[:middle]),
+                self._classify_chunk(retry[middle:])
+            )
+            answered.update(zip(failed, first + second))
+
+        return [answered[position] for position in range(len(chunk))]
+
+    async def _request_batch_classification(
+        self,
+        chunk: List[Dict[str, Any]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Classify numbered transactions in one structured-output request
+
+        Returns:
+            Valid classifications by position in the chunk; positions that
+            are missing, duplicated or have an unknown category are left out
+        """
+        user_message = "\n\n".join(
+            f"[{number}]\n" + self._format_transaction(
+                transaction["merchant_name"],
+                transaction["amount"],
+                transaction.get("timestamp"),
+                transaction.get("description")
+            )
+            for number, transaction in enumerate(chunk, start=1)
+        )
+        messages = [{"role": "system", "content": self._build_system_prompt(batch=True)}]
+        messages.extend(self._get_batch_few_shot_examples())
+        messages.append({"role": "user", "content": user_message})
+
+        try:
+            result = await self.llm.parse(
+                messages=messages,
+                response_format=BatchClassificationWithCoT,
+                max_completion_tokens=settings.OPENAI_BATCH_MAX_TOKENS,
+                timeout=settings.GPT_BATCH_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Batch classification request for {len(chunk)} transactions failed: {str(e)}")
+            return {}
+        if result is None:
+            return {}
+
+        items: Dict[int, BatchItemClassificationWithCoT] = {}
+        duplicates = set()
+        for item in result.items:
+            position = item.index - 1
+            if position in items:
+                duplicates.add(position)
+            elif 0 <= position < len(chunk):
+                items[position] = item
+
+        answered = {}
+        for position, item in items.items():
+            if position in duplicates:
+                continue
+            if item.category not in self.categories or not 0.0 <= item.confidence <= 1.0:
+                continue
+            transaction = chunk[position]
+            answered[position] = self._apply_rule_based_postprocessing(
+                merchant_name=transaction["merchant_name"],
+                amount=transaction["amount"],
+                category=item.category,
+                subcategory=item.subcategory,
+                confidence=item.confidence
+            )
+        return answered
     
     async def process_batch(
         self,
@@ -308,120 +593,253 @@ class ClassifierService:
         """
         Process batch classification job using GPT-5-nano with structured outputs
 
-        This runs as a background task
+        This runs as a background task. The file is resolved through
+        csv-manager's metadata and streamed from MinIO in chunks of
+        CLASSIFY_WINDOW_SIZE rows; classified rows are appended to a
+        multipart upload of the result object, so memory stays flat. Each
+        uploaded part is recorded in the job's checkpoint together with the
+        rows it covers, and a resumed job skips those rows and continues
+        the same upload.
         """
         import pandas as pd
-        import asyncio
-        from pathlib import Path
 
+        job = None
         try:
-            # Initialize job
-            self.jobs[job_id] = ClassificationJob(
-                job_id=job_id,
-                status=JobStatus.PROCESSING,
-                progress=0.0,
-                total_records=0,
-                processed_records=0,
-                failed_records=0,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-
-            # 1. Fetch CSV file from csv-manager service
+            # Initialize job (created as pending when the request was accepted)
+            job = await self.job_store.get(job_id) or self._new_job(job_id, csv_key)
+            job.status = JobStatus.PROCESSING
+            job.error_message = None
+            job.updated_at = datetime.utcnow()
+            await self.job_store.save(job)
+
+            # 1. Resolve the file through csv-manager's metadata
             logger.info(f"Fetching CSV file for job {job_id}: {csv_key}")
+            metadata = await get_file_metadata(csv_key)
+            if metadata is None or not metadata.get("s3_key"):
+                raise FileNotFoundError(f"CSV file not found: {csv_key}")
+            total_bytes = metadata.get("size_bytes") or 0
+
+            # 2. Open the result upload, continuing from the checkpoint if any
+            s3_client = self._get_s3_client()
+            checkpoint = job.checkpoint or {}
+            job.result_file = job.result_file or f"{settings.CLASSIFY_RESULT_PREFIX}{job_id}.csv"
+            writer = MultipartResultWriter(
+                s3_client,
+                settings.MINIO_BUCKET,
+                job.result_file,
+                settings.CLASSIFY_RESULT_PART_SIZE,
+                upload_id=checkpoint.get("upload_id"),
+                parts=checkpoint.get("parts")
+            )
+            await asyncio.to_thread(writer.start)
+
+            skip = checkpoint.get("rows", 0)
+            job.processed_records = skip
+            job.failed_records = checkpoint.get("failed", 0)
+            job.checkpoint = {**writer.checkpoint, "rows": skip, "failed": job.failed_records}
+            await self.job_store.save(job)
+            if skip:
+                logger.info(f"Resuming job {job_id} after {skip} rows ({len(writer.parts)} parts uploaded)")
+
+            # 3. Stream, classify and append rows chunk by chunk (rules,
+            # local model, cache, then batched LLM requests)
+            reader = CsvObjectReader(
+                s3_client, settings.MINIO_BUCKET, object_keys(metadata), settings.CLASSIFY_WINDOW_SIZE
+            )
+            chunks = iter(reader)
+            columns = None
+            header_written = bool(writer.parts)
+            rows_read = 0
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if columns is None:
+                    columns = list(chunk.columns) + [
+                        column for column in ('category', 'subcategory', 'confidence') if column not in chunk.columns
+                    ]
+                chunk_start = rows_read
+                rows_read += len(chunk)
+                if rows_read <= skip:
+                    continue
+                chunk = chunk.iloc[max(skip - chunk_start, 0):]
+
+                entries = []
+                for idx, row in chunk.iterrows():
+                    try:
+                        merchant_name = row.get('merchant_name', row.get('가맹점', 'Unknown'))
+                        amount = float(row.get('amount', row.get('금액', 0)))
+                        timestamp_str = row.get('transaction_date_time', row.get('거래일시'))
+
+                        # Parse timestamp if available
+                        timestamp = None
+                        if timestamp_str and pd.notna(timestamp_str):
+                            try:
+                                timestamp = pd.to_datetime(timestamp_str)
+                            except:
+                                pass
+
+                        entries.append({
+                            "merchant_name": str(merchant_name),
+                            "amount": amount,
+                            "timestamp": timestamp
+                        })
+
+                    except Exception as e:
+                        logger.error(f"Failed to classify row {idx}: {str(e)}")
+                        job.failed_records += 1
+                        entries.append(None)
+
+                classifications = iter(await self.classify_many(
+                    [transaction for transaction in entries if transaction is not None]
+                ))
+                results = [
+                    next(classifications) if transaction is not None
+                    # Add error info to row
+                    else {'category': 'Other', 'subcategory': 'Error', 'confidence': 0.0}
+                    for transaction in entries
+                ]
+
+                # Add classification to rows and append them to the result
+                chunk = chunk.assign(
+                    category=[result['category'] for result in results],
+                    subcategory=[result.get('subcategory', '') for result in results],
+                    confidence=[result['confidence'] for result in results]
+                ).reindex(columns=columns)
+                data = chunk.to_csv(index=False, header=not header_written)
+                data = data.encode(RESULT_ENCODING if not header_written else "utf-8")
+                header_written = True
+                if await asyncio.to_thread(writer.write, data):
+                    job.checkpoint = {**writer.checkpoint, "rows": rows_read, "failed": job.failed_records}
+
+                # Update progress (by bytes read; the row count is known at the end)
+                job.processed_records = rows_read
+                job.total_records = rows_read
+                if total_bytes:
+                    job.progress = min(reader.bytes_read / total_bytes * 100, 99.0)
+                job.updated_at = datetime.utcnow()
+                await self.job_store.save(job)
+
+            # 4. Complete the result object
+            if not header_written and columns is not None:
+                await asyncio.to_thread(
+                    writer.write, pd.DataFrame(columns=columns).to_csv(index=False).encode(RESULT_ENCODING)
+                )
+            await asyncio.to_thread(writer.complete)
 
-            # For now, assume csv_key is a file_id that we can fetch from csv-manager
-            # In production, call the csv-manager service API to get the file
-            # Placeholder: Download from MinIO or local storage
-            csv_file_path = f"./temp/{csv_key}.csv"
-
-            if not Path(csv_file_path).exists():
-                raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
-
-            # 2. Read and parse CSV
-            df = pd.read_csv(csv_file_path)
-            total_records = len(df)
-
-            self.jobs[job_id].total_records = total_records
-            self.jobs[job_id].updated_at = datetime.utcnow()
+            # Mark as completed
+            job.status = JobStatus.COMPLETED
+            job.progress = 100.0
+            job.total_records = rows_read
+            job.processed_records = rows_read
+            job.checkpoint = None
+            job.completed_at = datetime.utcnow()
+            job.updated_at = job.completed_at
+            await self.job_store.save(job)
+
+            logger.info(f"Batch processing completed for job {job_id}: {job.processed_records} records ({job.failed_records} failed)")
+            logger.info(f"Classification cache after job {job_id}: {classification_cache.stats()}")
+            logger.info(f"LLM client after job {job_id}: {self.llm.stats()}")
 
-            # 3. Classify each row
-            results = []
-            for idx, row in df.iterrows():
+        except Exception as e:
+            logger.error(f"Batch processing failed for job {job_id}: {str(e)}")
+            if job is not None:
+                # The checkpoint is kept so the job can be resumed
+                job.status = JobStatus.FAILED
+                job.error_message = str(e)
+                job.updated_at = datetime.utcnow()
                 try:
-                    merchant_name = row.get('merchant_name', row.get('가맹점', 'Unknown'))
-                    amount = float(row.get('amount', row.get('금액', 0)))
-                    timestamp_str = row.get('transaction_date_time', row.get('거래일시'))
-
-                    # Parse timestamp if available
-                    timestamp = None
-                    if timestamp_str and pd.notna(timestamp_str):
-                        try:
-                            timestamp = pd.to_datetime(timestamp_str)
-                        except:
-                            pass
-
-                    # Classify transaction
-                    classification = await self.classify_single(
-                        merchant_name=str(merchant_name),
-                        amount=amount,
-                        timestamp=timestamp
-                    )
-
-                    # Add classification to row
-                    row['category'] = classification['category']
-                    row['subcategory'] = classification.get('subcategory', '')
-                    row['confidence'] = classification['confidence']
-
-                    results.append(row)
-
-                    # Update progress
-                    self.jobs[job_id].processed_records = idx + 1
-                    self.jobs[job_id].progress = ((idx + 1) / total_records) * 100
-                    self.jobs[job_id].updated_at = datetime.utcnow()
-
-                except Exception as e:
-                    logger.error(f"Failed to classify row {idx}: {str(e)}")
-                    self.jobs[job_id].failed_records += 1
+                    await self.job_store.save(job)
+                except Exception as save_error:
+                    logger.error(f"Failed to record failure of job {job_id}: {str(save_error)}")
+
+    def _get_s3_client(self):
+        if self._s3_client is None:
+            self._s3_client = create_s3_client()
+        return self._s3_client
+
+    def _new_job(self, job_id: str, file_id: Optional[str] = None) -> ClassificationJob:
+        now = datetime.utcnow()
+        return ClassificationJob(
+            job_id=job_id,
+            file_id=file_id,
+            status=JobStatus.PENDING,
+            progress=0.0,
+            total_records=0,
+            processed_records=0,
+            failed_records=0,
+            created_at=now,
+            updated_at=now
+        )
 
-                    # Add error info to row
-                    row['category'] = 'Other'
-                    row['subcategory'] = 'Error'
-                    row['confidence'] = 0.0
-                    results.append(row)
+    async def create_job(self, job_id: str, file_id: Optional[str] = None) -> ClassificationJob:
+        """Register a pending job before its background processing starts"""
+        job = self._new_job(job_id, file_id)
+        await self.job_store.save(job)
+        return job
 
-            # 4. Save results to CSV
-            result_df = pd.DataFrame(results)
-            result_file_path = f"{self.results_path}/{job_id}_results.csv"
-            result_df.to_csv(result_file_path, index=False, encoding='utf-8-sig')
+    async def claim_resume(self, job_id: str) -> ClassificationJob:
+        """
+        Claim a job for resuming from its checkpoint
 
-            # Mark as completed
-            self.jobs[job_id].status = JobStatus.COMPLETED
-            self.jobs[job_id].progress = 100.0
-            self.jobs[job_id].completed_at = datetime.utcnow()
-            self.jobs[job_id].result_file = result_file_path
+        Failed jobs can be resumed, and so can processing jobs whose
+        progress has not been saved for CLASSIFY_JOB_STALE_AFTER seconds
+        (the replica running them stopped). The job is moved to processing
+        atomically, so concurrent resume requests cannot both start it.
 
-            logger.info(f"Batch processing completed for job {job_id}: {self.jobs[job_id].processed_records}/{total_records} records")
+        Raises:
+            LookupError: If the job does not exist
+            ValueError: If the job is not resumable or was claimed by another request
+        """
+        def resumable(job: ClassificationJob) -> bool:
+            stale = (datetime.utcnow() - job.updated_at).total_seconds() >= settings.CLASSIFY_JOB_STALE_AFTER
+            return bool(job.file_id) and (
+                job.status == JobStatus.FAILED or (job.status == JobStatus.PROCESSING and stale)
+            )
 
-        except Exception as e:
-            logger.error(f"Batch processing failed for job {job_id}: {str(e)}")
-            if job_id in self.jobs:
-                self.jobs[job_id].status = JobStatus.FAILED
-                self.jobs[job_id].error_message = str(e)
-                self.jobs[job_id].updated_at = datetime.utcnow()
+        job, claimed = await self.job_store.claim(job_id, resumable)
+        if job is None:
+            raise LookupError(f"Job not found: {job_id}")
+        if not job.file_id:
+            raise ValueError(f"Job {job_id} has no source file")
+        if not claimed:
+            raise ValueError(f"Job {job_id} cannot be resumed. Current status: {job.status.value}")
+        return job
     
     async def get_job_status(self, job_id: str) -> Optional[ClassificationJob]:
         """Get status of classification job"""
-        return self.jobs.get(job_id)
+        return await self.job_store.get(job_id)
     
-    async def get_result_file(self, job_id: str, format: str = "csv") -> Optional[str]:
-        """Get path to result file"""
-        job = self.jobs.get(job_id)
+    async def get_result_file(self, job_id: str, format: str = "csv") -> Optional[Iterator[bytes]]:
+        """
+        Stream the result of a completed job as csv, parquet or ndjson
+
+        The Parquet version is converted once and stored next to the CSV
+        result; NDJSON is converted while streaming.
+
+        Returns:
+            Iterator over the file's bytes, or None if the job has not
+            completed or its result object is missing
+        """
+        job = await self.job_store.get(job_id)
         if not job or job.status != JobStatus.COMPLETED:
             return None
-        
-        # TODO: Convert to requested format if needed
-        return job.result_file
+
+        s3_client = self._get_s3_client()
+        bucket = settings.MINIO_BUCKET
+        if not await asyncio.to_thread(object_exists, s3_client, bucket, job.result_file):
+            return None
+
+        if format == "ndjson":
+            return iter_ndjson(s3_client, bucket, job.result_file, settings.CLASSIFY_WINDOW_SIZE)
+        if format == "parquet":
+            parquet_key = job.result_file.rsplit(".", 1)[0] + ".parquet"
+            if not await asyncio.to_thread(object_exists, s3_client, bucket, parquet_key):
+                await asyncio.to_thread(
+                    write_parquet, s3_client, bucket, job.result_file, parquet_key, settings.CLASSIFY_WINDOW_SIZE
+                )
+            return iter_object(s3_client, bucket, parquet_key)
+        return iter_object(s3_client, bucket, job.result_file)
     
     async def get_categories(self) -> Dict[str, List[str]]:
         """Get available categories and subcategories"""
@@ -429,25 +847,50 @@ class ClassifierService:
     
     async def train_model(
         self,
-        training_data_key: str,
+        training_data_key: Optional[str] = None,
         model_name: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Train or retrain classification model
-        
-        Placeholder for model training
+        Train and activate a new version of the local merchant model
+
+        Uses the rule keywords, the labels recorded from confident LLM
+        classifications and, if given, a batch job result object in MinIO.
+        Reading and training run in worker threads.
+
+        Args:
+            training_data_key: Optional result object key under
+                CLASSIFY_RESULT_PREFIX (e.g. classified/<job_id>.csv)
+            model_name: Version name (defaults to a timestamp)
+
+        Returns:
+            Metadata of the new version, including holdout evaluation
+
+        Raises:
+            ValueError: The key is outside the result prefix, the version
+                name is invalid or there are too few samples
+            FileNotFoundError: The result object does not exist
         """
-        # TODO: Implement actual training logic
-        # 1. Load training data
-        # 2. Preprocess data
-        # 3. Train model
-        # 4. Evaluate model
-        # 5. Save model
-        
-        model_id = f"model_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-        
-        return {
-            "model_id": model_id,
-            "status": "training",
-            "message": "Model training started"
-        }
\ No newline at end of file
+        object_keys = []
+        s3_client = None
+        if training_data_key:
+            prefix = settings.CLASSIFY_RESULT_PREFIX
+            if not training_data_key.startswith(prefix) or posixpath.normpath(training_data_key) != training_data_key:
+                raise ValueError(f"training_data_key must be a result object key under '{prefix}'")
+            s3_client = self._get_s3_client()
+            if not await asyncio.to_thread(object_exists, s3_client, settings.MINIO_BUCKET, training_data_key):
+                raise FileNotFoundError(f"Training data not found: {training_data_key}")
+            object_keys.append(training_data_key)
+        samples, sources = await collect_samples(object_keys=object_keys, s3_client=s3_client)
+        return await asyncio.to_thread(local_model.train, samples, sources, model_name)
+
+
+# Singleton instance
+_classifier_service: Optional[ClassifierService] = None
+
+
+def get_classifier_service() -> ClassifierService:
+    """Get or create the application-wide classifier service"""
+    global _classifier_service
+    if _classifier_service is None:
+        _classifier_service = ClassifierService()
+    return _classifier_service
@@ -0,0 +1,36 @@
+"""
+Read access to csv-manager's file metadata in the shared Redis
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from app.core.redis import get_redis
+
+# csv-manager stores each file as one hash holding metadata and status
+CSV_FILE_KEY = "csv:file:{file_id}"
+
+# Hash fields stored as integers by csv-manager
+CSV_INT_FIELDS = ("size_bytes",)
+
+# Hash fields stored as JSON by csv-manager (manifest of appended segments)
+CSV_JSON_FIELDS = ("segments",)
+
+
+async def get_file_metadata(file_id: str) -> Optional[Dict[str, Any]]:
+    """Metadata of an uploaded CSV file (with its status), or None if unknown"""
+    raw = await get_redis().hgetall(CSV_FILE_KEY.format(file_id=file_id))
+    if not raw:
+        return None
+    metadata = dict(raw)
+    for field in CSV_INT_FIELDS:
+        if field in metadata:
+            metadata[field] = int(metadata[field])
+    for field in CSV_JSON_FIELDS:
+        if field in metadata:
+            metadata[field] = json.loads(metadata[field])
+    return metadata
+
+
+def object_keys(metadata: Dict[str, Any]) -> List[str]:
+    """Base object followed by appended segments, in manifest order"""
+    return [metadata["s3_key"]] + [segment["key"] for segment in metadata.get("segments", [])]
@@ -0,0 +1,101 @@
+"""
+Classification job state shared by all classifier replicas
+
+Jobs are stored as JSON under classify:job:{job_id} with a TTL, so status
+and download requests can be served by any replica. Without REDIS_HOST
+jobs are kept in process memory (single-replica development setup).
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from redis.asyncio.client import Pipeline
+
+from app.core.config import settings
+from app.core.redis import get_json, get_redis, set_json
+from app.models.schemas import ClassificationJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = "classify:job:"
+
+
+class JobStore:
+    """Classification jobs in Redis, or in process memory without REDIS_HOST"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._local: Dict[str, ClassificationJob] = {}
+
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    async def save(self, job: ClassificationJob) -> None:
+        """Store the current state of a job, refreshing its expiry"""
+        if not settings.REDIS_HOST:
+            self._local[job.job_id] = job.model_copy()
+            return
+        await set_json(self.job_key(job.job_id), job.model_dump(mode="json"), ttl=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[ClassificationJob]:
+        """Load a job, or None if it does not exist or has expired"""
+        if not settings.REDIS_HOST:
+            job = self._local.get(job_id)
+            return job.model_copy() if job is not None else None
+        data = await get_json(self.job_key(job_id))
+        return ClassificationJob.model_validate(data) if data else None
+
+    async def claim(
+        self,
+        job_id: str,
+        claimable: Callable[[ClassificationJob], bool]
+    ) -> Tuple[Optional[ClassificationJob], bool]:
+        """
+        Move a job to processing if claimable(job) holds, atomically.
+
+        The job is read and rewritten in a WATCH transaction, so of
+        concurrent claims (e.g. two replicas resuming the same job) only
+        one succeeds; the others see the job already processing.
+
+        Returns:
+            Tuple of (job, claimed): the job as claimed, or as found if it
+            was not claimable (None if it does not exist)
+        """
+        if not settings.REDIS_HOST:
+            # No await between the check and the update, so this is atomic
+            # within the process
+            job = self._local.get(job_id)
+            if job is None or not claimable(job):
+                return (job.model_copy() if job is not None else None), False
+            self._mark_processing(job)
+            return job.model_copy(), True
+
+        key = self.job_key(job_id)
+        found: Optional[ClassificationJob] = None
+        claimed = False
+
+        async def _claim(pipe: Pipeline):
+            nonlocal found, claimed
+            raw = await pipe.get(key)
+            found = ClassificationJob.model_validate(json.loads(raw)) if raw else None
+            if found is None or not claimable(found):
+                claimed = False
+                return
+            self._mark_processing(found)
+            pipe.multi()
+            pipe.set(key, json.dumps(found.model_dump(mode="json")), ex=self.ttl)
+            claimed = True
+
+        await get_redis().transaction(_claim, key)
+        return found, claimed
+
+    @staticmethod
+    def _mark_processing(job: ClassificationJob) -> None:
+        job.status = JobStatus.PROCESSING
+        job.error_message = None
+        job.updated_at = datetime.utcnow()
+
+
+job_store = JobStore(ttl=settings.CLASSIFY_JOB_TTL)
@@ -0,0 +1,185 @@
+"""
+Rate-limited async LLM client shared by every classification in the process
+
+Requests go through a bounded semaphore (MAX_WORKERS concurrent calls) and
+two token buckets, one for requests and one for tokens per minute. Each
+call has a timeout; rate limits, timeouts, connection errors and 5xx
+responses are retried with exponential backoff and jitter (or the server's
+Retry-After), other errors are raised to the caller.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Type
+
+import openai
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    Acquiring waits until enough tokens are available. Usage reported after
+    a call may push the balance below zero, which delays later callers.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until `amount` tokens (capped at capacity) can be taken"""
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters in order, so large requests are not starved
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Charge (or refund, if negative) tokens without waiting"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size: about two characters per token for Korean text"""
+    return sum(len(message["content"]) for message in messages) // 2 + 4 * len(messages)
+
+
+class LLMClient:
+    """AsyncOpenAI wrapper with concurrency and rate limits, timeouts and retries"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        retry_count: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.client = AsyncOpenAI(
+            api_key=settings.GMS_API_KEY,
+            base_url=settings.GMS_BASE_URL,
+            max_retries=0  # Retried here, after the rate limiters
+        )
+        self.retry_count = retry_count
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.BoundedSemaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def parse(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Type[BaseModel],
+        max_completion_tokens: int,
+        timeout: float
+    ) -> Optional[BaseModel]:
+        """
+        Structured-output chat completion.
+
+        Returns:
+            The parsed response, or None if the model refused
+
+        Raises:
+            openai.OpenAIError: Non-retryable errors, or the last error once
+                retries are exhausted
+        """
+        estimate = estimate_tokens(messages)
+        for attempt in range(self.retry_count + 1):
+            await self._requests.acquire(1)
+            await self._tokens.acquire(estimate)
+            try:
+                async with self._semaphore:
+                    self.calls += 1
+                    completion = await self.client.beta.chat.completions.parse(
+                        model=settings.OPENAI_MODEL,
+                        messages=messages,
+                        response_format=response_format,
+                        max_completion_tokens=max_completion_tokens,
+                        timeout=timeout
+                    )
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.retry_count:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                delay = self._retry_delay(attempt, e)
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/{self.retry_count} "
+                    f"in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                self.failures += 1
+                raise
+
+            if completion.usage is not None:
+                self._tokens.consume(completion.usage.total_tokens - estimate)
+            return completion.choices[0].message.parsed
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Retry-After from the response if given, else exponential backoff with full jitter"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def close(self) -> None:
+        """Close pooled HTTP connections (called from the application lifespan)"""
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Call, retry and failure counters since process start"""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures
+        }
+
+
+llm_client = LLMClient(
+    max_concurrency=settings.MAX_WORKERS,
+    requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+    retry_count=settings.GPT_RETRY_COUNT,
+    backoff_base=settings.GPT_RETRY_BACKOFF,
+    backoff_max=settings.GPT_RETRY_MAX_BACKOFF
+)
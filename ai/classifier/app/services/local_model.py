@@ -0,0 +1,281 @@
+"""
+In-process merchant classifier: character n-gram multinomial Naive Bayes
+
+Trained on normalized merchant names labelled by the deterministic rules
+and by confident LLM answers, it answers known merchants in microseconds
+so the LLM is only asked when the model is unsure. Each training run is
+saved as a new version (JSON) in LOCAL_MODEL_DIR; the CURRENT file names
+the active version and replicas sharing the directory pick up changes
+within LOCAL_MODEL_RELOAD_INTERVAL seconds.
+"""
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.merchant_normalizer import normalize_merchant
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZES = (1, 2, 3)
+CURRENT_FILE = "CURRENT"
+# Version names become file names inside LOCAL_MODEL_DIR
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+# Share of samples held out to evaluate a training run
+HOLDOUT_PERCENT = 10
+
+
+def char_ngrams(text: str) -> List[str]:
+    """Character n-grams of a normalized name, padded to mark word edges"""
+    padded = f" {text} "
+    return [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+
+class NgramNaiveBayes:
+    """
+    Multinomial Naive Bayes over character n-grams.
+
+    Scores are stored as a per-label base (log prior) plus, for each
+    n-gram, the labels whose log likelihood differs from their smoothing
+    default, so a prediction only touches the labels that saw each n-gram.
+    """
+
+    def __init__(
+        self,
+        labels: List[Tuple[str, str]],
+        priors: List[float],
+        defaults: List[float],
+        deltas: Dict[str, List[Tuple[int, float]]]
+    ):
+        self.labels = labels
+        self.priors = priors
+        self.defaults = defaults
+        self.deltas = deltas
+
+    @classmethod
+    def fit(cls, samples: List[Tuple[str, Tuple[str, str]]], alpha: float = 0.1) -> "NgramNaiveBayes":
+        """Train on (normalized name, (category, subcategory)) samples"""
+        labels = sorted({label for _, label in samples})
+        label_index = {label: index for index, label in enumerate(labels)}
+        documents = Counter()
+        counts: List[Counter] = [Counter() for _ in labels]
+        for text, label in samples:
+            index = label_index[label]
+            documents[index] += 1
+            counts[index].update(char_ngrams(text))
+
+        vocabulary = set().union(*counts)
+        priors = [math.log(documents[index] / len(samples)) for index in range(len(labels))]
+        denominators = [sum(count.values()) + alpha * len(vocabulary) for count in counts]
+        defaults = [math.log(alpha / denominator) for denominator in denominators]
+
+        deltas: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for index, count in enumerate(counts):
+            for gram, occurrences in count.items():
+                weight = math.log((occurrences + alpha) / denominators[index])
+                deltas[gram].append((index, weight - defaults[index]))
+        return cls(labels, priors, defaults, dict(deltas))
+
+    def predict(self, text: str) -> Tuple[Optional[Tuple[str, str]], float]:
+        """
+        Most likely label and a confidence in [0, 1].
+
+        The confidence is the posterior probability scaled by the share of
+        the name's n-grams seen in training, so names made of unseen
+        characters get a low confidence instead of an overconfident guess.
+        """
+        grams = char_ngrams(text)
+        known = [gram for gram in grams if gram in self.deltas]
+        if not known:
+            return None, 0.0
+
+        scores = [prior + default * len(known) for prior, default in zip(self.priors, self.defaults)]
+        for gram in known:
+            for index, delta in self.deltas[gram]:
+                scores[index] += delta
+
+        best = max(range(len(scores)), key=scores.__getitem__)
+        top = scores[best]
+        posterior = 1.0 / sum(math.exp(score - top) for score in scores)
+        return self.labels[best], posterior * len(known) / len(grams)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "labels": [list(label) for label in self.labels],
+            "priors": self.priors,
+            "defaults": self.defaults,
+            "deltas": self.deltas
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NgramNaiveBayes":
+        return cls(
+            labels=[tuple(label) for label in data["labels"]],
+            priors=data["priors"],
+            defaults=data["defaults"],
+            deltas={gram: [tuple(entry) for entry in entries] for gram, entries in data["deltas"].items()}
+        )
+
+
+class LocalModelRegistry:
+    """Versioned models on disk and the active one in memory"""
+
+    def __init__(self, model_dir: str):
+        self.model_dir = Path(model_dir)
+        self.model: Optional[NgramNaiveBayes] = None
+        self.metadata: Optional[Dict[str, Any]] = None
+
+    def _model_path(self, version: str) -> Path:
+        """
+        File of a version inside the model directory.
+
+        Raises:
+            ValueError: The name is not a plain file name (letters, digits,
+                ".", "_" and "-", no "..")
+        """
+        if not VERSION_PATTERN.match(version) or ".." in version:
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return self.model_dir / f"{version}.json"
+
+    def _current_version(self) -> Optional[str]:
+        try:
+            return (self.model_dir / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> None:
+        """
+        Load the active version named by the CURRENT file, if any.
+
+        Reads and parses files, so callers on the event loop run it in a
+        thread; predict keeps using the previous model until it is replaced.
+        """
+        version = self._current_version()
+        if version is None or (self.metadata and self.metadata["version"] == version):
+            return
+        with open(self._model_path(version), encoding="utf-8") as f:
+            data = json.load(f)
+        self.model = NgramNaiveBayes.from_dict(data["model"])
+        self.metadata = data["metadata"]
+        logger.info(f"Loaded local merchant model {version} ({self.metadata['samples']} samples)")
+
+    def predict(self, merchant_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a merchant with the active model.
+
+        Returns:
+            Dict with category, subcategory and confidence, or None if no
+            model is active or the name normalizes to nothing
+        """
+        model = self.model
+        text = normalize_merchant(merchant_name)
+        if model is None or not text:
+            return None
+        label, confidence = model.predict(text)
+        if label is None:
+            return None
+        return {"category": label[0], "subcategory": label[1], "confidence": round(confidence, 4)}
+
+    def train(
+        self,
+        samples: List[Tuple[str, Tuple[str, str]]],
+        sources: Dict[str, int],
+        version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Train, evaluate and activate a new model version.
+
+        The holdout share of samples (chosen by a hash of the name, so runs
+        are comparable) evaluates a model trained on the rest; the saved
+        model is then trained on all samples.
+
+        Raises:
+            ValueError: Too few samples or labels, or the version exists
+        """
+        if len(samples) < settings.LOCAL_MODEL_MIN_SAMPLES:
+            raise ValueError(
+                f"Not enough training samples: {len(samples)} < {settings.LOCAL_MODEL_MIN_SAMPLES}"
+            )
+        if len({label for _, label in samples}) < 2:
+            raise ValueError("Training samples need at least two distinct labels")
+
+        version = version or f"nb-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        path = self._model_path(version)
+        if path.exists():
+            raise ValueError(f"Model version already exists: {version}")
+
+        holdout = [s for s in samples if zlib.crc32(s[0].encode("utf-8")) % 100 < HOLDOUT_PERCENT]
+        training = [s for s in samples if zlib.crc32(s[0].encode("utf-8")) % 100 >= HOLDOUT_PERCENT]
+        evaluation = self._evaluate(NgramNaiveBayes.fit(training), holdout) if holdout and training else None
+
+        model = NgramNaiveBayes.fit(samples)
+        metadata = {
+            "version": version,
+            "created_at": datetime.utcnow().isoformat(),
+            "samples": len(samples),
+            "labels": len(model.labels),
+            "features": len(model.deltas),
+            "sources": sources,
+            "evaluation": evaluation
+        }
+
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"metadata": metadata, "model": model.to_dict()}, f, ensure_ascii=False)
+        self.activate(version)
+        return metadata
+
+    @staticmethod
+    def _evaluate(model: NgramNaiveBayes, holdout: List[Tuple[str, Tuple[str, str]]]) -> Dict[str, Any]:
+        """Accuracy overall and on the predictions confident enough to be served"""
+        correct = confident = confident_correct = 0
+        for text, label in holdout:
+            predicted, confidence = model.predict(text)
+            hit = predicted == label
+            correct += hit
+            if confidence >= settings.CONFIDENCE_THRESHOLD:
+                confident += 1
+                confident_correct += hit
+        return {
+            "holdout": len(holdout),
+            "accuracy": round(correct / len(holdout), 4),
+            "served_share": round(confident / len(holdout), 4),
+            "served_accuracy": round(confident_correct / confident, 4) if confident else None
+        }
+
+    def activate(self, version: str) -> None:
+        """Make a stored version the active one (also used to roll back)"""
+        if not self._model_path(version).exists():
+            raise ValueError(f"Model version not found: {version}")
+        current = self.model_dir / CURRENT_FILE
+        temporary = current.with_suffix(".tmp")
+        temporary.write_text(version, encoding="utf-8")
+        os.replace(temporary, current)
+        self.load()
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Metadata of all stored versions, newest first"""
+        versions = []
+        for path in self.model_dir.glob("*.json"):
+            with open(path, encoding="utf-8") as f:
+                versions.append(json.load(f)["metadata"])
+        return sorted(versions, key=lambda metadata: metadata["created_at"], reverse=True)
+
+    def info(self) -> Dict[str, Any]:
+        """Active version metadata"""
+        return {
+            "enabled": settings.LOCAL_MODEL_ENABLED,
+            "threshold": settings.CONFIDENCE_THRESHOLD,
+            "active": self.metadata
+        }
+
+
+local_model = LocalModelRegistry(model_dir=settings.LOCAL_MODEL_DIR)
@@ -0,0 +1,79 @@
+"""
+Merchant name normalization for classification caching
+
+Card statements repeat the same merchants with different branch and
+location suffixes ("스타벅스 종로3가점", "스타벅스 분당정자점"), corporate
+markers and spacing. Normalizing them to one key lets every branch of a
+merchant share a single classification.
+"""
+import re
+import unicodedata
+from typing import Tuple
+
+# Amount bucket upper bounds in KRW. 500,000 must stay a boundary: amounts
+# at or above it are classified differently (high-amount rule).
+AMOUNT_BUCKETS = (10000, 50000, 100000, 500000)
+
+# Corporate markers removed anywhere in the name
+CORPORATE_MARKERS = re.compile(r"\(주\)|㈜|\(유\)|주식회사|유한회사|\bco\.?,?\s*ltd\.?|\binc\.?$")
+
+# Bracketed qualifiers such as "(강남)" or "[본점]"
+BRACKETED = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+# Separators folded into spaces
+SEPARATORS = re.compile(r"[\s\-_/·.,]+")
+
+# Trailing tokens naming a branch or location: "종로3가점", "2호점",
+# "강남역", "본점", "b1", "2층". Bare numbers are kept ("이마트 24").
+BRANCH_TOKEN = re.compile(
+    r"^(?:[0-9a-z가-힣]*(?:점|매장|출장소)|[가-힣0-9]{2,}역|\d+호|b\d+|\d+층)$"
+)
+
+# Glued suffixes that are always a branch marker ("스타벅스2호점")
+GLUED_BRANCH = re.compile(r"(?<=.{2})(?:\d+호점|직영점|본점|지점)$")
+
+# Words ending in "점" that name the kind of store, not a branch
+STORE_TYPE_WORDS = frozenset({
+    "백화점", "편의점", "할인점", "면세점", "대리점", "음식점", "전문점", "판매점",
+    "아울렛점", "서점", "주점", "정육점", "제과점", "매점"
+})
+
+
+def normalize_merchant(merchant_name: str) -> str:
+    """
+    Normalize a merchant name to a cache key.
+
+    Applies Unicode NFKC and case folding, removes corporate markers and
+    bracketed qualifiers, folds separators and whitespace, and strips
+    trailing branch/location tokens while keeping at least one token.
+
+    Examples:
+        "스타벅스 종로3가점" -> "스타벅스"
+        "(주)GS25 분당정자점" -> "gs25"
+        "STARBUCKS  Gangnam" -> "starbucks gangnam"
+    """
+    name = unicodedata.normalize("NFKC", merchant_name).casefold()
+    name = CORPORATE_MARKERS.sub(" ", name)
+    name = BRACKETED.sub(" ", name)
+    tokens = SEPARATORS.sub(" ", name).split()
+    if not tokens:
+        return ""
+
+    while len(tokens) > 1 and BRANCH_TOKEN.match(tokens[-1]) and tokens[-1] not in STORE_TYPE_WORDS:
+        tokens.pop()
+
+    tokens[-1] = GLUED_BRANCH.sub("", tokens[-1])
+    return " ".join(tokens)
+
+
+def amount_bucket(amount: float) -> int:
+    """Index of the amount bucket (0 .. len(AMOUNT_BUCKETS))"""
+    for index, bound in enumerate(AMOUNT_BUCKETS):
+        if amount < bound:
+            return index
+    return len(AMOUNT_BUCKETS)
+
+
+def classification_key(merchant_name: str, amount: float) -> Tuple[str, int]:
+    """Cache key parts: normalized merchant and amount bucket"""
+    return normalize_merchant(merchant_name), amount_bucket(abs(amount))
@@ -0,0 +1,260 @@
+"""
+MinIO/S3 access for batch classification
+
+Uploaded CSV files are streamed from csv-manager's bucket chunk by chunk
+(base object, then appended segments), and results are written back as
+multipart uploads whose uploaded parts double as a resumable checkpoint.
+All calls are blocking and are run in worker threads by the caller.
+"""
+import io
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+import boto3
+import pandas as pd
+from botocore.client import Config
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Encoding of classification results (BOM so spreadsheet tools detect UTF-8)
+RESULT_ENCODING = "utf-8-sig"
+
+
+def create_s3_client():
+    """S3 client for the configured MinIO endpoint"""
+    if not settings.MINIO_ENDPOINT:
+        raise RuntimeError("MINIO_ENDPOINT is not configured")
+    endpoint = settings.MINIO_ENDPOINT
+    if not endpoint.startswith(('http://', 'https://')):
+        endpoint = f"{'https' if settings.MINIO_SECURE else 'http'}://{endpoint}"
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint,
+        aws_access_key_id=settings.MINIO_ACCESS_KEY,
+        aws_secret_access_key=settings.MINIO_SECRET_KEY,
+        config=Config(signature_version='s3v4'),
+        verify=settings.VERIFY_SSL
+    )
+
+
+class _CountingStream(io.RawIOBase):
+    """Readable view of an S3 body that counts the bytes consumed"""
+
+    def __init__(self, body, counter: "CsvObjectReader"):
+        self._body = body
+        self._counter = counter
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        self._counter.bytes_read += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._body.close()
+        super().close()
+
+
+class CsvObjectReader:
+    """
+    Streams CSV objects as DataFrame chunks of `chunk_rows` rows.
+
+    Objects are read in order as one logical file (each keeps its own
+    header, as csv-manager writes segments); only one chunk is held in
+    memory at a time.
+    """
+
+    def __init__(self, s3_client, bucket: str, keys: List[str], chunk_rows: int):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.keys = keys
+        self.chunk_rows = chunk_rows
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for key in self.keys:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"]
+            with io.BufferedReader(_CountingStream(body, self)) as stream:
+                for chunk in pd.read_csv(stream, chunksize=self.chunk_rows, encoding="utf-8-sig"):
+                    yield chunk
+
+
+class MultipartResultWriter:
+    """
+    Writes an object as a multipart upload, one part per `part_size` bytes.
+
+    Data is buffered until a part is full; `checkpoint` describes the
+    parts uploaded so far, and a writer created from it continues the same
+    upload after a restart.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        part_size: int,
+        upload_id: Optional[str] = None,
+        parts: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.upload_id = upload_id
+        self.parts = list(parts or [])
+        self._buffer = bytearray()
+
+    def start(self) -> None:
+        """Create the multipart upload unless resuming one"""
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType="text/csv"
+            )
+            self.upload_id = response["UploadId"]
+
+    @property
+    def checkpoint(self) -> Dict[str, Any]:
+        return {"upload_id": self.upload_id, "parts": list(self.parts)}
+
+    def write(self, data: bytes) -> bool:
+        """
+        Buffer data, uploading it as a part once the buffer is full.
+
+        Returns:
+            True if a part was uploaded (everything written so far is stored)
+        """
+        self._buffer.extend(data)
+        if len(self._buffer) < self.part_size:
+            return False
+        self._upload_part()
+        return True
+
+    def _upload_part(self) -> None:
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer)
+        )
+        self.parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+        self._buffer.clear()
+
+    def complete(self) -> None:
+        """Upload the remaining data as the last part and complete the object"""
+        if self._buffer or not self.parts:
+            self._upload_part()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts}
+        )
+
+    def abort(self) -> None:
+        """Discard the upload and its parts"""
+        if self.upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except ClientError as e:
+            logger.warning(f"Failed to abort multipart upload of {self.key}: {e}")
+
+
+def object_exists(s3_client, bucket: str, key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def iter_object(s3_client, bucket: str, key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Stream an object's bytes"""
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+    try:
+        for chunk in body.iter_chunks(chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+def iter_ndjson(s3_client, bucket: str, key: str, chunk_rows: int) -> Iterator[bytes]:
+    """Stream a CSV result object converted to newline-delimited JSON"""
+    for chunk in CsvObjectReader(s3_client, bucket, [key], chunk_rows):
+        if chunk.empty:
+            continue
+        lines = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        yield (lines if lines.endswith("\n") else lines + "\n").encode("utf-8")
+
+
+def _unify_types(first, second):
+    """Arrow type able to hold both chunk types of a column"""
+    import pyarrow as pa
+
+    if first == second or pa.types.is_null(second):
+        return first
+    if pa.types.is_null(first):
+        return second
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(check(first) for check in numeric) and any(check(second) for check in numeric):
+        return pa.float64()
+    return pa.string()
+
+
+def write_parquet(s3_client, bucket: str, source_key: str, target_key: str, chunk_rows: int) -> None:
+    """
+    Convert a CSV result object to Parquet chunk by chunk and store it.
+
+    Column types are inferred per chunk, so a first pass unifies them
+    (integers and floats become float64, anything else mixed becomes
+    string) and the second pass writes every chunk with that schema.
+    """
+    import tempfile
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def tables():
+        for chunk in CsvObjectReader(s3_client, bucket, [source_key], chunk_rows):
+            yield pa.Table.from_pandas(chunk, preserve_index=False)
+
+    schema = None
+    for table in tables():
+        if schema is None:
+            schema = table.schema
+        else:
+            schema = pa.schema([
+                pa.field(field.name, _unify_types(field.type, table.schema.field(field.name).type))
+                for field in schema
+            ])
+    if schema is None:
+        raise ValueError(f"Result object {source_key} has no header")
+    schema = pa.schema([
+        pa.field(field.name, pa.string() if pa.types.is_null(field.type) else field.type)
+        for field in schema
+    ])
+
+    with tempfile.TemporaryFile() as spool:
+        with pq.ParquetWriter(spool, schema) as writer:
+            for table in tables():
+                writer.write_table(table.cast(schema))
+        spool.seek(0)
+        s3_client.upload_fileobj(
+            spool,
+            bucket,
+            target_key,
+            ExtraArgs={"ContentType": "application/vnd.apache.parquet"}
+        )
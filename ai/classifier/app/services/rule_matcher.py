@@ -0,0 +1,174 @@
+"""
+Deterministic merchant rules compiled into a multi-keyword automaton
+
+The keyword tables of app/data/merchant_rules.json are compiled into one
+Aho-Corasick automaton, so a merchant name is scanned once regardless of
+the number of keywords. The longest matching keyword wins (so "하이마트"
+beats "이마트" and "이마트24" beats "이마트"); on equal length the rule listed
+first wins.
+"""
+import json
+import logging
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / "data" / "merchant_rules.json"
+
+
+def fold(text: str) -> str:
+    """Case and width folding applied to keywords and merchant names alike"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _is_word_char(char: str) -> bool:
+    """ASCII letters and digits; Hangul next to a keyword is not a boundary"""
+    return char.isascii() and char.isalnum()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over folded keywords.
+
+    Each keyword carries a payload index. Output lists are merged along
+    failure links at build time and sorted longest first, so a scan only
+    visits the outputs of the current state.
+    """
+
+    def __init__(self, keywords: List[Tuple[str, int, bool]]):
+        """
+        Args:
+            keywords: (keyword, payload, boundary) triples; keywords must
+                already be folded
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (length, payload, boundary), longest first
+        self._outputs: List[List[Tuple[int, int, bool]]] = [[]]
+
+        for keyword, payload, boundary in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((len(keyword), payload, boundary))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        # Stable sort keeps keyword order (rule priority) within a length
+        for outputs in self._outputs:
+            outputs.sort(key=lambda output: -output[0])
+
+    @property
+    def state_count(self) -> int:
+        return len(self._goto)
+
+    def longest_match(self, text: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Find the longest keyword occurrence in folded text.
+
+        Returns:
+            (payload, start, end) of the best match, or None
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        best: Optional[Tuple[int, int, int]] = None
+        best_key: Optional[Tuple[int, int]] = None
+
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, payload, boundary in outputs[state]:
+                if best_key is not None and (length, -payload) <= best_key:
+                    break
+                start = end - length
+                if boundary and (
+                    (start > 0 and _is_word_char(text[start - 1]))
+                    or (end < len(text) and _is_word_char(text[end]))
+                ):
+                    continue
+                best_key = (length, -payload)
+                best = (payload, start, end)
+                break
+        return best
+
+
+class MerchantRuleMatcher:
+    """Merchant rules loaded from data and compiled into one automaton"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        keywords = []
+        for index, rule in enumerate(rules):
+            for entry in rule["keywords"]:
+                if isinstance(entry, str):
+                    entry = {"keyword": entry}
+                keywords.append((fold(entry["keyword"]), index, bool(entry.get("boundary"))))
+        self.keyword_count = len(keywords)
+        self._automaton = KeywordAutomaton(keywords)
+
+    @classmethod
+    def from_file(cls, path: Optional[Path] = None) -> "MerchantRuleMatcher":
+        """Load and compile rules from a JSON file ({"rules": [...]})"""
+        path = Path(path or DEFAULT_RULES_PATH)
+        with open(path, encoding="utf-8") as f:
+            rules = json.load(f)["rules"]
+        matcher = cls(rules)
+        logger.info(
+            f"Loaded {len(rules)} merchant rules ({matcher.keyword_count} keywords, "
+            f"{matcher._automaton.state_count} states) from {path}"
+        )
+        return matcher
+
+    def match(self, merchant_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a merchant by rules alone.
+
+        Returns:
+            Dict with category, subcategory, confidence, rule name and the
+            matched keyword, or None if no rule applies
+        """
+        text = fold(merchant_name)
+        found = self._automaton.longest_match(text)
+        if found is None:
+            return None
+        index, start, end = found
+        rule = self.rules[index]
+        return {
+            "category": rule["category"],
+            "subcategory": rule["subcategory"],
+            "confidence": rule["confidence"],
+            "rule": rule["name"],
+            "keyword": text[start:end]
+        }
+
+
+merchant_rules = MerchantRuleMatcher.from_file(settings.MERCHANT_RULES_PATH)
@@ -0,0 +1,143 @@
+"""
+Labelled merchants for training the local model
+
+Confident LLM classifications are recorded in the classify:labels hash
+(normalized merchant -> label), so every replica contributes to one
+training set. Training combines those labels with the rule keywords and,
+optionally, labelled CSVs: batch job result objects in MinIO or, from the
+CLI, local files.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.merchant_normalizer import normalize_merchant
+from app.services.object_storage import CsvObjectReader
+from app.services.rule_matcher import merchant_rules
+
+logger = logging.getLogger(__name__)
+
+LABELS_KEY = "classify:labels"
+
+Sample = Tuple[str, Tuple[str, str]]
+
+
+async def record_labels(entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Record confident LLM classifications as training labels.
+
+    Args:
+        entries: (merchant_name, classification) pairs; classifications
+            below CONFIDENCE_THRESHOLD are skipped
+    """
+    if not settings.REDIS_HOST:
+        return
+    labels = {}
+    for merchant_name, result in entries:
+        text = normalize_merchant(merchant_name)
+        if text and result.get("confidence", 0) >= settings.CONFIDENCE_THRESHOLD:
+            labels[text] = json.dumps([result["category"], result.get("subcategory") or ""], ensure_ascii=False)
+    if not labels:
+        return
+    try:
+        await get_redis().hset(LABELS_KEY, mapping=labels)
+    except RedisError as e:
+        logger.warning(f"Failed to record {len(labels)} training labels: {e}")
+
+
+async def load_recorded_labels(batch_size: int = 1000) -> List[Sample]:
+    """All labels recorded from LLM classifications"""
+    if not settings.REDIS_HOST:
+        return []
+    samples = []
+    async for text, label in get_redis().hscan_iter(LABELS_KEY, count=batch_size):
+        category, subcategory = json.loads(label)
+        samples.append((text, (category, subcategory)))
+    return samples
+
+
+def rule_samples() -> List[Sample]:
+    """One sample per rule keyword"""
+    samples = []
+    for rule in merchant_rules.rules:
+        for entry in rule["keywords"]:
+            keyword = entry if isinstance(entry, str) else entry["keyword"]
+            text = normalize_merchant(keyword)
+            if text:
+                samples.append((text, (rule["category"], rule["subcategory"])))
+    return samples
+
+
+def frame_samples(df) -> List[Sample]:
+    """
+    Samples from labelled CSV rows (merchant_name/가맹점, category,
+    subcategory and optional confidence columns)
+    """
+    merchant_column = "merchant_name" if "merchant_name" in df.columns else "가맹점"
+    if "confidence" in df.columns:
+        df = df[df["confidence"] >= settings.CONFIDENCE_THRESHOLD]
+
+    samples = []
+    for merchant_name, category, subcategory in zip(
+        df[merchant_column], df["category"], df.get("subcategory", [""] * len(df))
+    ):
+        text = normalize_merchant(str(merchant_name))
+        if text and isinstance(category, str):
+            samples.append((text, (category, subcategory if isinstance(subcategory, str) else "")))
+    return samples
+
+
+def csv_samples(path: str) -> List[Sample]:
+    """Samples from a labelled local CSV file (CLI only)"""
+    import pandas as pd
+
+    return frame_samples(pd.read_csv(path))
+
+
+def object_samples(s3_client, bucket: str, key: str) -> List[Sample]:
+    """Samples from a labelled CSV object, e.g. a batch job result, read in chunks"""
+    samples = []
+    for chunk in CsvObjectReader(s3_client, bucket, [key], settings.CLASSIFY_WINDOW_SIZE):
+        samples.extend(frame_samples(chunk))
+    return samples
+
+
+async def collect_samples(
+    csv_paths: Iterable[str] = (),
+    object_keys: Iterable[str] = (),
+    s3_client: Optional[Any] = None
+) -> Tuple[List[Sample], Dict[str, int]]:
+    """
+    Deduplicated training samples and the count contributed by each source.
+
+    Later sources win for the same normalized name: CSV files and objects,
+    then recorded LLM labels, then rule keywords. CSVs are read in worker
+    threads.
+    """
+    by_text: Dict[str, Tuple[str, str]] = {}
+    sources: Dict[str, int] = {}
+
+    for path in csv_paths:
+        samples = await asyncio.to_thread(csv_samples, path)
+        sources[f"csv:{path}"] = len(samples)
+        by_text.update(samples)
+
+    for key in object_keys:
+        samples = await asyncio.to_thread(object_samples, s3_client, settings.MINIO_BUCKET, key)
+        sources[f"object:{key}"] = len(samples)
+        by_text.update(samples)
+
+    recorded = await load_recorded_labels()
+    sources["llm_labels"] = len(recorded)
+    by_text.update(recorded)
+
+    rules = rule_samples()
+    sources["rules"] = len(rules)
+    by_text.update(rules)
+
+    return list(by_text.items()), sources
@@ -0,0 +1,62 @@
+"""
+Batch classification throughput benchmark
+
+Runs ClassifierService.classify_many on synthetic transactions against the
+configured endpoint. Point GMS_BASE_URL at ai/benchmarks/mock_llm_server.py
+to measure the client's concurrency, rate limiting and retries without
+the live GMS endpoint; MAX_WORKERS, BATCH_SIZE and OPENAI_*_PER_MINUTE are
+read from the environment as usual.
+
+Usage (from ai/classifier):
+    GMS_BASE_URL=http://127.0.0.1:8099/v1 GMS_API_KEY=test \\
+        python -m benchmarks.batch_throughput --rows 1500 --merchants 600
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.services.classification_cache import classification_cache
+from app.services.classifier_service import ClassifierService
+
+
+def generate_transactions(rows: int, merchants: int, seed: int):
+    """Synthetic transactions over `merchants` distinct names no rule matches"""
+    rng = random.Random(seed)
+    names = [f"가맹점{i:05d}" for i in range(merchants)]
+    return [
+        {"merchant_name": rng.choice(names), "amount": rng.randint(1000, 90000)}
+        for _ in range(rows)
+    ]
+
+
+async def run(args):
+    service = ClassifierService()
+    transactions = generate_transactions(args.rows, args.merchants, args.seed)
+
+    start = time.perf_counter()
+    results = await service.classify_many(transactions)
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for result in results if result["confidence"] == 0.0)
+    llm_stats = service.llm.stats()
+    print(
+        f"endpoint {settings.GMS_BASE_URL}, MAX_WORKERS={settings.MAX_WORKERS}, "
+        f"BATCH_SIZE={settings.BATCH_SIZE}"
+    )
+    print(f"rows {len(results):,} in {elapsed:.2f}s ({len(results) / elapsed:,.1f} rows/s), fallbacks {failed}")
+    print(f"llm calls {llm_stats['calls']}, retries {llm_stats['retries']}, failures {llm_stats['failures']}")
+    print(f"cache {classification_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch classification throughput")
+    parser.add_argument("--rows", type=int, default=1500, help="Transactions to classify")
+    parser.add_argument("--merchants", type=int, default=600, help="Distinct merchant names")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
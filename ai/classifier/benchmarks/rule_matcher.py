@@ -0,0 +1,91 @@
+"""
+Merchant rule matching throughput benchmark
+
+Compares the compiled keyword automaton against the previous per-rule
+`any(kw in merchant_lower ...)` scan on synthetic merchant names.
+
+Usage (from ai/classifier):
+    python -m benchmarks.rule_matcher --count 100000
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Optional
+
+from app.services.rule_matcher import MerchantRuleMatcher, merchant_rules
+
+# Names no rule should match (or that the old substring scan matched wrongly)
+OTHER_MERCHANTS = [
+    "김밥천국", "교보문고", "메가박스", "CGV", "카카오택시", "서울대병원", "쿠팡", "배달의민족",
+    "다이소", "유니클로", "한솥도시락", "파리바게뜨", "GS칼텍스", "SK텔레콤", "Netflix",
+    "Curious Books", "Omega Watch", "롯데시네마", "무신사", "동네 세탁소"
+]
+
+BRANCHES = ["강남점", "역삼역점", "종로3가점", "2호점", "본점", "분당정자점", "", "(주)", "B1"]
+
+
+def legacy_match(rules: List[dict], merchant_name: str) -> Optional[str]:
+    """Previous behaviour: first rule with any keyword as a substring"""
+    merchant_lower = merchant_name.lower()
+    for rule in rules:
+        keywords = [k if isinstance(k, str) else k["keyword"] for k in rule["keywords"]]
+        if any(kw in merchant_lower for kw in keywords):
+            return rule["name"]
+    return None
+
+
+def generate_merchants(matcher: MerchantRuleMatcher, count: int, seed: int) -> List[str]:
+    """Synthetic card statement merchants: chains with branch suffixes and others"""
+    rng = random.Random(seed)
+    keywords = [
+        k if isinstance(k, str) else k["keyword"]
+        for rule in matcher.rules for k in rule["keywords"]
+    ]
+    merchants = []
+    for _ in range(count):
+        base = rng.choice(keywords) if rng.random() < 0.6 else rng.choice(OTHER_MERCHANTS)
+        if rng.random() < 0.3:
+            base = base.upper()
+        merchants.append(f"{base} {rng.choice(BRANCHES)}".strip())
+    return merchants
+
+
+def measure(label: str, match: Callable[[str], Optional[str]], merchants: List[str]) -> List[Optional[str]]:
+    start = time.perf_counter()
+    results = [match(name) for name in merchants]
+    elapsed = time.perf_counter() - start
+    matched = sum(1 for r in results if r is not None)
+    print(
+        f"{label:<10} {elapsed * 1000:9.1f} ms  {len(merchants) / elapsed:12,.0f} merchants/s  "
+        f"matched {matched:,}"
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merchant rule matching")
+    parser.add_argument("--count", type=int, default=100000, help="Number of merchant names")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    merchants = generate_merchants(merchant_rules, args.count, args.seed)
+    print(f"{args.count:,} merchants, {len(merchant_rules.rules)} rules, {merchant_rules.keyword_count} keywords")
+
+    legacy = measure("legacy", lambda name: legacy_match(merchant_rules.rules, name), merchants)
+    compiled = measure(
+        "automaton",
+        lambda name: (merchant_rules.match(name) or {}).get("rule"),
+        merchants
+    )
+
+    differences = {}
+    for name, old, new in zip(merchants, legacy, compiled):
+        if old != new:
+            differences.setdefault((old, new), name)
+    print(f"differing names: {sum(1 for old, new in zip(legacy, compiled) if old != new):,}")
+    for (old, new), example in sorted(differences.items(), key=str):
+        print(f"  {old} -> {new}  e.g. {example!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Tests of multi-transaction LLM classification
+
+The LLM client is replaced by a scripted stand-in that answers batch
+requests with numbered items (optionally corrupted on the first request)
+and single-transaction requests with a marked result, so the tests can
+check which transactions were retried and that results stay in input
+order.
+
+Run from ai/classifier: python -m pytest tests
+"""
+import asyncio
+import os
+import re
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+# The shared LLM client is built at import time and needs a key; no request reaches it
+os.environ.setdefault("GMS_API_KEY", "test")
+
+from app.core.config import settings
+from app.services import classifier_service as classifier_module
+from app.services.classification_cache import ClassificationCache
+from app.services.classifier_service import (
+    BatchClassificationWithCoT,
+    BatchItemClassificationWithCoT,
+    ClassifierService,
+    TransactionClassificationWithCoT
+)
+
+MERCHANT_LINE = re.compile(r"^가맹점: (.+)$", re.MULTILINE)
+MERCHANTS = ["가게1", "가게2", "가게3", "가게4"]
+
+
+def item(index: int, merchant: str, **overrides: Any) -> Dict[str, Any]:
+    """Valid batch item; the subcategory names the merchant so results can be traced"""
+    return {
+        "index": index,
+        "reasoning": "",
+        "category": "식비",
+        "subcategory": merchant,
+        "confidence": 0.9,
+        **overrides
+    }
+
+
+class ScriptedLLM:
+    """Stand-in for llm_client.parse recording every request"""
+
+    def __init__(self, corrupt_first: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]] = list):
+        self.corrupt_first = corrupt_first
+        self.batches: List[List[str]] = []
+        self.singles: List[str] = []
+
+    async def parse(self, messages, response_format, **kwargs):
+        merchants = MERCHANT_LINE.findall(messages[-1]["content"])
+        if response_format is TransactionClassificationWithCoT:
+            self.singles.extend(merchants)
+            return TransactionClassificationWithCoT(
+                reasoning="", category="식비", subcategory=f"{merchants[0]} (single)", confidence=0.8
+            )
+
+        self.batches.append(merchants)
+        items = [item(number, merchant) for number, merchant in enumerate(merchants, 1)]
+        if len(self.batches) == 1:
+            items = self.corrupt_first(items)
+        return BatchClassificationWithCoT(items=[BatchItemClassificationWithCoT(**entry) for entry in items])
+
+
+def raise_error(items):
+    raise RuntimeError("upstream timeout")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_MODEL_ENABLED", False)
+    monkeypatch.setattr(classifier_module, "classification_cache", ClassificationCache(max_entries=100, ttl=60))
+    return ClassifierService()
+
+
+def classify_chunk(service: ClassifierService, llm: ScriptedLLM) -> List[str]:
+    service.llm = llm
+    results = asyncio.run(service._classify_chunk([
+        {"merchant_name": merchant, "amount": 10000.0} for merchant in MERCHANTS
+    ]))
+    return [result["subcategory"] for result in results]
+
+
+@pytest.mark.parametrize("corrupt_first, retried", [
+    (lambda items: items, []),
+    (lambda items: items[:2] + items[3:], ["가게3"]),  # missing index
+    (lambda items: items + [dict(items[1], subcategory="dup")], ["가게2"]),  # duplicate index
+    (lambda items: items[:3] + [dict(items[3], index=5)], ["가게4"]),  # out of range
+    (lambda items: [dict(items[0], index=0)] + items[1:], ["가게1"]),  # out of range (0)
+    (lambda items: items[:1] + [dict(items[1], category="여행")] + items[2:], ["가게2"]),  # unknown category
+    (lambda items: items[:2] + [dict(items[2], confidence=1.5)] + items[3:], ["가게3"]),  # confidence > 1
+    (lambda items: [dict(items[0], confidence=-0.1)] + items[1:], ["가게1"]),  # confidence < 0
+], ids=[
+    "valid", "missing", "duplicate", "out-of-range", "zero-index",
+    "unknown-category", "confidence-above-1", "confidence-below-0"
+])
+def test_invalid_items_are_retried_individually(service, corrupt_first, retried):
+    llm = ScriptedLLM(corrupt_first)
+    subcategories = classify_chunk(service, llm)
+
+    assert llm.batches == [MERCHANTS]
+    assert llm.singles == retried
+    assert subcategories == [
+        f"{merchant} (single)" if merchant in retried else merchant for merchant in MERCHANTS
+    ]
+
+
+def test_several_invalid_items_are_split_in_halves(service):
+    llm = ScriptedLLM(lambda items: [items[0], items[2]])
+    subcategories = classify_chunk(service, llm)
+
+    assert llm.batches == [MERCHANTS]
+    assert llm.singles == ["가게2", "가게4"]
+    assert subcategories == ["가게1", "가게2 (single)", "가게3", "가게4 (single)"]
+
+
+def test_failed_request_is_retried_in_halves(service):
+    llm = ScriptedLLM(raise_error)
+    subcategories = classify_chunk(service, llm)
+
+    assert llm.batches == [MERCHANTS, MERCHANTS[:2], MERCHANTS[2:]]
+    assert llm.singles == []
+    assert subcategories == MERCHANTS
+
+
+def test_classify_many_asks_once_per_distinct_merchant(service):
+    llm = ScriptedLLM()
+    service.llm = llm
+    results = asyncio.run(service.classify_many([
+        {"merchant_name": "가게A", "amount": 5000.0},
+        {"merchant_name": "가게B", "amount": 5000.0},
+        {"merchant_name": "가게A", "amount": 5000.0},
+        {"merchant_name": "가게A", "amount": 5000.0, "description": "회식"},
+    ]))
+
+    # Described transactions bypass the cache and are asked on their own
+    assert llm.batches == [["가게A", "가게B"]]
+    assert llm.singles == ["가게A"]
+    assert [result["subcategory"] for result in results] == ["가게A", "가게B", "가게A", "가게A (single)"]
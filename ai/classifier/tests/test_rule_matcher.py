@@ -0,0 +1,70 @@
+"""
+Tests of the merchant keyword automaton
+
+Overlapping keywords must resolve to the longest match, ASCII keywords
+marked as boundary-sensitive must not match inside longer ASCII words,
+and merchant names are width- and case-folded before matching.
+
+Run from ai/classifier: python -m pytest tests
+"""
+import pytest
+
+from app.services.rule_matcher import KeywordAutomaton, MerchantRuleMatcher
+
+EMART, HIMART, EMART24, CU, MEGA = range(5)
+
+AUTOMATON = KeywordAutomaton([
+    ("이마트", EMART, False),
+    ("하이마트", HIMART, False),
+    ("이마트24", EMART24, False),
+    ("cu", CU, True),
+    ("mega", MEGA, True)
+])
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("이마트 성수점", (EMART, 0, 3)),
+    ("롯데하이마트 강남점", (HIMART, 2, 6)),
+    ("이마트24 역삼점", (EMART24, 0, 5)),
+    ("하이마트 옆 이마트24", (EMART24, 7, 12)),
+    ("cu 역삼점", (CU, 0, 2)),
+    ("gs25/cu", (CU, 5, 7)),
+    ("cu편의점", (CU, 0, 2)),  # Hangul next to a keyword is not a word boundary
+    ("acuvue 렌즈", None),
+    ("cu2 주유소", None),
+    ("mega coffee", (MEGA, 0, 4)),
+    ("megabox 코엑스", None),
+    ("스타벅스", None),
+    ("", None)
+])
+def test_longest_match(text, expected):
+    assert AUTOMATON.longest_match(text) == expected
+
+
+def test_first_listed_keyword_wins_on_equal_length():
+    automaton = KeywordAutomaton([("마트", 0, False), ("마트", 1, False), ("편의", 2, False)])
+    assert automaton.longest_match("편의점 마트") == (0, 4, 6)
+
+
+MATCHER = MerchantRuleMatcher([
+    {"name": "cu", "category": "마트/편의점", "subcategory": "편의점", "confidence": 0.95,
+     "keywords": [{"keyword": "CU", "boundary": True}]},
+    {"name": "emart24", "category": "마트/편의점", "subcategory": "편의점", "confidence": 0.95,
+     "keywords": ["이마트24"]},
+    {"name": "emart", "category": "마트/편의점", "subcategory": "대형마트", "confidence": 0.95,
+     "keywords": ["이마트"]}
+])
+
+
+@pytest.mark.parametrize("merchant_name, rule, keyword", [
+    ("ＣＵ 역삼점", "cu", "cu"),  # full-width letters
+    ("Cu 역삼점", "cu", "cu"),
+    ("이마트２４ 선릉점", "emart24", "이마트24"),  # full-width digits
+    ("ＡＣＵＶＵＥ", None, None)
+])
+def test_merchant_names_are_folded(merchant_name, rule, keyword):
+    match = MATCHER.match(merchant_name)
+    if rule is None:
+        assert match is None
+    else:
+        assert (match["rule"], match["keyword"]) == (rule, keyword)
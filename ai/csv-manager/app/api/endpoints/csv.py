@@ -2,23 +2,29 @@
 CSV management router with MinIO/S3 storage
 """
 import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 from datetime import datetime, timezone
-import pandas as pd
-import io
 
-from fastapi import APIRouter, File, Form, UploadFile, Query, Depends, HTTPException, status, BackgroundTasks
-from fastapi.responses import Response
+from fastapi import APIRouter, BackgroundTasks, File, Form, UploadFile, Query, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 
 from app.deps.auth import Role, require_admin, require_user
 from typing import Literal
 from fastapi import Query as QueryParam
 from app.models.schemas import (
     FileInfo, StatusResponse, ErrorResponse,
-    UploadResponse, Status, ValidationResult, FileInfoWithValidation
+    UploadResponse, Status, ValidationResult, FileInfoWithValidation,
+    UploadSessionRequest, UploadSessionResponse, UploadSessionComplete
 )
-from app.repos.csv_repo import get_csv_repo, S3CsvRepo
+from app.repos.csv_repo import (
+    get_csv_repo, S3CsvRepo, FileBusyError, UploadSessionNotFoundError
+)
+from app.services.csv_validator import (
+    CsvValidationError, validate_stream, validate_with_cache
+)
+from app.services.status_events import watch_status, DELETED_EVENT
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -65,229 +71,6 @@ def validate_csv_file(file: UploadFile) -> None:
         # Allow it but log warning - some browsers send wrong content type
 
 
-def validate_csv_for_prophet(file_content: bytes) -> Dict[str, Any]:
-    """
-    Validate CSV content for Prophet analysis requirements.
-
-    Args:
-        file_content: Raw CSV file content as bytes
-
-    Returns:
-        Dict with validation results and metadata
-
-    Raises:
-        HTTPException: If CSV doesn't meet Prophet requirements
-    """
-    try:
-        # Read CSV content
-        df = pd.read_csv(io.BytesIO(file_content))
-
-        # Check if DataFrame is empty
-        if df.empty:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV file is empty"
-            )
-
-        # Check required columns
-        required_columns = ['transaction_date_time', 'category', 'merchant_name', 'amount']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            available_columns = list(df.columns)
-            error_msg = f"Missing required columns: {', '.join(missing_columns)}."
-            error_msg += f" Found columns: {', '.join(available_columns)}."
-            error_msg += f" Required columns: {', '.join(required_columns)}."
-
-            # Suggest potential matches
-            suggestions = []
-            for missing in missing_columns:
-                for available in available_columns:
-                    if missing.lower() in available.lower() or available.lower() in missing.lower():
-                        suggestions.append(f"'{available}' might be '{missing}'")
-
-            if suggestions:
-                error_msg += f" Possible matches: {'; '.join(suggestions[:3])}."
-
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=error_msg
-            )
-
-        # Validate data types and content
-        validation_errors = []
-
-        # Check amount column
-        try:
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-            null_amounts = df['amount'].isnull().sum()
-            if null_amounts > 0:
-                validation_errors.append(f"{null_amounts} rows have invalid amount values")
-        except Exception as e:
-            validation_errors.append(f"Amount column validation failed: {str(e)}")
-
-        # Check date column
-        try:
-            df['transaction_date_time'] = pd.to_datetime(df['transaction_date_time'], errors='coerce')
-            null_dates = df['transaction_date_time'].isnull().sum()
-            if null_dates > 0:
-                validation_errors.append(f"{null_dates} rows have invalid date values")
-        except Exception as e:
-            validation_errors.append(f"Date column validation failed: {str(e)}")
-
-        # Remove rows with null values for calculation
-        clean_df = df.dropna(subset=['transaction_date_time', 'amount', 'category'])
-
-        if clean_df.empty:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No valid rows remaining after data cleaning"
-            )
-
-        # Check Prophet minimum data requirements
-        total_days = (clean_df['transaction_date_time'].max() - clean_df['transaction_date_time'].min()).days + 1
-        total_rows = len(clean_df)
-        unique_categories = clean_df['category'].nunique()
-
-        # Prophet analysis requirements
-        prophet_warnings = []
-        prophet_errors = []
-
-        # Check total data requirement (30 days minimum for baseline analysis)
-        if total_days < 30:
-            prophet_errors.append(f"Insufficient data period: {total_days} days (minimum 30 days required for baseline analysis)")
-
-        # Check if data spans at least 2 months for meaningful predictions
-        if total_days < 60:
-            prophet_warnings.append(f"Limited data period: {total_days} days. Recommend at least 60 days for accurate predictions.")
-
-        # Check total rows
-        if total_rows < 30:
-            prophet_errors.append(f"Insufficient transactions: {total_rows} rows (minimum 30 required)")
-
-        # Check category-wise data
-        category_analysis = clean_df.groupby('category').agg({
-            'transaction_date_time': ['count', 'nunique'],
-            'amount': 'sum'
-        }).round(2)
-
-        categories_with_insufficient_data = []
-        categories_with_warnings = []
-        for category in clean_df['category'].unique():
-            cat_data = clean_df[clean_df['category'] == category]
-            cat_days = cat_data['transaction_date_time'].nunique()
-            cat_rows = len(cat_data)
-
-            if cat_rows < 2:
-                categories_with_insufficient_data.append(f"'{category}' (only {cat_rows} transaction)")
-            elif cat_days < 7:
-                categories_with_warnings.append(f"'{category}' ({cat_days} days, {cat_rows} transactions)")
-
-        if categories_with_insufficient_data:
-            prophet_errors.append(f"Categories with insufficient data (< 2 transactions): {', '.join(categories_with_insufficient_data[:3])}{'...' if len(categories_with_insufficient_data) > 3 else ''}")
-
-        if categories_with_warnings:
-            prophet_warnings.append(f"Categories with limited data (< 7 days): {', '.join(categories_with_warnings[:3])}{'...' if len(categories_with_warnings) > 3 else ''}")
-
-        # Create validation summary
-        validation_summary = {
-            "status": "valid",
-            "total_rows": len(df),
-            "valid_rows": len(clean_df),
-            "date_range_days": total_days,
-            "unique_categories": unique_categories,
-            "categories": list(clean_df['category'].unique()),
-            "date_range": {
-                "start": clean_df['transaction_date_time'].min().isoformat(),
-                "end": clean_df['transaction_date_time'].max().isoformat()
-            },
-            "total_amount": float(clean_df['amount'].sum()),
-            "validation_errors": validation_errors,
-            "prophet_warnings": prophet_warnings,
-            "prophet_errors": prophet_errors,
-            "prophet_ready": len(prophet_errors) == 0 and total_days >= 2 and len(clean_df) >= 2,
-            "baseline_ready": len(prophet_errors) == 0 and total_days >= 30 and len(clean_df) >= 30
-        }
-
-        # If there are critical errors, raise exception with detailed information
-        if validation_errors or prophet_errors:
-            error_summary = []
-
-            # Add basic file info
-            error_summary.append(f"File: {df.shape[0]} total rows, {len(clean_df)} valid rows")
-
-            # Add validation errors
-            if validation_errors:
-                error_summary.append(f"Data Issues: {'; '.join(validation_errors)}")
-
-            # Add Prophet-specific errors
-            if prophet_errors:
-                error_summary.append(f"Prophet Requirements: {'; '.join(prophet_errors)}")
-
-            # Add helpful context
-            if total_days < 30:
-                error_summary.append(f"Date Range: {total_days} days (need ≥30 for baseline analysis)")
-
-            if total_rows < 30:
-                error_summary.append(f"Transaction Count: {total_rows} rows (recommend ≥30 for reliable predictions)")
-
-            # Show categories with insufficient data
-            insufficient_categories = []
-            for category in clean_df['category'].unique():
-                cat_data = clean_df[clean_df['category'] == category]
-                cat_days = cat_data['transaction_date_time'].nunique()
-                if cat_days < 7:
-                    insufficient_categories.append(f"'{category}' ({cat_days} days)")
-
-            if insufficient_categories:
-                error_summary.append(f"Categories with <7 days data: {', '.join(insufficient_categories[:5])}{'...' if len(insufficient_categories) > 5 else ''}")
-
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"CSV validation failed. {' | '.join(error_summary)}"
-            )
-
-        return validation_summary
-
-    except pd.errors.EmptyDataError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CSV file is empty or contains no readable data. Please check your file format."
-        )
-    except pd.errors.ParserError as e:
-        error_msg = str(e).lower()
-        if "tokenizing" in error_msg or "delimiter" in error_msg:
-            detail = "CSV format error: File appears to have inconsistent columns or incorrect delimiters. Please ensure all rows have the same number of columns separated by commas."
-        elif "unicode" in error_msg or "encoding" in error_msg:
-            detail = "CSV encoding error: File contains invalid characters. Please save your file as UTF-8 encoded CSV."
-        else:
-            detail = f"CSV parsing error: {str(e)}. Please check your file format and ensure it's a valid CSV."
-
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=detail
-        )
-    except HTTPException:
-        raise
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File could not be read. Please check the file exists and is accessible."
-        )
-    except MemoryError:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="CSV file is too large to process. Please reduce file size or split into smaller files."
-        )
-    except Exception as e:
-        logger.error(f"CSV validation error: {str(e)}")
-        error_type = type(e).__name__
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unexpected validation error ({error_type}): {str(e)}. Please contact support if this issue persists."
-        )
-
-
 async def auto_clear_status(
     csv_repo: S3CsvRepo,
     file_id: str,
@@ -309,34 +92,36 @@ async def auto_clear_status(
 @router.post(
     "/upload",
     response_model=FileInfoWithValidation,
-    status_code=status.HTTP_202_ACCEPTED,  # Changed to 202 for async processing
+    status_code=status.HTTP_202_ACCEPTED,  # Kept for client compatibility
     summary="Upload CSV file",
-    description="Upload a new CSV file to storage with Prophet analysis validation (Admin only) - Async processing"
+    description="Upload a new CSV file to storage with streaming Prophet analysis validation (Admin only)"
 )
 async def upload_csv(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="CSV file to upload"),
     role: Role = Depends(require_admin),
     csv_repo: S3CsvRepo = Depends(get_csv_repo)
 ) -> FileInfo:
     """
-    Upload a new CSV file to MinIO/S3 storage (asynchronous).
+    Upload a new CSV file to MinIO/S3 storage.
     
     Requires admin role.
-    Returns immediately with file_id and status 'uploading'.
-    Upload happens in background. Check status with GET /status endpoint.
+    The file is read in chunks; each chunk is hashed, validated for Prophet
+    analysis and pushed to storage with multipart upload in a single pass,
+    so memory per upload stays constant regardless of file size.
+    Validation reports are cached by content checksum, so re-uploading
+    content that was already validated skips parsing.
+    Nothing is stored if validation fails.
     
     Args:
-        background_tasks: FastAPI background tasks
         file: CSV file to upload
         role: Current user role (must be admin)
         csv_repo: Repository instance
     
     Returns:
-        FileInfo with file_id (status will be 'uploading')
+        FileInfo with file_id, checksum and validation results (status will be 'none')
     
     Raises:
-        400: If file already exists
+        400: If CSV validation fails
         401: If not authenticated
         403: If not admin
         415: If not a CSV file
@@ -346,28 +131,20 @@ async def upload_csv(
     validate_csv_file(file)
 
     try:
-        # Read file content into memory for validation and processing
-        file_content = await file.read()
-
-        # Validate CSV content for Prophet analysis
-        validation_result = validate_csv_for_prophet(file_content)
-
-        # Prepare upload (creates metadata and returns immediately)
-        # No longer checking for duplicate filenames - each upload gets unique file_id
-        file_info = await csv_repo.prepare_upload(
-            file_name=file.filename
-        )
-
-        # Schedule background upload with validation metadata
-        background_tasks.add_task(
-            csv_repo.upload_file_background,
-            file_name=file.filename,
-            file_content=file_content,
-            file_id=file_info.file_id,
-            s3_key=file_info.s3_key
+        # Stream file content through validation, hashing and multipart upload.
+        # Content validated before (same checksum) reuses the cached report.
+        file_info, validation_result = await validate_with_cache(
+            file.file,
+            csv_repo.redis_client,
+            settings.CSV_UPLOAD_CHUNK_SIZE,
+            lambda validator: csv_repo.upload_file(
+                file_name=file.filename,
+                file_content=file.file,
+                validator=validator
+            )
         )
 
-        logger.info(f"Admin '{role}' initiated upload for CSV file '{file.filename}' with ID '{file_info.file_id}'")
+        logger.info(f"Admin '{role}' uploaded CSV file '{file.filename}' with ID '{file_info.file_id}'")
         logger.info(f"CSV validation for '{file.filename}': {validation_result['valid_rows']}/{validation_result['total_rows']} valid rows, "
                    f"Prophet ready: {validation_result['prophet_ready']}, Baseline ready: {validation_result['baseline_ready']}")
 
@@ -384,9 +161,11 @@ async def upload_csv(
             validation=ValidationResult(**validation_result)
         )
         
-    except HTTPException:
-        # Re-raise HTTPExceptions from validation (with detailed error messages)
-        raise
+    except CsvValidationError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -400,6 +179,242 @@ async def upload_csv(
         )
 
 
+@router.post(
+    "/validate",
+    response_model=ValidationResult,
+    summary="Validate CSV file (dry run)",
+    description="Validate a CSV file for Prophet analysis without storing it (Admin/User)"
+)
+async def validate_csv(
+    file: UploadFile = File(..., description="CSV file to validate"),
+    role: Role = Depends(require_user),  # Both admin and user allowed
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> ValidationResult:
+    """
+    Validate a CSV file without uploading it.
+    
+    Runs the same streaming validation as upload and returns the same report.
+    Reports are cached by content checksum, so a following upload or replace
+    of the same content does not parse it again.
+    
+    Args:
+        file: CSV file to validate
+        role: Current user role
+        csv_repo: Repository instance
+    
+    Returns:
+        ValidationResult
+    
+    Raises:
+        400: If CSV validation fails
+        401: If not authenticated
+        415: If not a CSV file
+    """
+    validate_csv_file(file)
+
+    async def run_validation(validator):
+        if validator is None:
+            return None
+        return await asyncio.to_thread(
+            validate_stream, file.file, settings.CSV_UPLOAD_CHUNK_SIZE, validator
+        )
+
+    try:
+        _, validation_result = await validate_with_cache(
+            file.file,
+            csv_repo.redis_client,
+            settings.CSV_UPLOAD_CHUNK_SIZE,
+            run_validation
+        )
+        return ValidationResult(**validation_result)
+        
+    except CsvValidationError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
+    except Exception as e:
+        logger.error(f"Validation failed for '{file.filename}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to validate file"
+        )
+
+
+@router.post(
+    "/upload/sessions",
+    response_model=UploadSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start direct CSV upload",
+    description="Get presigned URLs to upload a CSV file directly to storage (Admin only)"
+)
+async def create_upload_session(
+    request: UploadSessionRequest,
+    role: Role = Depends(require_admin),
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> UploadSessionResponse:
+    """
+    Start a direct-to-storage upload.
+    
+    Requires admin role.
+    The client uploads the content straight to MinIO with the returned
+    presigned URL(s), so no CSV bytes pass through the gateway or this
+    service. Content up to one part gets a single PUT URL (send the returned
+    headers); larger content gets one URL per part of `part_size` bytes.
+    Finish with POST /upload/sessions/{session_id}/complete.
+    Pass `file_id` to replace an existing file instead.
+    
+    Args:
+        request: Filename, size and optional file ID to replace
+        role: Current user role (must be admin)
+        csv_repo: Repository instance
+    
+    Returns:
+        UploadSessionResponse with presigned URLs
+    
+    Raises:
+        401: If not authenticated
+        403: If not admin
+        404: If the file to replace is not found
+        415: If not a CSV filename
+        500: For storage errors
+    """
+    if not request.csv_file.lower().endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="File must have .csv extension"
+        )
+
+    try:
+        session = await csv_repo.create_upload_session(
+            request.csv_file,
+            request.size_bytes,
+            replace_file_id=request.file_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to create upload session for '{request.csv_file}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create upload session"
+        )
+
+    logger.info(f"Admin '{role}' started upload session '{session['session_id']}' for '{session['csv_file']}'")
+    return UploadSessionResponse(**session)
+
+
+@router.post(
+    "/upload/sessions/{session_id}/complete",
+    response_model=FileInfoWithValidation,
+    summary="Complete direct CSV upload",
+    description="Validate and register a CSV file uploaded with presigned URLs (Admin only)"
+)
+async def complete_upload_session(
+    session_id: str,
+    request: Optional[UploadSessionComplete] = None,
+    role: Role = Depends(require_admin),
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> FileInfoWithValidation:
+    """
+    Finalize a direct upload.
+    
+    Requires admin role.
+    Commits the multipart upload with the reported part ETags (or the parts
+    found in storage when none are reported), then streams the object from
+    storage to hash and validate it. Invalid content is deleted from storage.
+    If finalizing fails for any other reason the session is kept, so the
+    request can be retried until the session expires.
+    
+    Args:
+        session_id: Session ID from POST /upload/sessions
+        request: Optional uploaded part list
+        role: Current user role (must be admin)
+        csv_repo: Repository instance
+    
+    Returns:
+        FileInfo with file_id, checksum and validation results (status will be 'none')
+    
+    Raises:
+        400: If CSV validation fails
+        401: If not authenticated
+        403: If not admin
+        404: If the session (or the file being replaced) is not found
+        409: If the file being replaced is being processed
+        500: For storage errors
+    """
+    parts = [part.model_dump() for part in request.parts] if request else []
+
+    try:
+        file_info, validation_result = await csv_repo.complete_upload_session(session_id, parts)
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except FileBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot replace file while status is '{e.status}'"
+        )
+    except CsvValidationError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Completing upload session '{session_id}' failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to complete upload"
+        )
+
+    logger.info(f"Admin '{role}' completed upload session '{session_id}' as file ID '{file_info.file_id}'")
+
+    return FileInfoWithValidation(
+        **file_info.model_dump(),
+        validation=ValidationResult(**validation_result)
+    )
+
+
+@router.delete(
+    "/upload/sessions/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort direct CSV upload",
+    description="Cancel a direct upload session and discard uploaded content (Admin only)"
+)
+async def abort_upload_session(
+    session_id: str,
+    role: Role = Depends(require_admin),
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> Response:
+    """
+    Abort a direct upload session.
+    
+    Requires admin role.
+    Aborts the multipart upload or deletes the uploaded object.
+    
+    Raises:
+        401: If not authenticated
+        403: If not admin
+        404: If the session is not found
+    """
+    if not await csv_repo.abort_upload_session(session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Upload session '{session_id}' not found or expired"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.delete(
     "/delete",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -434,15 +449,15 @@ async def delete_csv(
     """
     try:
         # Check if file exists
-        file_info = await csv_repo.get_file_info_by_id(file_id)
-        if not file_info:
+        record = await csv_repo.get_file_with_status_by_id(file_id)
+        if not record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"File with ID '{file_id}' not found"
             )
+        file_info, current_status = record
         
         # Check if file is being processed (optional business logic)
-        current_status = await csv_repo.get_status_by_id(file_id)
         if current_status and current_status in ["ingesting", "analyzing"]:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -469,35 +484,35 @@ async def delete_csv(
 @router.put(
     "/change",
     response_model=FileInfo,
-    status_code=status.HTTP_202_ACCEPTED,  # Changed to 202 for async
+    status_code=status.HTTP_202_ACCEPTED,  # Kept for client compatibility
     summary="Replace CSV file",
-    description="Replace an existing CSV file by file ID (Admin only) - Async processing"
+    description="Replace an existing CSV file by file ID with streaming upload (Admin only)"
 )
 async def replace_csv(
-    background_tasks: BackgroundTasks,
     file_id: str = Query(..., description="File ID to replace"),
     file: UploadFile = File(..., description="New CSV file"),
     role: Role = Depends(require_admin),
     csv_repo: S3CsvRepo = Depends(get_csv_repo)
 ) -> FileInfo:
     """
-    Replace an existing CSV file in MinIO/S3 storage by file ID (asynchronous).
+    Replace an existing CSV file in MinIO/S3 storage by file ID.
     
     Requires admin role.
-    Returns immediately with status 'uploading'.
-    Keeps the same file_id but creates new S3 object.
+    Keeps the same file_id but streams the content to a new S3 object.
+    Status is 'uploading' while the new version is streamed and validated;
+    the previous object is only removed after the new one is committed.
     
     Args:
-        background_tasks: FastAPI background tasks
         file_id: File ID to replace
         file: New CSV file content
         role: Current user role (must be admin)
         csv_repo: Repository instance
     
     Returns:
-        FileInfo with same file_id (status will be 'uploading')
+        FileInfo with same file_id (status will be 'none')
     
     Raises:
+        400: If CSV validation fails
         401: If not authenticated
         403: If not admin
         404: If original file not found
@@ -510,43 +525,45 @@ async def replace_csv(
     
     try:
         # Check if original file exists
-        existing = await csv_repo.get_file_info_by_id(file_id)
-        if not existing:
+        record = await csv_repo.get_file_with_status_by_id(file_id)
+        if not record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"File with ID '{file_id}' not found. Use POST /upload for new files."
             )
+        existing, current_status = record
         
-        # Check if file is being processed
-        current_status = await csv_repo.get_status_by_id(file_id)
+        # Check if file is being processed (the repository re-checks atomically)
         if current_status and current_status in ["uploading", "ingesting", "analyzing"]:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Cannot replace file while status is '{current_status}'"
             )
         
-        # Prepare replace (returns immediately)
-        file_info, old_s3_key = await csv_repo.prepare_replace_by_id(file_id)
-        
-        # Read file content for background processing
-        file_content = await file.read()
-        
-        # Schedule background replace
-        background_tasks.add_task(
-            csv_repo.replace_file_background,
-            file_name=existing.csv_file,
-            file_content=file_content,
-            file_id=file_info.file_id,
-            s3_key=file_info.s3_key,
-            old_s3_key=old_s3_key
+        # Stream new content through validation to storage
+        file_info, _ = await validate_with_cache(
+            file.file,
+            csv_repo.redis_client,
+            settings.CSV_UPLOAD_CHUNK_SIZE,
+            lambda validator: csv_repo.replace_file_by_id(file_id, file.file, validator=validator)
         )
         
-        logger.info(f"Admin '{role}' initiated replace for file ID '{file_id}' ('{existing.csv_file}')")
+        logger.info(f"Admin '{role}' replaced file ID '{file_id}' ('{existing.csv_file}')")
         
         return file_info
         
     except HTTPException:
         raise
+    except FileBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot replace file while status is '{e.status}'"
+        )
+    except CsvValidationError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
     except Exception as e:
         logger.error(f"Replace failed for file_id '{file_id}': {e}")
         raise HTTPException(
@@ -555,6 +572,84 @@ async def replace_csv(
         )
 
 
+@router.patch(
+    "/append",
+    response_model=FileInfo,
+    summary="Append rows to CSV file",
+    description="Append new rows to an existing CSV file by file ID without re-uploading its history (Admin only)"
+)
+async def append_csv(
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(..., description="File ID to append to"),
+    file: UploadFile = File(..., description="CSV with a header row and only the new rows"),
+    role: Role = Depends(require_admin),
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> FileInfo:
+    """
+    Append rows to an existing CSV file.
+    
+    Requires admin role.
+    Only the new rows are sent and stored, as a segment object under the
+    same file_id, so incremental syncs cost time proportional to the new
+    data. Every row must be valid; the history requirements of /upload are
+    not applied to the increment. Columns are matched by name, and columns
+    missing from the upload are left empty. Segments are merged into the
+    base object in the background once CSV_SEGMENT_COMPACT_THRESHOLD is
+    reached. Appending is allowed while the file is analyzed, but not while
+    it is being replaced.
+    
+    Args:
+        background_tasks: Used to schedule segment compaction
+        file_id: File ID to append to
+        file: New rows
+        role: Current user role (must be admin)
+        csv_repo: Repository instance
+    
+    Returns:
+        FileInfo with the updated segment list and size
+    
+    Raises:
+        400: If the rows fail validation
+        401: If not authenticated
+        403: If not admin
+        404: If file not found
+        409: If file is being replaced
+        415: If not a CSV file
+        500: For storage errors
+    """
+    validate_csv_file(file)
+
+    try:
+        file_info, summary = await csv_repo.append_rows(file_id, file.file)
+    except FileBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot append to file while status is '{e.status}'"
+        )
+    except CsvValidationError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Append failed for file_id '{file_id}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to append rows to storage"
+        )
+
+    if len(file_info.segments) >= settings.CSV_SEGMENT_COMPACT_THRESHOLD:
+        background_tasks.add_task(csv_repo.compact_segments, file_id)
+
+    logger.info(f"Admin '{role}' appended {summary['total_rows']} rows to file ID '{file_id}' ('{file_info.csv_file}')")
+    return file_info
+
+
 @router.get(
     "/status",
     response_model=StatusResponse,
@@ -586,18 +681,14 @@ async def get_csv_status(
         500: For storage errors
     """
     try:
-        # Check if file exists
-        file_info = await csv_repo.get_file_info_by_id(file_id)
-        if not file_info:
+        # Get file and current status in one read
+        record = await csv_repo.get_file_with_status_by_id(file_id)
+        if not record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"File with ID '{file_id}' not found"
             )
-        
-        # Get current status
-        current_status = await csv_repo.get_status_by_id(file_id)
-        if not current_status:
-            current_status = "none"
+        file_info, current_status = record
         
         # Build response
         response = StatusResponse(
@@ -622,6 +713,141 @@ async def get_csv_status(
         )
 
 
+def status_reader(csv_repo: S3CsvRepo):
+    """Status lookup for watch_status: DELETED_EVENT once the file is gone"""
+    async def read_status(file_id: str) -> str:
+        record = await csv_repo.get_file_with_status_by_id(file_id)
+        return record[1] if record else DELETED_EVENT
+    return read_status
+
+
+@router.get(
+    "/status/stream",
+    summary="Stream CSV status changes",
+    description="Server-Sent Events stream of status changes for a file ID (Admin/User)"
+)
+async def stream_csv_status(
+    file_id: str = Query(..., description="File ID to follow"),
+    until: Optional[Status] = Query(None, description="Close the stream once this status is reached"),
+    timeout: int = Query(60, ge=1, description="Seconds before the stream is closed"),
+    role: Role = Depends(require_user),  # Both admin and user allowed
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> StreamingResponse:
+    """
+    Stream status changes of a CSV file as Server-Sent Events.
+    
+    The current status is sent first, then every transition published by
+    csv-manager or analysis. Events are 'status', 'deleted' and 'timeout',
+    each with a JSON body of file_id and status; keepalive comments are sent
+    while nothing changes. Timeout is capped by CSV_STATUS_WAIT_MAX_TIMEOUT.
+    
+    Args:
+        file_id: File ID to follow
+        until: Optional target status that ends the stream
+        timeout: Maximum stream duration in seconds
+        role: Current user role
+        csv_repo: Repository instance
+    
+    Returns:
+        text/event-stream response
+    
+    Raises:
+        401: If not authenticated
+        404: If file not found
+    """
+    if not await csv_repo.get_file_with_status_by_id(file_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File with ID '{file_id}' not found"
+        )
+
+    async def event_stream():
+        async for event, current_status in watch_status(
+            file_id,
+            status_reader(csv_repo),
+            until,
+            min(timeout, settings.CSV_STATUS_WAIT_MAX_TIMEOUT),
+            settings.CSV_STATUS_STREAM_KEEPALIVE
+        ):
+            if event == "keepalive":
+                yield ": keepalive\n\n"
+                continue
+            payload = json.dumps({"file_id": file_id, "status": current_status})
+            yield f"event: {event}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/status/wait",
+    response_model=StatusResponse,
+    summary="Wait for CSV status",
+    description="Long-poll until a file reaches a status or the timeout expires (Admin/User)"
+)
+async def wait_csv_status(
+    file_id: str = Query(..., description="File ID to wait for"),
+    until: Status = Query("none", description="Status to wait for"),
+    timeout: int = Query(60, ge=1, description="Seconds to wait at most"),
+    role: Role = Depends(require_user),  # Both admin and user allowed
+    csv_repo: S3CsvRepo = Depends(get_csv_repo)
+) -> StatusResponse:
+    """
+    Wait until a CSV file reaches a status, returning as soon as it does.
+    
+    Replaces fixed-interval polling of GET /status: the response is sent
+    immediately when the transition is published. On timeout the current
+    status is returned with details ['timeout']. Timeout is capped by
+    CSV_STATUS_WAIT_MAX_TIMEOUT (below the gateway proxy timeout).
+    
+    Args:
+        file_id: File ID to wait for
+        until: Target status (default 'none', i.e. processing finished)
+        timeout: Maximum wait in seconds
+        role: Current user role
+        csv_repo: Repository instance
+    
+    Returns:
+        StatusResponse with the reached (or last known) status
+    
+    Raises:
+        401: If not authenticated
+        404: If file not found or deleted while waiting
+    """
+    record = await csv_repo.get_file_with_status_by_id(file_id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File with ID '{file_id}' not found"
+        )
+    file_info = record[0]
+
+    timeout = min(timeout, settings.CSV_STATUS_WAIT_MAX_TIMEOUT)
+    last_event, last_status = "status", record[1]
+    async for event, current_status in watch_status(
+        file_id, status_reader(csv_repo), until, timeout, timeout
+    ):
+        if event != "keepalive":
+            last_event, last_status = event, current_status
+
+    if last_event == "deleted":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File with ID '{file_id}' was deleted"
+        )
+
+    return StatusResponse(
+        csv_file=file_info.csv_file,
+        status=last_status,
+        progress=None,
+        last_updated=datetime.now(timezone.utc).isoformat(),
+        details=["timeout"] if last_event == "timeout" else None
+    )
+
+
 @router.get(
     "/file",
     response_model=FileInfo,
@@ -664,38 +890,74 @@ async def get_file_info(
 @router.get(
     "/list",
     summary="List CSV files",
-    description="List all uploaded CSV files (Admin only)",
+    description="List uploaded CSV files with cursor pagination and filters (Admin only)",
     include_in_schema=False  # Hidden utility endpoint
 )
 async def list_csv_files(
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    count: int = Query(100, ge=1, le=1000, description="Page size"),
+    status_filter: Optional[Status] = Query(None, alias="status", description="Only files with this status"),
+    uploaded_after: Optional[datetime] = Query(None, description="Only files uploaded at or after this time (ISO 8601)"),
+    uploaded_before: Optional[datetime] = Query(None, description="Only files uploaded at or before this time (ISO 8601)"),
     role: Role = Depends(require_admin),
     csv_repo: S3CsvRepo = Depends(get_csv_repo)
 ) -> dict:
     """
-    List all CSV files (utility endpoint for debugging).
+    List CSV files page by page, newest upload first (utility endpoint for debugging).
+    
+    Each page costs a constant number of Redis round trips regardless of the
+    total number of files. The status filter is applied within the page, so
+    a filtered page may hold fewer than `count` files; keep following
+    `next_cursor` until it is null.
     
     Args:
+        cursor: Cursor from the previous page
+        count: Page size
+        status_filter: Optional status filter
+        uploaded_after: Optional lower bound on upload time
+        uploaded_before: Optional upper bound on upload time
         role: Current user role (must be admin)
         csv_repo: Repository instance
     
     Returns:
-        Dictionary with file list
+        Dictionary with file list, next_cursor and total files in the date range
     """
-    # Get all files from Redis using file_id based storage
-    all_files = csv_repo.redis_client.list_all_files()
+    def to_epoch(value: Optional[datetime]) -> Optional[float]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+
+    try:
+        page, next_cursor, total = await csv_repo.redis_client.list_files_page(
+            cursor=cursor,
+            count=count,
+            uploaded_after=to_epoch(uploaded_after),
+            uploaded_before=to_epoch(uploaded_before)
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor '{cursor}'"
+        )
+
     files = []
-    for file_id, metadata in all_files.items():
-        status = await csv_repo.get_status_by_id(file_id)
+    for file_id, metadata, file_status in page:
+        if status_filter and file_status != status_filter:
+            continue
         files.append({
             "file_id": file_id,
             "csv_file": metadata.get('csv_file'),
-            "status": status or "none",
+            "status": file_status,
             "size_bytes": metadata.get('size_bytes'),
             "uploaded_at": metadata.get('uploaded_at'),
             "replaced_at": metadata.get('replaced_at')
         })
     
     return {
-        "total": len(files),
+        "total": total,
+        "count": len(files),
+        "next_cursor": next_cursor,
         "files": files
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,103 @@
+"""
+Maintenance commands for csv-manager
+
+Usage:
+    python -m app.cli rebuild-indexes
+    python -m app.cli migrate-file-hashes [--force]
+    python -m app.cli compact-segments FILE_ID [FILE_ID ...]
+    python -m app.cli purge-superseded-objects
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.redis import close_redis
+from app.repos.csv_repo import get_csv_repo
+from app.repos.redis_client import get_redis_client
+
+
+async def rebuild_indexes(args: argparse.Namespace) -> int:
+    """Rebuild the filename and upload-time indexes from stored metadata"""
+    result = await get_redis_client().rebuild_indexes(batch_size=args.batch_size)
+    print(json.dumps(result))
+    return 0
+
+
+async def migrate_file_hashes(args: argparse.Namespace) -> int:
+    """Convert legacy metadata JSON and status keys to per-file hashes"""
+    result = await get_redis_client().migrate_legacy_layout(batch_size=args.batch_size, force=args.force)
+    print(json.dumps(result))
+    return 0
+
+
+async def compact_segments(args: argparse.Namespace) -> int:
+    """Merge appended segments of the given files into their base objects"""
+    csv_repo = get_csv_repo()
+    result = {file_id: await csv_repo.compact_segments(file_id) for file_id in args.file_ids}
+    print(json.dumps(result))
+    return 0
+
+
+async def purge_superseded_objects(args: argparse.Namespace) -> int:
+    """Delete objects replaced by compactions whose grace period is over"""
+    purged = await get_csv_repo().purge_superseded_objects()
+    print(json.dumps({"purged": purged}))
+    return 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run a command and release the Redis pool afterwards"""
+    try:
+        return await args.func(args)
+    finally:
+        await close_redis()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="csv-manager maintenance commands"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-indexes",
+        aliases=["rebuild-filename-index"],
+        help="Rebuild or repair the Redis filename and upload-time indexes"
+    )
+    rebuild.add_argument("--batch-size", type=int, default=500, help="File IDs fetched per round trip")
+    rebuild.set_defaults(func=rebuild_indexes)
+
+    migrate = subparsers.add_parser(
+        "migrate-file-hashes",
+        help="Convert legacy csv:metadata:id/csv:status keys to csv:file hashes"
+    )
+    migrate.add_argument("--batch-size", type=int, default=500, help="File IDs scanned per round trip")
+    migrate.add_argument("--force", action="store_true", help="Scan even if the schema version marker is set")
+    migrate.set_defaults(func=migrate_file_hashes)
+
+    compact = subparsers.add_parser(
+        "compact-segments",
+        help="Merge appended segments into the base object now"
+    )
+    compact.add_argument("file_ids", nargs="+", metavar="FILE_ID", help="Files to compact")
+    compact.set_defaults(func=compact_segments)
+
+    purge = subparsers.add_parser(
+        "purge-superseded-objects",
+        help="Delete objects replaced by compactions once CSV_SUPERSEDED_OBJECT_GRACE has passed"
+    )
+    purge.set_defaults(func=purge_superseded_objects)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
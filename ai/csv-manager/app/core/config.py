@@ -47,6 +47,10 @@ class Settings(BaseSettings):
         default=True,
         env="MINIO_SECURE"
     )
+    MINIO_PUBLIC_ENDPOINT: Optional[str] = Field(
+        default=None,  # Endpoint clients use for presigned URLs; defaults to MINIO_ENDPOINT
+        env="MINIO_PUBLIC_ENDPOINT"
+    )
     
     # CSV Processing Settings
     CSV_STATUS_AUTO_CLEAR: bool = Field(
@@ -57,11 +61,47 @@ class Settings(BaseSettings):
         default=300,  # 5 minutes - only used if AUTO_CLEAR is true
         env="CSV_STATUS_CLEAR_DELAY"
     )
+    CSV_STATUS_WAIT_MAX_TIMEOUT: int = Field(
+        default=110,  # Seconds; stays below the gateway's 120s proxy timeout
+        env="CSV_STATUS_WAIT_MAX_TIMEOUT"
+    )
+    CSV_STATUS_STREAM_KEEPALIVE: int = Field(
+        default=15,  # Seconds between SSE keepalive comments
+        env="CSV_STATUS_STREAM_KEEPALIVE"
+    )
     PRESIGNED_URL_EXPIRY: int = Field(
         default=900,  # 15 minutes
         env="PRESIGNED_URL_EXPIRY"
     )
-    
+    CSV_UPLOAD_CHUNK_SIZE: int = Field(
+        default=1024 * 1024,  # 1 MiB read from the request per iteration
+        env="CSV_UPLOAD_CHUNK_SIZE"
+    )
+    CSV_UPLOAD_PART_SIZE: int = Field(
+        default=8 * 1024 * 1024,  # 8 MiB per S3 multipart part (S3 minimum is 5 MiB)
+        env="CSV_UPLOAD_PART_SIZE"
+    )
+    CSV_VALIDATION_CACHE_TTL: int = Field(
+        default=86400,  # 24 hours
+        env="CSV_VALIDATION_CACHE_TTL"
+    )
+    CSV_SEGMENT_COMPACT_THRESHOLD: int = Field(
+        default=8,  # Appended segments before they are merged into the base object
+        env="CSV_SEGMENT_COMPACT_THRESHOLD"
+    )
+    CSV_SUPERSEDED_OBJECT_GRACE: int = Field(
+        default=86400,  # Seconds objects replaced by a compaction are kept for readers of the old manifest
+        env="CSV_SUPERSEDED_OBJECT_GRACE"
+    )
+    CSV_SUPERSEDED_PURGE_INTERVAL: int = Field(
+        default=600,  # Seconds between deletions of superseded objects past their grace period
+        env="CSV_SUPERSEDED_PURGE_INTERVAL"
+    )
+    CSV_UPLOAD_SESSION_TTL: int = Field(
+        default=3600,  # 1 hour to upload and complete a direct upload session
+        env="CSV_UPLOAD_SESSION_TTL"
+    )
+
     # Authentication Settings (Development mode)
     AUTH_ENABLED: bool = Field(
         default=False,  # Set to True in production
@@ -105,6 +145,18 @@ class Settings(BaseSettings):
         default=None,
         env="REDIS_PASSWORD"
     )
+    REDIS_POOL_SIZE: int = Field(
+        default=20,  # Max pooled connections per process
+        env="REDIS_POOL_SIZE"
+    )
+    REDIS_POOL_TIMEOUT: int = Field(
+        default=5,  # Seconds to wait for a free pooled connection
+        env="REDIS_POOL_TIMEOUT"
+    )
+    REDIS_SOCKET_TIMEOUT: int = Field(
+        default=5,
+        env="REDIS_SOCKET_TIMEOUT"
+    )
     
     class Config:
         env_file = ".env"
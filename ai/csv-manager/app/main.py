@@ -1,24 +1,67 @@
 """
 CSV Manager Service - Dedicated service for CSV file management
 """
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from app.api.endpoints import csv
 from app.core.config import settings
+from app.core.redis import init_redis, close_redis, get_command_stats
+from app.repos.csv_repo import get_csv_repo
+from app.repos.redis_client import get_redis_client
+from app.services.status_events import status_event_hub
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+async def purge_superseded_objects():
+    """Delete objects replaced by compactions once their grace period is over"""
+    while True:
+        try:
+            purged = await get_csv_repo().purge_superseded_objects()
+            if purged:
+                logger.info(f"Deleted {purged} superseded objects")
+        except Exception as e:
+            logger.error(f"Failed to purge superseded objects: {e}")
+        await asyncio.sleep(settings.CSV_SUPERSEDED_PURGE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the Redis pool and migrate legacy keys on startup, release the pool on shutdown"""
+    try:
+        await init_redis()
+        # Convert legacy metadata/status keys to per-file hashes (no-op once done)
+        result = await get_redis_client().migrate_legacy_layout()
+        if not result["skipped"]:
+            logger.info(f"Redis layout migration: {result['migrated']} files converted")
+    except Exception as e:
+        # Connections are retried lazily by the pool on the next command
+        logger.error(f"Redis initialization failed on startup: {e}")
+    # Subscriber for status change notifications (reconnects on its own)
+    status_event_hub.start()
+    purge_task = asyncio.create_task(purge_superseded_objects())
+    yield
+    purge_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await purge_task
+    await status_event_hub.stop()
+    await close_redis()
+
+
 app = FastAPI(
     title="CSV Manager Service",
     description="Dedicated service for CSV file upload and management with MinIO/S3 storage",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -49,13 +92,25 @@ async def root():
         "description": "CSV file management with MinIO/S3 storage",
         "endpoints": {
             "upload": "POST /api/ai/csv/upload",
+            "validate": "POST /api/ai/csv/validate",
+            "upload_session": "POST /api/ai/csv/upload/sessions",
+            "upload_session_complete": "POST /api/ai/csv/upload/sessions/{session_id}/complete",
             "delete": "DELETE /api/ai/csv/delete",
             "replace": "PUT /api/ai/csv/change",
-            "status": "GET /api/ai/csv/status"
+            "append": "PATCH /api/ai/csv/append",
+            "status": "GET /api/ai/csv/status",
+            "status_wait": "GET /api/ai/csv/status/wait",
+            "status_stream": "GET /api/ai/csv/status/stream (SSE)"
         }
     }
 
 
+@app.get("/metrics/redis", include_in_schema=False)
+async def redis_metrics():
+    """Redis pool usage and per-command latency"""
+    return get_command_stats()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,23 +1,33 @@
 """
 Data models and schemas for CSV management
 """
-from typing import Optional, List, Literal
+from typing import Optional, Dict, List, Literal
 from pydantic import BaseModel, Field
 
 # Status enum - simplified states
 Status = Literal["uploading", "ingesting", "analyzing", "none"]
 
 
+class SegmentInfo(BaseModel):
+    """Rows appended to a file, stored as a separate object until compacted"""
+    key: str = Field(..., description="S3 object key of the segment")
+    rows: int = Field(..., description="Number of appended rows")
+    size_bytes: int = Field(..., description="Segment size in bytes")
+    checksum: str = Field(..., description="SHA-256 checksum of the segment")
+    appended_at: str = Field(..., description="ISO 8601 UTC timestamp of the append")
+
+
 class FileInfo(BaseModel):
     """File information and metadata"""
     csv_file: str = Field(..., description="Original filename")
     file_id: str = Field(..., description="Unique file identifier")
-    checksum: Optional[str] = Field(None, description="SHA-256 checksum")
-    size_bytes: int = Field(..., description="File size in bytes")
+    checksum: Optional[str] = Field(None, description="SHA-256 checksum of the base object")
+    size_bytes: int = Field(..., description="File size in bytes (base object and segments)")
     uploaded_at: str = Field(..., description="ISO 8601 UTC timestamp of initial upload")
     replaced_at: Optional[str] = Field(None, description="ISO 8601 UTC timestamp of last replacement")
-    s3_key: Optional[str] = Field(None, description="S3 object key")
+    s3_key: Optional[str] = Field(None, description="S3 object key of the base object")
     s3_url: Optional[str] = Field(None, description="Presigned URL for download")
+    segments: List[SegmentInfo] = Field(default_factory=list, description="Appended segments not yet compacted, in order")
 
 
 class StatusResponse(BaseModel):
@@ -74,4 +84,41 @@ class FileInfoWithValidation(BaseModel):
     replaced_at: Optional[str] = Field(None, description="ISO 8601 UTC timestamp of last replacement")
     s3_key: Optional[str] = Field(None, description="S3 object key")
     s3_url: Optional[str] = Field(None, description="Presigned URL for download")
-    validation: ValidationResult = Field(..., description="CSV validation results")
\ No newline at end of file
+    validation: ValidationResult = Field(..., description="CSV validation results")
+
+class UploadSessionRequest(BaseModel):
+    """Request to start a direct-to-storage upload"""
+    csv_file: str = Field(..., description="Original filename (.csv)")
+    size_bytes: int = Field(..., gt=0, description="Content size in bytes, used to plan multipart parts")
+    file_id: Optional[str] = Field(None, description="File ID to replace instead of uploading a new file")
+
+
+class UploadPartUrl(BaseModel):
+    """Presigned URL for one multipart part"""
+    part_number: int = Field(..., description="1-based part number")
+    url: str = Field(..., description="Presigned PUT URL for the part")
+
+
+class UploadSessionResponse(BaseModel):
+    """Direct upload session with presigned URLs"""
+    session_id: str = Field(..., description="Upload session identifier")
+    file_id: str = Field(..., description="File ID the content will be stored under")
+    csv_file: str = Field(..., description="Filename")
+    s3_key: str = Field(..., description="S3 object key")
+    method: Literal["put", "multipart"] = Field(..., description="Single PUT or multipart upload")
+    upload_url: Optional[str] = Field(None, description="Presigned PUT URL (method 'put')")
+    headers: Dict[str, str] = Field(default_factory=dict, description="Headers to send with the PUT")
+    part_size: int = Field(..., description="Bytes per part (last part may be smaller)")
+    parts: List[UploadPartUrl] = Field(default_factory=list, description="Presigned part URLs (method 'multipart')")
+    expires_at: str = Field(..., description="ISO 8601 UTC time the session and URLs expire")
+
+
+class UploadedPart(BaseModel):
+    """Part reported by the client after uploading it"""
+    part_number: int = Field(..., ge=1, description="1-based part number")
+    etag: str = Field(..., description="ETag header returned by the part upload")
+
+
+class UploadSessionComplete(BaseModel):
+    """Completion report for a direct upload session"""
+    parts: List[UploadedPart] = Field(default_factory=list, description="Uploaded parts; listed from storage when empty")
@@ -1,13 +1,17 @@
 """
 CSV Repository with MinIO/S3 storage backend
 """
+import asyncio
+import csv
 import io
 import hashlib
+import math
+import time
 import uuid
 import logging
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any, BinaryIO
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, BinaryIO, List, Set, Tuple
 from pathlib import Path
 
 import boto3
@@ -17,10 +21,32 @@ from botocore.exceptions import ClientError, NoCredentialsError
 from app.core.config import settings
 from app.models.schemas import FileInfo, Status
 from app.repos.redis_client import get_redis_client
+from app.services.csv_validator import CsvValidationError, StreamingCsvValidator
 
 logger = logging.getLogger(__name__)
 
 
+class FileBusyError(Exception):
+    """Raised when a file's current status does not allow the requested change"""
+
+    def __init__(self, file_id: str, status: str):
+        self.file_id = file_id
+        self.status = status
+        super().__init__(f"File '{file_id}' is busy (status '{status}')")
+
+
+class UploadSessionNotFoundError(Exception):
+    """Raised when a direct upload session does not exist or has expired"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        super().__init__(f"Upload session '{session_id}' not found or expired")
+
+
+# S3 limit on the number of parts in one multipart upload
+S3_MAX_PARTS = 10000
+
+
 class StreamingHashWrapper:
     """
     A file-like wrapper that calculates SHA-256 hash while streaming.
@@ -59,6 +85,99 @@ class StreamingHashWrapper:
         return self.hasher.hexdigest()
 
 
+class S3MultipartWriter:
+    """
+    Write-only stream that pushes data to S3 with multipart upload.
+
+    Data is buffered up to part_size and uploaded part by part, so memory
+    use is bounded by a single part. Objects smaller than one part are
+    stored with a single put_object call instead.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key: str,
+        part_size: int,
+        content_type: str = 'text/csv'
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.content_type = content_type
+        self.upload_id: Optional[str] = None
+        self.parts: List[Dict[str, Any]] = []
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> None:
+        """Buffer data and upload every full part"""
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._upload_part(part)
+
+    def _upload_part(self, data: bytes) -> None:
+        """Upload a single part, starting the multipart upload on first use"""
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                ContentType=self.content_type
+            )
+            self.upload_id = response['UploadId']
+
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    def complete(self) -> None:
+        """Flush remaining data and commit the object"""
+        if self.upload_id is None:
+            # Small object - a single request is enough
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type
+            )
+            self._buffer.clear()
+            return
+
+        if self._buffer:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self) -> None:
+        """Abort the multipart upload and discard buffered data"""
+        self._buffer.clear()
+        if self.upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id
+            )
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload for '{self.key}': {e}")
+
+
 class CsvRepo(ABC):
     """Abstract interface for CSV storage operations"""
     
@@ -117,14 +236,24 @@ class S3CsvRepo(CsvRepo):
         # Configure S3 client for MinIO
         self.s3_client = self._create_s3_client()
         
+        # Presigned URLs are handed to clients, so they are signed for the
+        # endpoint clients can reach (signing itself makes no request)
+        if settings.MINIO_PUBLIC_ENDPOINT:
+            self.presign_client = self._create_s3_client(settings.MINIO_PUBLIC_ENDPOINT)
+        else:
+            self.presign_client = self.s3_client
+        
+        # File IDs with a segment compaction running in this process
+        self._compacting: Set[str] = set()
+        
         # Ensure bucket exists
         self._ensure_bucket()
     
-    def _create_s3_client(self):
+    def _create_s3_client(self, endpoint: Optional[str] = None):
         """Create and configure boto3 S3 client for MinIO"""
         try:
             # Parse endpoint URL
-            endpoint_url = settings.MINIO_ENDPOINT
+            endpoint_url = endpoint or settings.MINIO_ENDPOINT
             if not endpoint_url.startswith(('http://', 'https://')):
                 endpoint_url = f"{'https' if settings.MINIO_SECURE else 'http'}://{endpoint_url}"
             
@@ -201,7 +330,7 @@ class S3CsvRepo(CsvRepo):
     def _generate_presigned_url(self, key: str) -> Optional[str]:
         """Generate a presigned URL for downloading the file"""
         try:
-            url = self.s3_client.generate_presigned_url(
+            url = self.presign_client.generate_presigned_url(
                 'get_object',
                 Params={
                     'Bucket': self.bucket_name,
@@ -214,455 +343,856 @@ class S3CsvRepo(CsvRepo):
             logger.warning(f"Failed to generate presigned URL: {e}")
             return None
     
-    async def prepare_upload(
+    def _stream_to_s3(
         self,
-        file_name: str
-    ) -> FileInfo:
+        file_content: BinaryIO,
+        s3_key: str,
+        validator: Optional[StreamingCsvValidator] = None
+    ) -> Tuple[str, int]:
         """
-        Prepare for file upload by creating metadata and returning file info.
-        Actual upload happens in background.
-        
+        Stream file content to S3 in a single pass (blocking, run in a worker thread).
+
+        Each chunk is hashed, validated and buffered into a multipart part,
+        so memory use is bounded by the part size regardless of file size.
+        The object is only committed if validation succeeds.
+
         Args:
-            file_name: Original filename
-        
+            file_content: Binary file-like object positioned at the start
+            s3_key: Target S3 key
+            validator: Optional validator fed with every chunk
+
         Returns:
-            FileInfo with file_id and initial metadata
-        
+            Tuple of (SHA-256 checksum, size in bytes)
+
         Raises:
-            ValueError: If file already exists
+            CsvValidationError: If validation fails (upload is aborted)
+            Exception: For S3 operation failures (upload is aborted)
         """
-        # No longer checking for duplicate filenames
-        # Each upload gets a unique file_id
-        
-        # Generate S3 key and file ID
-        s3_key = self._generate_s3_key(file_name)
-        file_id = s3_key.split('_')[0]  # Extract UUID from key
-        
-        # Create initial file info (without size and checksum yet)
-        file_info = FileInfo(
-            csv_file=file_name,
-            file_id=file_id,
-            checksum="pending",  # Will be updated after upload
-            size_bytes=0,  # Will be updated after upload
-            uploaded_at=datetime.now(timezone.utc).isoformat(),
-            replaced_at=None,
-            s3_key=s3_key,
-            s3_url="pending"  # Will be updated after upload
+        hash_wrapper = StreamingHashWrapper(file_content)
+        writer = S3MultipartWriter(
+            self.s3_client,
+            self.bucket_name,
+            s3_key,
+            part_size=settings.CSV_UPLOAD_PART_SIZE
         )
-        
-        # Store initial metadata in Redis using file_id as key
-        metadata_dict = file_info.model_dump()
-        self.redis_client.set_file_metadata(file_id, metadata_dict)
-        
-        # Set initial status to uploading
-        self.redis_client.set_status(file_id, "uploading")
-        
-        logger.info(f"Prepared upload for file '{file_name}' with ID '{file_id}'")
-        
-        return file_info
-    
-    async def upload_file_background(
+
+        try:
+            while True:
+                chunk = hash_wrapper.read(settings.CSV_UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if validator is not None:
+                    validator.feed(chunk)
+                writer.write(chunk)
+
+            if validator is not None:
+                validator.close()
+
+            writer.complete()
+        except Exception:
+            writer.abort()
+            raise
+
+        return hash_wrapper.checksum, hash_wrapper.size
+
+    def _read_from_s3(
         self,
-        file_name: str,
-        file_content: bytes,  # Changed to bytes for background task
-        file_id: str,
-        s3_key: str
-    ) -> None:
+        s3_key: str,
+        validator: Optional[StreamingCsvValidator] = None
+    ) -> Tuple[str, int]:
         """
-        Background task to upload file to S3.
-        
-        Args:
-            file_name: Original filename
-            file_content: File content as bytes
-            file_id: Pre-generated file ID
-            s3_key: Pre-generated S3 key
+        Stream an S3 object back in chunks, hashing and validating it (blocking).
+
+        Used to finalize direct uploads: the content never passed through
+        this service on the way in, so it is checked after it is stored.
+
+        Returns:
+            Tuple of (SHA-256 checksum, size in bytes)
+
+        Raises:
+            CsvValidationError: If validation fails
         """
+        body = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)['Body']
+        hash_wrapper = StreamingHashWrapper(body)
         try:
-            # Set status to ingesting
-            self.redis_client.set_status(file_id, "ingesting")
-            
-            # Calculate checksum
-            checksum = hashlib.sha256(file_content).hexdigest()
-            size_bytes = len(file_content)
-            
-            # Upload to S3
-            from io import BytesIO
-            file_stream = BytesIO(file_content)
-            
-            extra_args = {'ContentType': 'text/csv'}
-            self.s3_client.upload_fileobj(
-                file_stream,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
-            )
-            
-            # Verify upload
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
-                logger.info(f"Background upload verified: S3 object '{s3_key}' exists")
-            except Exception as e:
-                logger.error(f"Background upload verification failed: {e}")
-                self.redis_client.set_status(file_id, "none")
-                return
-            
-            # Generate presigned URL
-            presigned_url = self._generate_presigned_url(s3_key)
-            
-            # Update file info with actual values
-            file_info = FileInfo(
-                csv_file=file_name,
-                file_id=file_id,
-                checksum=checksum,
-                size_bytes=size_bytes,
-                uploaded_at=datetime.now(timezone.utc).isoformat(),
-                replaced_at=None,
-                s3_key=s3_key,
-                s3_url=presigned_url
-            )
-            
-            # Update metadata in Redis using file_id as key
-            metadata_dict = file_info.model_dump()
-            self.redis_client.set_file_metadata(file_id, metadata_dict)
-            
-            # Upload completed successfully - set status to none
-            self.redis_client.set_status(file_id, "none")
-            
-            logger.info(f"Background upload completed for '{file_name}' (size: {size_bytes} bytes)")
-            
+            while True:
+                chunk = hash_wrapper.read(settings.CSV_UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if validator is not None:
+                    validator.feed(chunk)
+        finally:
+            body.close()
+
+        if validator is not None:
+            validator.close()
+
+        return hash_wrapper.checksum, hash_wrapper.size
+
+    def _delete_object(self, s3_key: str) -> None:
+        """Delete an S3 object, logging instead of raising on failure"""
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            logger.info(f"Deleted S3 object: {s3_key}")
         except Exception as e:
-            logger.error(f"Background upload failed for '{file_name}': {e}")
-            self.redis_client.set_status(file_id, "none")
-            # Optionally clean up failed upload metadata
-            # self.redis_client.delete_file_metadata(file_name, file_id)
-    
+            logger.warning(f"Failed to delete object '{s3_key}': {e}")
+
+    def _delete_objects(self, s3_keys: List[str]) -> None:
+        """Delete several S3 objects, logging instead of raising on failure"""
+        for s3_key in s3_keys:
+            self._delete_object(s3_key)
+
+    @staticmethod
+    def _object_keys(file_info: FileInfo) -> List[str]:
+        """S3 keys holding a file's content: base object, then appended segments"""
+        keys = [file_info.s3_key] if file_info.s3_key else []
+        return keys + [segment.key for segment in file_info.segments]
+
     async def upload_file(
         self,
         file_name: str,
-        file_content: BinaryIO
+        file_content: BinaryIO,
+        validator: Optional[StreamingCsvValidator] = None
     ) -> FileInfo:
         """
-        Upload a new CSV file to MinIO/S3 (synchronous for backward compatibility).
+        Upload a new CSV file to MinIO/S3 with streaming validation.
+
+        The content is read in chunks, hashed and validated while it is
+        pushed to S3 with multipart upload. Metadata is only stored once
+        the object has been committed.
 
         Args:
             file_name: Original filename
             file_content: Binary file content
+            validator: Optional validator; its report is available as
+                validator.report after a successful upload
 
         Returns:
             FileInfo with upload details
 
         Raises:
+            CsvValidationError: If the content fails validation
             Exception: For S3 operation failures
         """
         # No longer checking for duplicate filenames - each gets unique file_id
-        
+
+        # Generate S3 key and file ID
+        s3_key = self._generate_s3_key(file_name)
+        file_id = s3_key.split('_')[0]  # Extract UUID from key
+
         try:
-            # Generate S3 key and file ID
-            s3_key = self._generate_s3_key(file_name)
-            file_id = s3_key.split('_')[0]  # Extract UUID from key
-            
-            # Wrap file stream for hash calculation
-            hash_wrapper = StreamingHashWrapper(file_content)
-            
-            # Upload to S3
-            # Note: MinIO may have issues with certain metadata headers
-            # Set status to ingesting before upload
-            self.redis_client.set_status(file_id, "ingesting")
-            
-            # Use minimal metadata for compatibility
-            extra_args = {'ContentType': 'text/csv'}
-            
-            # Upload to S3
-            self.s3_client.upload_fileobj(
-                hash_wrapper,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
-            )
-            
-            # Verify upload was successful by checking if object exists
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
-                logger.info(f"Upload verified: S3 object '{s3_key}' exists")
-            except Exception as e:
-                logger.error(f"Upload verification failed: {e}")
-                self.redis_client.set_status(file_id, "none")
-                raise
-            
-            # Generate presigned URL (optional)
-            presigned_url = self._generate_presigned_url(s3_key)
-            
-            # Create file info
-            file_info = FileInfo(
-                csv_file=file_name,
-                file_id=file_id,
-                checksum=hash_wrapper.checksum,
-                size_bytes=hash_wrapper.size,
-                uploaded_at=datetime.now(timezone.utc).isoformat(),
-                replaced_at=None,
-                s3_key=s3_key,
-                s3_url=presigned_url
+            checksum, size_bytes = await asyncio.to_thread(
+                self._stream_to_s3, file_content, s3_key, validator
             )
-            
-            # Store metadata in Redis using file_id as key
-            metadata_dict = file_info.model_dump()
-            self.redis_client.set_file_metadata(file_id, metadata_dict)
-            
-            # Upload completed successfully - set status to none
-            self.redis_client.set_status(file_id, "none")
-            
-            logger.info(f"Uploaded file '{file_name}' to S3 key '{s3_key}' (size: {hash_wrapper.size} bytes)")
-            
-            return file_info
-            
         except Exception as e:
             logger.error(f"Failed to upload file '{file_name}': {e}")
             raise
-    
-    async def prepare_replace(
+
+        # Generate presigned URL (optional)
+        presigned_url = self._generate_presigned_url(s3_key)
+
+        # Create file info
+        file_info = FileInfo(
+            csv_file=file_name,
+            file_id=file_id,
+            checksum=checksum,
+            size_bytes=size_bytes,
+            uploaded_at=datetime.now(timezone.utc).isoformat(),
+            replaced_at=None,
+            s3_key=s3_key,
+            s3_url=presigned_url
+        )
+
+        # Store metadata and initial status (none) in one transaction
+        await self.redis_client.set_file_metadata(file_id, file_info.model_dump(), status="none")
+
+        logger.info(f"Uploaded file '{file_name}' to S3 key '{s3_key}' (size: {size_bytes} bytes)")
+
+        return file_info
+
+    async def replace_file(
         self,
-        file_name: str
+        file_name: str,
+        file_content: BinaryIO,
+        validator: Optional[StreamingCsvValidator] = None
     ) -> FileInfo:
         """
-        Prepare for file replacement.
-        
+        Replace an existing CSV file in MinIO/S3 by filename.
+
         Args:
-            file_name: File to replace
-        
+            file_name: Original filename to replace
+            file_content: New binary file content
+            validator: Optional validator fed while streaming
+
         Returns:
-            FileInfo with existing file_id
-        
+            FileInfo with updated details
+
         Raises:
             ValueError: If file doesn't exist
+            Exception: For S3 operation failures
         """
-        # For replace, we need to find if a file with this name exists
-        # This is now a search operation since we key by file_id
-        old_metadata = self.redis_client.get_file_metadata_by_filename(file_name)
+        # Resolve filename to file_id through the filename index
+        old_metadata = await self.redis_client.get_file_metadata_by_filename(file_name)
         if not old_metadata:
             raise ValueError(f"File '{file_name}' not found. Use upload_file for new files.")
-        
+
+        return await self.replace_file_by_id(old_metadata['file_id'], file_content, validator)
+
+    async def replace_file_by_id(
+        self,
+        file_id: str,
+        file_content: BinaryIO,
+        validator: Optional[StreamingCsvValidator] = None
+    ) -> FileInfo:
+        """
+        Replace a CSV file by file_id, keeping the same file_id.
+
+        The new object is streamed to a new S3 key; the old object is only
+        deleted after the new one has been committed, so a failed replace
+        leaves the previous version intact.
+
+        Args:
+            file_id: File ID to replace
+            file_content: New binary file content
+            validator: Optional validator fed while streaming
+
+        Returns:
+            FileInfo with updated details
+
+        Raises:
+            ValueError: If file doesn't exist
+            FileBusyError: If the file is not idle
+            CsvValidationError: If the content fails validation
+            Exception: For S3 operation failures
+        """
+        old_metadata = await self.redis_client.get_file_metadata_by_id(file_id)
+        if not old_metadata:
+            raise ValueError(f"File with id '{file_id}' not found")
+
         old_info = FileInfo(**old_metadata)
-        file_id = old_info.file_id
-        
-        # Set status to uploading
-        self.redis_client.set_status(file_id, "uploading")
-        
+        file_name = old_info.csv_file
+
+        # Claim the file: set status to uploading only if it is idle
+        applied, current_status = await self.redis_client.transition_status(
+            file_id, "uploading", allowed_from=["none"]
+        )
+        if current_status is None:
+            raise ValueError(f"File with id '{file_id}' not found")
+        if not applied:
+            raise FileBusyError(file_id, current_status)
+
+        # Appends and compactions are refused while the file is uploading,
+        # so the manifest read now is exactly what this replace supersedes
+        old_info = FileInfo(**(await self.redis_client.get_file_metadata_by_id(file_id) or old_metadata))
+
         # Generate new S3 key with existing file_id
         timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
         s3_key = f"{file_id}_{timestamp}_{file_name}"
-        
-        # Return file info with new s3_key but same file_id
+
+        try:
+            checksum, size_bytes = await asyncio.to_thread(
+                self._stream_to_s3, file_content, s3_key, validator
+            )
+        except Exception as e:
+            logger.error(f"Failed to replace file '{file_name}' (id: {file_id}): {e}")
+            await self.redis_client.set_status(file_id, "none")
+            raise
+
+        # Generate presigned URL
+        presigned_url = self._generate_presigned_url(s3_key)
+
+        # Update file info
         file_info = FileInfo(
             csv_file=file_name,
             file_id=file_id,
-            checksum="pending",
-            size_bytes=0,
-            uploaded_at=old_info.uploaded_at,
+            checksum=checksum,
+            size_bytes=size_bytes,
+            uploaded_at=old_info.uploaded_at,  # Keep original upload time
             replaced_at=datetime.now(timezone.utc).isoformat(),
             s3_key=s3_key,
-            s3_url="pending"
+            s3_url=presigned_url
         )
-        
-        # Update metadata with pending status using file_id as key
-        metadata_dict = file_info.model_dump()
-        self.redis_client.set_file_metadata(file_id, metadata_dict)
-        
-        logger.info(f"Prepared replace for file '{file_name}' with ID '{file_id}'")
-        
-        return file_info, old_info.s3_key  # Return old s3_key for deletion
+
+        # Update metadata and release the file (status none) in one transaction
+        await self.redis_client.set_file_metadata(file_id, file_info.model_dump(), status="none")
+
+        # Remove the previous version (and its segments) now that the new one is committed
+        await asyncio.to_thread(
+            self._delete_objects, [key for key in self._object_keys(old_info) if key != s3_key]
+        )
+
+        logger.info(f"Replaced file '{file_name}' with new S3 key '{s3_key}' (size: {size_bytes} bytes)")
+
+        return file_info
     
-    async def replace_file_background(
+    def _read_header(self, s3_key: str, max_bytes: int = 64 * 1024) -> List[str]:
+        """Read the header row of a stored CSV object with a ranged GET (blocking)"""
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Range=f"bytes=0-{max_bytes - 1}"
+        )
+        head = response['Body'].read().decode('utf-8-sig', errors='replace')
+        return next(csv.reader([head.split('\n', 1)[0].rstrip('\r')]))
+
+    def _write_segment(
         self,
-        file_name: str,
-        file_content: bytes,
-        file_id: str,
+        file_content: BinaryIO,
         s3_key: str,
-        old_s3_key: str = None
-    ) -> None:
+        columns: List[str]
+    ) -> Tuple[str, int, Dict[str, Any]]:
         """
-        Background task to replace file in S3.
-        
+        Validate appended rows and store them as a segment object (blocking).
+
+        Rows are rewritten in the base object's column order (columns the
+        upload lacks are left empty), so segments can be concatenated to the
+        base object as-is. The segment keeps its own header line.
+
+        Returns:
+            Tuple of (SHA-256 checksum, size in bytes, row summary)
+
+        Raises:
+            CsvValidationError: If the rows are invalid or have unknown columns
+        """
+        buffer = io.StringIO()
+        row_writer = csv.writer(buffer, lineterminator='\n')
+        positions: Optional[List[Optional[int]]] = None
+
+        def write_row(row: List[str]) -> None:
+            nonlocal positions
+            if positions is None:
+                unknown = [column for column in validator.header if column not in columns]
+                if unknown:
+                    raise CsvValidationError(
+                        f"Columns not in the existing file: {', '.join(unknown)}. "
+                        f"File columns: {', '.join(columns)}."
+                    )
+                positions = [
+                    validator.header.index(column) if column in validator.header else None
+                    for column in columns
+                ]
+            row_writer.writerow([
+                row[i] if i is not None and i < len(row) else ''
+                for i in positions
+            ])
+
+        validator = StreamingCsvValidator(on_row=write_row)
+        hasher = hashlib.sha256()
+        size = 0
+        writer = S3MultipartWriter(
+            self.s3_client,
+            self.bucket_name,
+            s3_key,
+            part_size=settings.CSV_UPLOAD_PART_SIZE
+        )
+
+        def flush() -> None:
+            nonlocal size
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            if data:
+                hasher.update(data)
+                size += len(data)
+                writer.write(data)
+
+        try:
+            row_writer.writerow(columns)
+            flush()
+            while True:
+                chunk = file_content.read(settings.CSV_UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                validator.feed(chunk)
+                flush()
+            summary = validator.close_rows()
+            flush()
+            writer.complete()
+        except Exception:
+            writer.abort()
+            raise
+
+        return hasher.hexdigest(), size, summary
+
+    async def append_rows(self, file_id: str, file_content: BinaryIO) -> Tuple[FileInfo, Dict[str, Any]]:
+        """
+        Append rows to a file without rewriting the stored history.
+
+        The rows are validated and stored as a new segment object under the
+        same file_id, and the segment is added to the file's manifest. Readers
+        concatenate the base object and its segments; once the manifest holds
+        CSV_SEGMENT_COMPACT_THRESHOLD segments they should be merged with
+        compact_segments.
+
         Args:
-            file_name: Original filename
-            file_content: New file content as bytes
-            file_id: Existing file ID
-            s3_key: New S3 key
-            old_s3_key: Old S3 key to delete
+            file_id: File ID to append to
+            file_content: CSV with a header row and the new rows only
+
+        Returns:
+            Tuple of (updated FileInfo, row summary)
+
+        Raises:
+            ValueError: If file doesn't exist
+            FileBusyError: If the file is being replaced
+            CsvValidationError: If the rows are invalid
+            Exception: For S3 operation failures
+        """
+        record = await self.redis_client.get_file_record(file_id)
+        if record is None:
+            raise ValueError(f"File with id '{file_id}' not found")
+        metadata, current_status = record
+        if current_status == "uploading":
+            raise FileBusyError(file_id, current_status)
+
+        base_key = metadata.get('s3_key')
+        columns = await asyncio.to_thread(self._read_header, base_key)
+
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S_%f')
+        segment_key = f"{file_id}_seg_{timestamp}.csv"
+        checksum, size_bytes, summary = await asyncio.to_thread(
+            self._write_segment, file_content, segment_key, columns
+        )
+        segment = {
+            'key': segment_key,
+            'rows': summary['total_rows'],
+            'size_bytes': size_bytes,
+            'checksum': checksum,
+            'appended_at': datetime.now(timezone.utc).isoformat()
+        }
+
+        try:
+            # A compaction may swap the base object meanwhile; it keeps the
+            # header, so the segment still fits the new base object
+            for _ in range(3):
+                outcome, updated = await self.redis_client.append_segment(file_id, base_key, segment)
+                if outcome != "conflict":
+                    break
+                latest = await self.redis_client.get_file_metadata_by_id(file_id)
+                if not latest or await asyncio.to_thread(self._read_header, latest['s3_key']) != columns:
+                    break
+                base_key = latest['s3_key']
+        except Exception:
+            await asyncio.to_thread(self._delete_object, segment_key)
+            raise
+
+        if outcome != "applied":
+            await asyncio.to_thread(self._delete_object, segment_key)
+            if outcome == "missing":
+                raise ValueError(f"File with id '{file_id}' not found")
+            raise FileBusyError(file_id, updated['status'] if updated else "uploading")
+
+        logger.info(
+            f"Appended {segment['rows']} rows to file_id '{file_id}' as segment "
+            f"{len(updated['segments'])} ({size_bytes} bytes)"
+        )
+
+        return FileInfo(**updated), summary
+
+    def _merge_objects(self, s3_keys: List[str], target_key: str) -> Tuple[str, int]:
+        """
+        Concatenate the base object and segments into one object (blocking).
+
+        The header line of every segment after the first object is skipped;
+        content is streamed chunk by chunk through a multipart upload.
+
+        Returns:
+            Tuple of (SHA-256 checksum, size in bytes)
         """
+        writer = S3MultipartWriter(
+            self.s3_client,
+            self.bucket_name,
+            target_key,
+            part_size=settings.CSV_UPLOAD_PART_SIZE
+        )
+        hasher = hashlib.sha256()
+        size = 0
+        last_byte = b'\n'
+
+        def emit(data: bytes) -> None:
+            nonlocal size, last_byte
+            if data:
+                hasher.update(data)
+                size += len(data)
+                writer.write(data)
+                last_byte = data[-1:]
+
         try:
-            # Set status to ingesting
-            self.redis_client.set_status(file_id, "ingesting")
-            
-            # Delete old S3 object if exists
-            if old_s3_key:
+            for index, s3_key in enumerate(s3_keys):
+                body = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)['Body']
+                skip_header = index > 0
+                separated = index == 0
                 try:
-                    self.s3_client.delete_object(
-                        Bucket=self.bucket_name,
-                        Key=old_s3_key
-                    )
-                    logger.info(f"Deleted old S3 object: {old_s3_key}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete old object: {e}")
-            
-            # Calculate checksum
-            checksum = hashlib.sha256(file_content).hexdigest()
-            size_bytes = len(file_content)
-            
-            # Upload to S3
-            from io import BytesIO
-            file_stream = BytesIO(file_content)
-            
-            extra_args = {'ContentType': 'text/csv'}
-            self.s3_client.upload_fileobj(
-                file_stream,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
+                    for chunk in body.iter_chunks(settings.CSV_UPLOAD_CHUNK_SIZE):
+                        if skip_header:
+                            newline = chunk.find(b'\n')
+                            if newline < 0:
+                                continue
+                            chunk = chunk[newline + 1:]
+                            skip_header = False
+                        if chunk and not separated:
+                            # The previous object may not end with a newline
+                            if last_byte != b'\n':
+                                emit(b'\n')
+                            separated = True
+                        emit(chunk)
+                finally:
+                    body.close()
+            writer.complete()
+        except Exception:
+            writer.abort()
+            raise
+
+        return hasher.hexdigest(), size
+
+    async def compact_segments(self, file_id: str) -> bool:
+        """
+        Merge a file's appended segments into a new base object.
+
+        Readers keep using the old objects until the manifest is swapped in
+        one Redis transaction; segments appended during the merge stay in the
+        manifest. The swap is skipped if the file was replaced or compacted
+        meanwhile, in which case the merged object is discarded. The old
+        objects are deleted by purge_superseded_objects only after
+        CSV_SUPERSEDED_OBJECT_GRACE seconds, so readers that loaded the old
+        manifest (analysis, long classification jobs) can finish.
+
+        Returns:
+            True if segments were compacted
+        """
+        if file_id in self._compacting:
+            return False
+        self._compacting.add(file_id)
+        try:
+            metadata = await self.redis_client.get_file_metadata_by_id(file_id)
+            if not metadata or not metadata.get('segments'):
+                return False
+            file_info = FileInfo(**metadata)
+            merged_keys = [segment.key for segment in file_info.segments]
+
+            timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S_%f')
+            s3_key = f"{file_id}_{timestamp}_{file_info.csv_file}"
+            checksum, size_bytes = await asyncio.to_thread(
+                self._merge_objects, [file_info.s3_key] + merged_keys, s3_key
             )
-            
-            # Verify upload
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
-                logger.info(f"Background replace verified: S3 object '{s3_key}' exists")
-            except Exception as e:
-                logger.error(f"Background replace verification failed: {e}")
-                self.redis_client.set_status(file_id, "none")
-                return
-            
-            # Generate presigned URL
-            presigned_url = self._generate_presigned_url(s3_key)
-            
-            # Get existing metadata to preserve uploaded_at
-            old_metadata = self.redis_client.get_file_metadata_by_id(file_id)
-            old_info = FileInfo(**old_metadata) if old_metadata else None
-            
-            # Update file info with actual values
-            file_info = FileInfo(
-                csv_file=file_name,
-                file_id=file_id,
-                checksum=checksum,
-                size_bytes=size_bytes,
-                uploaded_at=old_info.uploaded_at if old_info else datetime.now(timezone.utc).isoformat(),
-                replaced_at=datetime.now(timezone.utc).isoformat(),
-                s3_key=s3_key,
-                s3_url=presigned_url
+
+            committed = await self.redis_client.commit_compaction(
+                file_id,
+                file_info.s3_key,
+                merged_keys,
+                {
+                    's3_key': s3_key,
+                    'checksum': checksum,
+                    'size_bytes': size_bytes,
+                    's3_url': self._generate_presigned_url(s3_key)
+                },
+                time.time() + settings.CSV_SUPERSEDED_OBJECT_GRACE
             )
-            
-            # Update metadata in Redis using file_id as key
-            metadata_dict = file_info.model_dump()
-            self.redis_client.set_file_metadata(file_id, metadata_dict)
-            
-            # Replace completed successfully - set status to none
-            self.redis_client.set_status(file_id, "none")
-            
-            logger.info(f"Background replace completed for '{file_name}' (size: {size_bytes} bytes)")
-            
+            if not committed:
+                logger.info(f"Compaction of file_id '{file_id}' superseded, discarding merged object")
+                await asyncio.to_thread(self._delete_object, s3_key)
+                return False
+
+            logger.info(f"Compacted {len(merged_keys)} segments of file_id '{file_id}' into '{s3_key}'")
+            return True
         except Exception as e:
-            logger.error(f"Background replace failed for '{file_name}': {e}")
-            self.redis_client.set_status(file_id, "none")
-    
-    async def replace_file(
-        self, 
-        file_name: str, 
-        file_content: BinaryIO
-    ) -> FileInfo:
+            logger.error(f"Failed to compact segments of file_id '{file_id}': {e}")
+            return False
+        finally:
+            self._compacting.discard(file_id)
+
+    async def purge_superseded_objects(self) -> int:
         """
-        Replace an existing CSV file in MinIO/S3 (synchronous for backward compatibility).
-        
+        Delete objects replaced by compactions once their grace period is over.
+
+        Returns:
+            Number of objects deleted
+        """
+        purged = 0
+        while True:
+            s3_keys = await self.redis_client.get_due_superseded_objects(time.time())
+            if not s3_keys:
+                return purged
+            await asyncio.to_thread(self._delete_objects, s3_keys)
+            await self.redis_client.remove_superseded_objects(s3_keys)
+            purged += len(s3_keys)
+
+    def _presign_upload(self, session: Dict[str, Any], expires_in: int) -> Dict[str, Any]:
+        """Generate the presigned PUT or part URLs for a direct upload session"""
+        if session['upload_id'] is None:
+            url = self.presign_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': session['s3_key'],
+                    'ContentType': 'text/csv'
+                },
+                ExpiresIn=expires_in
+            )
+            return {'upload_url': url, 'headers': {'Content-Type': 'text/csv'}, 'parts': []}
+
+        parts = []
+        for part_number in range(1, session['part_count'] + 1):
+            url = self.presign_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': session['s3_key'],
+                    'UploadId': session['upload_id'],
+                    'PartNumber': part_number
+                },
+                ExpiresIn=expires_in
+            )
+            parts.append({'part_number': part_number, 'url': url})
+        return {'upload_url': None, 'headers': {}, 'parts': parts}
+
+    async def create_upload_session(
+        self,
+        file_name: str,
+        size_bytes: int,
+        replace_file_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Start a direct upload: the client PUTs the content straight to MinIO.
+
+        Content up to one part (CSV_UPLOAD_PART_SIZE) gets a single presigned
+        PUT URL; larger content gets a multipart upload with one presigned URL
+        per part. Nothing is stored in the file index until the session is
+        completed with complete_upload_session.
+
         Args:
-            file_name: Original filename to replace
-            file_content: New binary file content
-        
+            file_name: Original filename
+            size_bytes: Declared content size, used to plan the parts
+            replace_file_id: File ID to replace instead of creating a new file
+
         Returns:
-            FileInfo with updated details
-        
+            Session with session_id, file_id, s3_key, method, URLs and expiry
+
         Raises:
-            ValueError: If file doesn't exist
+            ValueError: If the file to replace doesn't exist
             Exception: For S3 operation failures
         """
-        # For replace, we need to find if a file with this name exists
-        # This is now a search operation since we key by file_id
-        old_metadata = self.redis_client.get_file_metadata_by_filename(file_name)
-        if not old_metadata:
-            raise ValueError(f"File '{file_name}' not found. Use upload_file for new files.")
-        
-        try:
-            # Convert dict to FileInfo
-            old_info = FileInfo(**old_metadata)
-            
-            # Keep the same file_id but generate new S3 key
-            file_id = old_info.file_id
-            
-            # Delete old S3 object (optional - could keep for versioning)
-            if old_info.s3_key:
-                try:
-                    self.s3_client.delete_object(
-                        Bucket=self.bucket_name,
-                        Key=old_info.s3_key
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to delete old object: {e}")
-            
-            # Set status to ingesting before upload
-            self.redis_client.set_status(file_id, "ingesting")
-            
-            # Generate new S3 key with existing file_id
+        if replace_file_id is not None:
+            old_metadata = await self.redis_client.get_file_metadata_by_id(replace_file_id)
+            if not old_metadata:
+                raise ValueError(f"File with id '{replace_file_id}' not found")
+            file_id = replace_file_id
+            file_name = old_metadata['csv_file']
             timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
             s3_key = f"{file_id}_{timestamp}_{file_name}"
-            
-            # Wrap file stream for hash calculation
-            hash_wrapper = StreamingHashWrapper(file_content)
-            
-            # Upload new file
-            # Use minimal metadata for MinIO compatibility
-            extra_args = {'ContentType': 'text/csv'}
-            
-            self.s3_client.upload_fileobj(
-                hash_wrapper,
-                self.bucket_name,
-                s3_key,
-                ExtraArgs=extra_args
+        else:
+            s3_key = self._generate_s3_key(file_name)
+            file_id = s3_key.split('_')[0]
+
+        # Keep within the S3 part count limit for very large files
+        part_size = max(settings.CSV_UPLOAD_PART_SIZE, math.ceil(size_bytes / S3_MAX_PARTS))
+        upload_id = None
+        part_count = 1
+        if size_bytes > part_size:
+            response = await asyncio.to_thread(
+                self.s3_client.create_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                ContentType='text/csv'
             )
-            
-            # Verify upload was successful
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
-                logger.info(f"Replace upload verified: S3 object '{s3_key}' exists")
-            except Exception as e:
-                logger.error(f"Replace upload verification failed: {e}")
-                self.redis_client.set_status(file_id, "none")
-                raise
-            
-            # Generate presigned URL
-            presigned_url = self._generate_presigned_url(s3_key)
-            
-            # Update file info
-            file_info = FileInfo(
-                csv_file=file_name,
-                file_id=file_id,
-                checksum=hash_wrapper.checksum,
-                size_bytes=hash_wrapper.size,
-                uploaded_at=old_info.uploaded_at,  # Keep original upload time
-                replaced_at=datetime.now(timezone.utc).isoformat(),
-                s3_key=s3_key,
-                s3_url=presigned_url
+            upload_id = response['UploadId']
+            part_count = math.ceil(size_bytes / part_size)
+
+        ttl = settings.CSV_UPLOAD_SESSION_TTL
+        session_id = str(uuid.uuid4())
+        session = {
+            'session_id': session_id,
+            'file_id': file_id,
+            'csv_file': file_name,
+            's3_key': s3_key,
+            'replace': replace_file_id is not None,
+            'upload_id': upload_id,
+            'part_size': part_size,
+            'part_count': part_count,
+            'expires_at': (datetime.now(timezone.utc) + timedelta(seconds=ttl)).isoformat()
+        }
+        if not await self.redis_client.set_upload_session(session_id, session, ttl):
+            if upload_id is not None:
+                await asyncio.to_thread(self._abort_multipart, s3_key, upload_id)
+            raise RuntimeError(f"Failed to store upload session for '{file_name}'")
+
+        logger.info(
+            f"Created upload session '{session_id}' for '{file_name}' "
+            f"({'multipart, ' + str(part_count) + ' parts' if upload_id else 'single PUT'})"
+        )
+
+        return {
+            **session,
+            'method': 'multipart' if upload_id else 'put',
+            **self._presign_upload(session, ttl)
+        }
+
+    def _abort_multipart(self, s3_key: str, upload_id: str) -> None:
+        """Abort a multipart upload, logging instead of raising on failure"""
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id
             )
-            
-            # Update metadata in Redis using file_id as key
-            metadata_dict = file_info.model_dump()
-            self.redis_client.set_file_metadata(file_id, metadata_dict)
-            
-            # Upload completed successfully - set status to none
-            self.redis_client.set_status(file_id, "none")
-            
-            logger.info(f"Replaced file '{file_name}' with new S3 key '{s3_key}'")
-            
-            return file_info
-            
         except Exception as e:
-            logger.error(f"Failed to replace file '{file_name}': {e}")
+            logger.warning(f"Failed to abort multipart upload for '{s3_key}': {e}")
+
+    def _complete_multipart(self, session: Dict[str, Any], parts: List[Dict[str, Any]]) -> None:
+        """
+        Commit a multipart upload (blocking).
+
+        Uses the ETags reported by the client, or lists the uploaded parts
+        when the client did not report any.
+        """
+        if not parts:
+            paginator = self.s3_client.get_paginator('list_parts')
+            parts = [
+                {'ETag': part['ETag'], 'PartNumber': part['PartNumber']}
+                for page in paginator.paginate(
+                    Bucket=self.bucket_name,
+                    Key=session['s3_key'],
+                    UploadId=session['upload_id']
+                )
+                for part in page.get('Parts', [])
+            ]
+        else:
+            parts = [
+                {'ETag': part['etag'], 'PartNumber': part['part_number']}
+                for part in sorted(parts, key=lambda part: part['part_number'])
+            ]
+
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=session['s3_key'],
+            UploadId=session['upload_id'],
+            MultipartUpload={'Parts': parts}
+        )
+
+    async def _restore_upload_session(self, session: Dict[str, Any]) -> None:
+        """Put a session back after a retryable failure, keeping its expiry"""
+        expires_at = datetime.fromisoformat(session['expires_at'])
+        remaining = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+        if remaining > 0:
+            await self.redis_client.set_upload_session(session['session_id'], session, remaining)
+
+    async def complete_upload_session(
+        self,
+        session_id: str,
+        parts: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[FileInfo, Dict[str, Any]]:
+        """
+        Finalize a direct upload after the client has uploaded the content.
+
+        Commits the multipart upload (if any), then streams the object back
+        from MinIO to hash and validate it server-side. Invalid content is
+        deleted; valid content is indexed like a regular upload. Replace
+        sessions claim the file (status 'uploading') while finalizing and
+        delete the previous object afterwards.
+
+        Args:
+            session_id: Session returned by create_upload_session
+            parts: Uploaded parts as {'part_number', 'etag'}; listed from
+                MinIO when omitted
+
+        Returns:
+            Tuple of (FileInfo, validation report)
+
+        Raises:
+            UploadSessionNotFoundError: If the session doesn't exist or expired
+            ValueError: If the file to replace no longer exists
+            FileBusyError: If the file to replace is not idle
+            CsvValidationError: If the content fails validation
+            Exception: For S3 operation failures (the session is kept for retry)
+        """
+        session = await self.redis_client.pop_upload_session(session_id)
+        if session is None:
+            raise UploadSessionNotFoundError(session_id)
+
+        file_id = session['file_id']
+        file_name = session['csv_file']
+        s3_key = session['s3_key']
+
+        old_info = None
+        if session['replace']:
+            applied, current_status = await self.redis_client.transition_status(
+                file_id, "uploading", allowed_from=["none"]
+            )
+            old_metadata = await self.redis_client.get_file_metadata_by_id(file_id)
+            if current_status is None or not old_metadata:
+                await self._discard_session(session)
+                raise ValueError(f"File with id '{file_id}' not found")
+            if not applied:
+                await self._restore_upload_session(session)
+                raise FileBusyError(file_id, current_status)
+            old_info = FileInfo(**old_metadata)
+
+        validator = StreamingCsvValidator()
+        try:
+            if session['upload_id'] is not None:
+                await asyncio.to_thread(self._complete_multipart, session, parts or [])
+                # The upload is committed; a retry only has to re-read the object
+                session['upload_id'] = None
+            checksum, size_bytes = await asyncio.to_thread(self._read_from_s3, s3_key, validator)
+        except CsvValidationError:
+            logger.warning(f"Direct upload '{session_id}' for '{file_name}' failed validation")
+            await asyncio.to_thread(self._delete_object, s3_key)
+            if old_info is not None:
+                await self.redis_client.set_status(file_id, "none")
             raise
-    
+        except Exception as e:
+            logger.error(f"Failed to finalize upload session '{session_id}' for '{file_name}': {e}")
+            if old_info is not None:
+                await self.redis_client.set_status(file_id, "none")
+            await self._restore_upload_session(session)
+            raise
+
+        await self.redis_client.set_validation_report(checksum, {'valid': True, 'report': validator.report})
+
+        now = datetime.now(timezone.utc).isoformat()
+        file_info = FileInfo(
+            csv_file=file_name,
+            file_id=file_id,
+            checksum=checksum,
+            size_bytes=size_bytes,
+            uploaded_at=old_info.uploaded_at if old_info else now,
+            replaced_at=now if old_info else None,
+            s3_key=s3_key,
+            s3_url=self._generate_presigned_url(s3_key)
+        )
+
+        # Store metadata and release the file (status none) in one transaction
+        await self.redis_client.set_file_metadata(file_id, file_info.model_dump(), status="none")
+
+        if old_info is not None:
+            await asyncio.to_thread(
+                self._delete_objects, [key for key in self._object_keys(old_info) if key != s3_key]
+            )
+
+        logger.info(f"Completed upload session '{session_id}' for '{file_name}' (size: {size_bytes} bytes)")
+
+        return file_info, validator.report
+
+    async def _discard_session(self, session: Dict[str, Any]) -> None:
+        """Discard whatever a direct upload session has stored in MinIO"""
+        if session['upload_id'] is not None:
+            await asyncio.to_thread(self._abort_multipart, session['s3_key'], session['upload_id'])
+        # A single PUT (or a committed multipart upload) leaves an object behind
+        await asyncio.to_thread(self._delete_object, session['s3_key'])
+
+    async def abort_upload_session(self, session_id: str) -> bool:
+        """
+        Cancel a direct upload session and discard uploaded content.
+
+        Returns:
+            True if the session existed
+        """
+        session = await self.redis_client.pop_upload_session(session_id)
+        if session is None:
+            return False
+        await self._discard_session(session)
+        logger.info(f"Aborted upload session '{session_id}' for '{session['csv_file']}'")
+        return True
+
     async def delete_file(self, file_name: str) -> bool:
         """
         Delete a CSV file from MinIO/S3 and remove metadata.
@@ -676,96 +1206,84 @@ class S3CsvRepo(CsvRepo):
         Raises:
             ValueError: If file doesn't exist
         """
-        # Check if file exists in Redis (search by filename)
-        metadata = self.redis_client.get_file_metadata_by_filename(file_name)
+        # Check if file exists in Redis (filename index lookup)
+        metadata = await self.redis_client.get_file_metadata_by_filename(file_name)
         if not metadata:
             raise ValueError(f"File '{file_name}' not found")
         
+        return await self._delete_file_info(FileInfo(**metadata))
+    
+    async def _delete_file_info(self, file_info: FileInfo) -> bool:
+        """Delete the S3 object, metadata and status of a file"""
         try:
-            file_info = FileInfo(**metadata)
-            
-            # Delete from S3
-            if file_info.s3_key:
-                self.s3_client.delete_object(
-                    Bucket=self.bucket_name,
-                    Key=file_info.s3_key
-                )
-                logger.info(f"Deleted S3 object: {file_info.s3_key}")
+            # Delete from S3 (base object and appended segments) in a worker
+            # thread, like every other blocking S3 call
+            await asyncio.to_thread(self._delete_objects, self._object_keys(file_info))
             
             # Remove metadata and status from Redis by file_id
-            self.redis_client.delete_file_metadata(file_info.file_id)
-            self.redis_client.delete_status(file_info.file_id)
+            await self.redis_client.delete_file_metadata(file_info.file_id)
             
-            logger.info(f"Deleted file '{file_name}' completely")
+            logger.info(f"Deleted file '{file_info.csv_file}' (id: {file_info.file_id}) completely")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to delete file '{file_name}': {e}")
+            logger.error(f"Failed to delete file '{file_info.csv_file}' (id: {file_info.file_id}): {e}")
             raise
     
     async def get_file_info(self, file_name: str) -> Optional[FileInfo]:
-        """Get file metadata by filename (searches all files)"""
-        metadata = self.redis_client.get_file_metadata_by_filename(file_name)
+        """Get file metadata by filename (filename index lookup)"""
+        metadata = await self.redis_client.get_file_metadata_by_filename(file_name)
         return FileInfo(**metadata) if metadata else None
     
     async def get_file_info_by_id(self, file_id: str) -> Optional[FileInfo]:
         """Get file metadata by file_id"""
-        metadata = self.redis_client.get_file_metadata_by_id(file_id)
+        metadata = await self.redis_client.get_file_metadata_by_id(file_id)
         return FileInfo(**metadata) if metadata else None
     
+    async def get_file_with_status_by_id(self, file_id: str) -> Optional[Tuple[FileInfo, Status]]:
+        """Get file metadata and current status by file_id in one read"""
+        record = await self.redis_client.get_file_record(file_id)
+        if record is None:
+            return None
+        metadata, status = record
+        return FileInfo(**metadata), status
+    
     async def delete_file_by_id(self, file_id: str) -> bool:
         """Delete a CSV file by file_id"""
-        metadata = self.redis_client.get_file_metadata_by_id(file_id)
-        if metadata:
-            file_info = FileInfo(**metadata)
-            return await self.delete_file(file_info.csv_file)
-        raise ValueError(f"File with id '{file_id}' not found")
-    
-    async def prepare_replace_by_id(self, file_id: str) -> tuple[FileInfo, str]:
-        """Prepare replace by file_id for async processing"""
-        metadata = self.redis_client.get_file_metadata_by_id(file_id)
-        if metadata:
-            file_info = FileInfo(**metadata)
-            return await self.prepare_replace(file_info.csv_file)
-        raise ValueError(f"File with id '{file_id}' not found")
-    
-    async def replace_file_by_id(self, file_id: str, file_content: BinaryIO) -> FileInfo:
-        """Replace a CSV file by file_id (synchronous for backward compatibility)"""
-        metadata = self.redis_client.get_file_metadata_by_id(file_id)
+        metadata = await self.redis_client.get_file_metadata_by_id(file_id)
         if metadata:
-            file_info = FileInfo(**metadata)
-            return await self.replace_file(file_info.csv_file, file_content)
+            return await self._delete_file_info(FileInfo(**metadata))
         raise ValueError(f"File with id '{file_id}' not found")
     
     async def set_status(self, file_name: str, status: Status) -> bool:
         """Set processing status for a file by filename"""
-        metadata = self.redis_client.get_file_metadata_by_filename(file_name)
+        metadata = await self.redis_client.get_file_metadata_by_filename(file_name)
         if metadata:
             file_info = FileInfo(**metadata)
-            self.redis_client.set_status(file_info.file_id, status)
+            await self.redis_client.set_status(file_info.file_id, status)
             logger.debug(f"Set status for '{file_name}' (id: {file_info.file_id}) to '{status}'")
             return True
         return False
     
     async def set_status_by_id(self, file_id: str, status: Status) -> bool:
         """Set processing status for a file by file_id"""
-        if self.redis_client.get_file_metadata_by_id(file_id):
-            self.redis_client.set_status(file_id, status)
+        # Existence check and update happen atomically in Redis
+        if await self.redis_client.set_status(file_id, status):
             logger.debug(f"Set status for file_id '{file_id}' to '{status}'")
             return True
         return False
     
     async def get_status(self, file_name: str) -> Optional[Status]:
         """Get current processing status by filename"""
-        metadata = self.redis_client.get_file_metadata_by_filename(file_name)
+        metadata = await self.redis_client.get_file_metadata_by_filename(file_name)
         if metadata:
             file_info = FileInfo(**metadata)
-            return self.redis_client.get_status(file_info.file_id)
+            return await self.redis_client.get_status(file_info.file_id)
         return None
     
     async def get_status_by_id(self, file_id: str) -> Optional[Status]:
         """Get current processing status by file_id"""
-        return self.redis_client.get_status(file_id)
+        return await self.redis_client.get_status(file_id)
 
 
 # Singleton instance
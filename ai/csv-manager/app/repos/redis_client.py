@@ -1,15 +1,101 @@
 """
 Redis client for managing CSV file metadata and status
+
+Each file is stored as one hash, csv:file:{file_id}, holding the FileInfo
+fields together with its processing status, so a single HGETALL returns
+both and partial updates touch only the fields that change.
 """
 import json
 import logging
-from typing import Optional, Dict, Any
-import redis
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set, Tuple, Iterable
+from redis.asyncio.client import Pipeline
 from redis.exceptions import RedisError
 from app.core.config import settings
+from app.core.redis import get_redis, set_json
+from app.services.status_events import status_channel, DELETED_EVENT
 
 logger = logging.getLogger(__name__)
 
+FILE_KEY_PREFIX = "csv:file:"
+ALL_FILE_IDS_KEY = "csv:all_file_ids"
+UPLOAD_INDEX_KEY = "csv:index:uploaded_at"
+SCHEMA_VERSION_KEY = "csv:schema_version"
+UPLOAD_SESSION_KEY_PREFIX = "csv:upload_session:"
+# Objects replaced by a compaction -> time (epoch seconds) they may be deleted
+SUPERSEDED_OBJECTS_KEY = "csv:superseded_objects"
+
+# Layout version written once legacy keys have been migrated to hashes
+SCHEMA_VERSION = 2
+
+# Hash fields stored as integers
+INT_FIELDS = ("size_bytes",)
+
+# Hash fields stored as JSON (segment manifest of appended rows)
+JSON_FIELDS = ("segments",)
+
+# Set status (and optional extra fields) only if the file exists and its
+# current status is one of the allowed ones, publishing the new status on
+# the file's event channel when it changes.
+# KEYS[1] file hash; ARGV[1] new status; ARGV[2] allowed current statuses
+# joined by ',' ('' allows any); ARGV[3] event channel; ARGV[4..] extra
+# field/value pairs.
+# Returns {1, previous} when applied, {-1, current} when the current status
+# is not allowed and {0, ''} when the file does not exist.
+TRANSITION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0, ''}
+end
+local current = redis.call('HGET', KEYS[1], 'status') or 'none'
+if ARGV[2] ~= '' then
+    local allowed = false
+    for s in string.gmatch(ARGV[2], '[^,]+') do
+        if s == current then
+            allowed = true
+        end
+    end
+    if not allowed then
+        return {-1, current}
+    end
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[1], unpack(ARGV, 4))
+if current ~= ARGV[1] then
+    redis.call('PUBLISH', ARGV[3], ARGV[1])
+end
+return {1, current}
+"""
+
+
+def file_key(file_id: str) -> str:
+    """Key of the hash holding a file's metadata and status"""
+    return f"{FILE_KEY_PREFIX}{file_id}"
+
+
+def encode_file_fields(metadata: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
+    """Split metadata into hash fields to set and None-valued fields to delete"""
+    mapping = {}
+    removed = []
+    for field, value in metadata.items():
+        if value is None:
+            removed.append(field)
+        elif field in JSON_FIELDS:
+            mapping[field] = json.dumps(value)
+        else:
+            mapping[field] = str(value)
+    return mapping, removed
+
+
+def decode_file_fields(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Convert a file hash back to metadata (without status)"""
+    metadata: Dict[str, Any] = {k: v for k, v in raw.items() if k != "status"}
+    for field in INT_FIELDS:
+        if field in metadata:
+            metadata[field] = int(metadata[field])
+    for field in JSON_FIELDS:
+        if field in metadata:
+            metadata[field] = json.loads(metadata[field])
+    return metadata
+
 
 class RedisClient:
     """
@@ -17,138 +103,571 @@ class RedisClient:
     """
     
     def __init__(self):
-        """Initialize Redis connection"""
-        self.redis_client = self._create_redis_client()
-        self._test_connection()
+        """Bind to the shared pooled async Redis client"""
+        self.redis_client = get_redis()
+        self._transition = self.redis_client.register_script(TRANSITION_SCRIPT)
     
-    def _create_redis_client(self) -> redis.Redis:
-        """Create and configure Redis client"""
-        try:
-            client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=settings.REDIS_DB,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True,
-                health_check_interval=30
-            )
-            logger.info(f"Redis client created for {settings.REDIS_HOST}:{settings.REDIS_PORT}")
-            return client
-        except Exception as e:
-            logger.error(f"Failed to create Redis client: {e}")
-            raise
-    
-    def _test_connection(self):
+    async def ping(self) -> bool:
         """Test Redis connection"""
         try:
-            self.redis_client.ping()
-            logger.info("Redis connection successful")
+            await self.redis_client.ping()
+            return True
         except RedisError as e:
             logger.error(f"Redis connection failed: {e}")
-            raise
+            return False
     
     # Metadata operations
-    def set_file_metadata(self, file_id: str, metadata: Dict[str, Any]) -> bool:
-        """Store file metadata by file_id (primary key)"""
+    @staticmethod
+    def _filename_index_key(file_name: str) -> str:
+        """Key of the filename -> file_id index (sorted set scored by upload time)"""
+        return f"csv:index:filename:{file_name}"
+    
+    @staticmethod
+    def _filename_index_score(metadata: Dict[str, Any]) -> float:
+        """Index score for a file: original upload time as epoch seconds (both indexes)"""
         try:
-            # Store by file_id as primary key
-            id_key = f"csv:metadata:id:{file_id}"
-            self.redis_client.set(id_key, json.dumps(metadata))
-
+            return datetime.fromisoformat(metadata['uploaded_at']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+    
+    async def set_file_metadata(
+        self,
+        file_id: str,
+        metadata: Dict[str, Any],
+        status: Optional[str] = None
+    ) -> bool:
+        """
+        Store file metadata (and optionally status) and update indexes atomically.
+        
+        Only the given fields are written; fields set to None are removed.
+        A given status is also published on the file's event channel.
+        """
+        key = file_key(file_id)
+        mapping, removed = encode_file_fields(metadata)
+        if status is not None:
+            mapping["status"] = status
+        
+        async def _write(pipe: Pipeline):
+            old_name = await pipe.hget(key, "csv_file")
+            
+            pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            if removed:
+                pipe.hdel(key, *removed)
             # Also maintain a list of all file IDs
-            self.redis_client.sadd("csv:all_file_ids", file_id)
+            pipe.sadd(ALL_FILE_IDS_KEY, file_id)
+            # Keep filename index in sync (a file may change name on update)
+            if old_name and old_name != metadata['csv_file']:
+                pipe.zrem(self._filename_index_key(old_name), file_id)
+            score = self._filename_index_score(metadata)
+            pipe.zadd(self._filename_index_key(metadata['csv_file']), {file_id: score})
+            pipe.zadd(UPLOAD_INDEX_KEY, {file_id: score})
+            if status is not None:
+                pipe.publish(status_channel(file_id), status)
+        
+        try:
+            await self.redis_client.transaction(_write, key)
             return True
         except RedisError as e:
             logger.error(f"Failed to set metadata for file_id {file_id}: {e}")
             return False
     
-    def get_file_metadata_by_filename(self, file_name: str) -> Optional[Dict[str, Any]]:
-        """Get file metadata by filename (searches all files)"""
+    async def get_file_metadata_by_filename(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """Get file metadata by filename (most recently uploaded file with that name)"""
         try:
-            # Search through all file IDs to find matching filename
-            for file_id in self.redis_client.smembers("csv:all_file_ids"):
-                metadata = self.get_file_metadata_by_id(file_id)
+            for file_id in await self.redis_client.zrevrange(self._filename_index_key(file_name), 0, -1):
+                metadata = await self.get_file_metadata_by_id(file_id)
                 if metadata and metadata.get('csv_file') == file_name:
                     return metadata
+                logger.warning(f"Stale filename index entry '{file_name}' -> {file_id}")
             return None
-        except (RedisError, json.JSONDecodeError) as e:
+        except RedisError as e:
             logger.error(f"Failed to get metadata for {file_name}: {e}")
             return None
     
-    def get_file_metadata_by_id(self, file_id: str) -> Optional[Dict[str, Any]]:
+    async def get_file_metadata_by_id(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Get file metadata by file_id"""
+        record = await self.get_file_record(file_id)
+        if record is None:
+            return None
+        return record[0]
+    
+    async def get_file_record(self, file_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Get file metadata and status with a single HGETALL"""
         try:
-            key = f"csv:metadata:id:{file_id}"
-            data = self.redis_client.get(key)
-            return json.loads(data) if data else None
-        except (RedisError, json.JSONDecodeError) as e:
+            raw = await self.redis_client.hgetall(file_key(file_id))
+            if not raw:
+                return None
+            return decode_file_fields(raw), raw.get("status") or "none"
+        except (RedisError, ValueError) as e:
             logger.error(f"Failed to get metadata for id {file_id}: {e}")
             return None
     
-    def delete_file_metadata(self, file_id: str) -> bool:
-        """Delete file metadata by file_id"""
+    async def delete_file_metadata(self, file_id: str) -> bool:
+        """Delete a file's hash (metadata and status) together with its index entries"""
+        key = file_key(file_id)
+        
+        async def _delete(pipe: Pipeline):
+            file_name = await pipe.hget(key, "csv_file")
+            
+            pipe.multi()
+            pipe.delete(key)
+            pipe.srem(ALL_FILE_IDS_KEY, file_id)
+            pipe.zrem(UPLOAD_INDEX_KEY, file_id)
+            if file_name:
+                pipe.zrem(self._filename_index_key(file_name), file_id)
+            pipe.publish(status_channel(file_id), DELETED_EVENT)
+        
         try:
-            id_key = f"csv:metadata:id:{file_id}"
-            self.redis_client.delete(id_key)
-            self.redis_client.srem("csv:all_file_ids", file_id)
+            await self.redis_client.transaction(_delete, key)
             return True
         except RedisError as e:
             logger.error(f"Failed to delete metadata for file_id {file_id}: {e}")
             return False
     
-    def list_all_files(self) -> Dict[str, Dict[str, Any]]:
-        """List all files with metadata"""
+    # Segment manifest
+    async def append_segment(
+        self,
+        file_id: str,
+        base_key: str,
+        segment: Dict[str, Any]
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Add a segment to a file's manifest.
+        
+        The manifest, size and base key are read and written under WATCH, so
+        concurrent appends and compactions never lose a segment. Appends are
+        refused while the file is being replaced (status 'uploading') or when
+        the base object changed since the segment was written.
+        
+        Returns:
+            Tuple of (outcome, updated metadata): outcome is 'applied',
+            'missing', 'busy' (current status in metadata['status']) or
+            'conflict' (the base object was replaced)
+        """
+        key = file_key(file_id)
+        outcome = "missing"
+        updated: Optional[Dict[str, Any]] = None
+        
+        async def _append(pipe: Pipeline):
+            nonlocal outcome, updated
+            raw = await pipe.hgetall(key)
+            if not raw:
+                outcome, updated = "missing", None
+                return
+            metadata = decode_file_fields(raw)
+            status = raw.get("status") or "none"
+            if status == "uploading":
+                outcome, updated = "busy", {"status": status}
+                return
+            if metadata.get("s3_key") != base_key:
+                outcome, updated = "conflict", None
+                return
+            
+            metadata["segments"] = metadata.get("segments", []) + [segment]
+            metadata["size_bytes"] = metadata.get("size_bytes", 0) + segment["size_bytes"]
+            mapping, _ = encode_file_fields({
+                "segments": metadata["segments"],
+                "size_bytes": metadata["size_bytes"]
+            })
+            pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            outcome, updated = "applied", metadata
+        
+        await self.redis_client.transaction(_append, key)
+        return outcome, updated
+    
+    async def commit_compaction(
+        self,
+        file_id: str,
+        base_key: str,
+        merged_keys: List[str],
+        fields: Dict[str, Any],
+        delete_after: float
+    ) -> bool:
+        """
+        Swap a compacted object in for the base object and merged segments.
+        
+        Applied only if the file is not being replaced, the base key is
+        unchanged and the manifest still starts with the merged segments;
+        segments appended meanwhile stay in the manifest and their size is
+        added to fields['size_bytes']. In the same transaction the replaced
+        objects are queued for deletion at `delete_after` (epoch seconds),
+        since readers of the old manifest may still be reading them.
+        
+        Returns:
+            True if the manifest was updated
+        """
+        key = file_key(file_id)
+        committed = False
+        
+        async def _commit(pipe: Pipeline):
+            nonlocal committed
+            raw = await pipe.hgetall(key)
+            metadata = decode_file_fields(raw) if raw else {}
+            segments = metadata.get("segments", [])
+            if (
+                raw.get("status") == "uploading"
+                or metadata.get("s3_key") != base_key
+                or [seg["key"] for seg in segments[:len(merged_keys)]] != merged_keys
+            ):
+                committed = False
+                return
+            
+            remaining = segments[len(merged_keys):]
+            update = dict(fields)
+            update["segments"] = remaining
+            update["size_bytes"] = fields["size_bytes"] + sum(seg["size_bytes"] for seg in remaining)
+            mapping, removed = encode_file_fields(update)
+            pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            if removed:
+                pipe.hdel(key, *removed)
+            pipe.zadd(SUPERSEDED_OBJECTS_KEY, {s3_key: delete_after for s3_key in [base_key] + merged_keys})
+            committed = True
+        
+        await self.redis_client.transaction(_commit, key)
+        return committed
+    
+    async def get_due_superseded_objects(self, now: float, limit: int = 500) -> List[str]:
+        """Superseded object keys whose deletion time has passed"""
+        return await self.redis_client.zrangebyscore(SUPERSEDED_OBJECTS_KEY, "-inf", now, start=0, num=limit)
+    
+    async def remove_superseded_objects(self, s3_keys: List[str]) -> None:
+        """Drop deleted objects from the superseded queue"""
+        if s3_keys:
+            await self.redis_client.zrem(SUPERSEDED_OBJECTS_KEY, *s3_keys)
+    
+    async def rebuild_indexes(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Rebuild the filename and upload-time indexes from stored metadata.
+        
+        Used to backfill deployments that predate the indexes or to repair
+        them. Entries are merged into the live indexes (missing ones added,
+        stale ones removed) instead of replacing the keys, and each batch is
+        read and written under a WATCH on its file hashes, so lookups and
+        listings keep working and files uploaded, renamed or deleted during
+        the rebuild are neither dropped nor brought back.
+        
+        Returns:
+            Counts of indexed files, filenames and stale index entries removed
+        """
+        names: Set[str] = set()
+        files = 0
+        
+        # Add every file to both indexes, one batch of hashes at a time
+        batch = []
+        async for file_id in self.redis_client.sscan_iter(ALL_FILE_IDS_KEY, count=batch_size):
+            batch.append(file_id)
+            if len(batch) >= batch_size:
+                files += await self._index_batch(batch, names)
+                batch = []
+        if batch:
+            files += await self._index_batch(batch, names)
+        
+        # Remove entries of deleted or renamed files
+        stale = await self._remove_stale_entries(UPLOAD_INDEX_KEY, None, batch_size)
+        async for key in self.redis_client.scan_iter(match="csv:index:filename:*", count=batch_size):
+            stale += await self._remove_stale_entries(key, key[len("csv:index:filename:"):], batch_size)
+        
+        logger.info(f"Rebuilt indexes: {files} files, {len(names)} names, {stale} stale entries removed")
+        return {"files": files, "filenames": len(names), "stale_removed": stale}
+    
+    async def _read_index_fields(self, file_ids: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """csv_file and uploaded_at of several files in one round trip (None for missing files)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for file_id in file_ids:
+            pipe.hmget(file_key(file_id), "csv_file", "uploaded_at")
+        return [tuple(fields) for fields in await pipe.execute()]
+    
+    async def _index_batch(self, file_ids: List[str], names: Set[str]) -> int:
+        """Add a batch of files to the filename and upload-time indexes"""
+        count = 0
+        
+        async def _index(pipe: Pipeline):
+            nonlocal count
+            # Read after the WATCH, so a change to any of the files aborts the write
+            fields = await self._read_index_fields(file_ids)
+            pipe.multi()
+            count = 0
+            for file_id, (file_name, uploaded_at) in zip(file_ids, fields):
+                if not file_name:
+                    continue
+                score = self._filename_index_score({"uploaded_at": uploaded_at})
+                pipe.zadd(self._filename_index_key(file_name), {file_id: score})
+                pipe.zadd(UPLOAD_INDEX_KEY, {file_id: score})
+                names.add(file_name)
+                count += 1
+        
+        await self.redis_client.transaction(_index, *[file_key(file_id) for file_id in file_ids])
+        return count
+    
+    async def _remove_stale_entries(self, index_key: str, file_name: Optional[str], batch_size: int) -> int:
+        """
+        Remove index members whose file no longer exists (or, for a filename
+        index, is now stored under another name).
+        """
+        removed = 0
+        batch = []
+        async for file_id, _ in self.redis_client.zscan_iter(index_key, count=batch_size):
+            batch.append(file_id)
+            if len(batch) >= batch_size:
+                removed += await self._remove_stale_batch(index_key, file_name, batch)
+                batch = []
+        if batch:
+            removed += await self._remove_stale_batch(index_key, file_name, batch)
+        return removed
+    
+    async def _remove_stale_batch(self, index_key: str, file_name: Optional[str], file_ids: List[str]) -> int:
+        stale: List[str] = []
+        
+        async def _remove(pipe: Pipeline):
+            nonlocal stale
+            fields = await self._read_index_fields(file_ids)
+            stale = [
+                file_id for file_id, (current_name, _) in zip(file_ids, fields)
+                if not current_name or (file_name is not None and current_name != file_name)
+            ]
+            pipe.multi()
+            if stale:
+                pipe.zrem(index_key, *stale)
+        
+        await self.redis_client.transaction(_remove, *[file_key(file_id) for file_id in file_ids])
+        return len(stale)
+    
+    async def migrate_legacy_layout(self, batch_size: int = 500, force: bool = False) -> Dict[str, Any]:
+        """
+        Move files stored as csv:metadata:id:{id} JSON plus csv:status:{id}
+        into csv:file:{id} hashes, adding them to the filename and
+        upload-time indexes.
+        
+        Idempotent: each file is converted in its own transaction and the
+        legacy keys are removed with it. Once every file has been visited,
+        csv:schema_version is set so later startups skip the scan.
+        
+        Args:
+            batch_size: SSCAN batch size
+            force: Scan even if the schema version marker is already set
+        
+        Returns:
+            Counts of migrated files, or skipped=True if already migrated
+        """
+        version = await self.redis_client.get(SCHEMA_VERSION_KEY)
+        if not force and version and int(version) >= SCHEMA_VERSION:
+            return {"migrated": 0, "skipped": True}
+        
+        migrated = 0
+        async for file_id in self.redis_client.sscan_iter(ALL_FILE_IDS_KEY, count=batch_size):
+            if await self._migrate_file(file_id):
+                migrated += 1
+        
+        await self.redis_client.set(SCHEMA_VERSION_KEY, SCHEMA_VERSION)
+        logger.info(f"Migrated {migrated} files to per-file hashes (schema v{SCHEMA_VERSION})")
+        return {"migrated": migrated, "skipped": False}
+    
+    async def _migrate_file(self, file_id: str) -> bool:
+        """Convert one file's legacy keys into its hash"""
+        legacy_metadata_key = f"csv:metadata:id:{file_id}"
+        legacy_status_key = f"csv:status:{file_id}"
+        migrated = False
+        
+        async def _convert(pipe: Pipeline):
+            nonlocal migrated
+            data = await pipe.get(legacy_metadata_key)
+            legacy_status = await pipe.get(legacy_status_key)
+            if not data:
+                migrated = False
+                return
+            
+            metadata = json.loads(data)
+            mapping, _ = encode_file_fields(metadata)
+            mapping["status"] = legacy_status or "none"
+            score = self._filename_index_score(metadata)
+            pipe.multi()
+            pipe.hset(file_key(file_id), mapping=mapping)
+            # Legacy files predate the indexes; list and name lookups need them
+            if metadata.get("csv_file"):
+                pipe.zadd(self._filename_index_key(metadata["csv_file"]), {file_id: score})
+            pipe.zadd(UPLOAD_INDEX_KEY, {file_id: score})
+            pipe.delete(legacy_metadata_key, legacy_status_key)
+            migrated = True
+        
         try:
-            files = {}
-            for file_id in self.redis_client.smembers("csv:all_file_ids"):
-                metadata = self.get_file_metadata_by_id(file_id)
-                if metadata:
-                    files[file_id] = metadata
-            return files
+            await self.redis_client.transaction(_convert, legacy_metadata_key, legacy_status_key)
+            return migrated
         except (RedisError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to migrate file_id {file_id}: {e}")
+            return False
+    
+    async def list_files_page(
+        self,
+        cursor: Optional[str] = None,
+        count: int = 100,
+        uploaded_after: Optional[float] = None,
+        uploaded_before: Optional[float] = None
+    ) -> Tuple[List[Tuple[str, Dict[str, Any], str]], Optional[str], int]:
+        """
+        List one page of files, newest upload first.
+        
+        Pages are read from the upload-time index with a keyset cursor (the
+        upload score of the last returned file), so concurrent uploads do not
+        shift pages. Metadata and status for the page are fetched in a single
+        pipelined round trip.
+        
+        Args:
+            cursor: Opaque cursor from the previous page (None for the first page)
+            count: Page size
+            uploaded_after: Only files uploaded at or after this epoch time
+            uploaded_before: Only files uploaded at or before this epoch time
+        
+        Returns:
+            Tuple of ([(file_id, metadata, status)], next_cursor, total in date range)
+        """
+        min_score = "-inf" if uploaded_after is None else uploaded_after
+        range_max = "+inf" if uploaded_before is None else uploaded_before
+        max_score = range_max
+        if cursor is not None:
+            cursor_score = float(cursor)
+            if uploaded_before is None or cursor_score <= uploaded_before:
+                max_score = f"({cursor_score!r}"
+        
+        try:
+            entries = await self.redis_client.zrevrangebyscore(
+                UPLOAD_INDEX_KEY, max_score, min_score,
+                start=0, num=count, withscores=True
+            )
+            next_cursor = None
+            if len(entries) == count:
+                # Include every file sharing the last score so the exclusive
+                # cursor never skips ties
+                last_score = entries[-1][1]
+                seen = {file_id for file_id, _ in entries}
+                for file_id in await self.redis_client.zrevrangebyscore(
+                    UPLOAD_INDEX_KEY, last_score, last_score
+                ):
+                    if file_id not in seen:
+                        entries.append((file_id, last_score))
+                next_cursor = repr(last_score)
+            
+            file_ids = [file_id for file_id, _ in entries]
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zcount(UPLOAD_INDEX_KEY, min_score, range_max)
+            for file_id in file_ids:
+                pipe.hgetall(file_key(file_id))
+            results = await pipe.execute()
+            
+            total = results[0]
+            files = []
+            for file_id, raw in zip(file_ids, results[1:]):
+                if not raw:
+                    continue
+                files.append((file_id, decode_file_fields(raw), raw.get("status") or "none"))
+            return files, next_cursor, total
+        except (RedisError, ValueError) as e:
             logger.error(f"Failed to list files: {e}")
-            return {}
+            raise
     
     # Status operations
-    def set_status(self, file_id: str, status: str) -> bool:
-        """Set processing status for a file"""
+    async def transition_status(
+        self,
+        file_id: str,
+        status: str,
+        allowed_from: Optional[Iterable[str]] = None,
+        fields: Optional[Dict[str, Any]] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Atomically set status (and optional extra fields) if the current status allows it.
+        
+        Args:
+            file_id: File ID
+            status: New status
+            allowed_from: Statuses the file must currently be in (None allows any)
+            fields: Extra hash fields written in the same step
+        
+        Returns:
+            Tuple of (applied, previous or current status); status is None
+            if the file does not exist
+        """
+        args: List[str] = [
+            status,
+            ",".join(allowed_from) if allowed_from else "",
+            status_channel(file_id)
+        ]
+        for field, value in (fields or {}).items():
+            args.extend([field, str(value)])
+        
+        result, current = await self._transition(keys=[file_key(file_id)], args=args)
+        if result == 0:
+            return False, None
+        return result == 1, current
+    
+    async def set_status(self, file_id: str, status: str) -> bool:
+        """Set processing status for an existing file"""
         try:
-            key = f"csv:status:{file_id}"
-            self.redis_client.set(key, status)
-            return True
+            applied, _ = await self.transition_status(file_id, status)
+            return applied
         except RedisError as e:
             logger.error(f"Failed to set status for {file_id}: {e}")
             return False
     
-    def get_status(self, file_id: str) -> Optional[str]:
+    async def get_status(self, file_id: str) -> Optional[str]:
         """Get processing status for a file"""
         try:
-            key = f"csv:status:{file_id}"
-            status = self.redis_client.get(key)
+            status = await self.redis_client.hget(file_key(file_id), "status")
             return status if status else "none"
         except RedisError as e:
             logger.error(f"Failed to get status for {file_id}: {e}")
             return None
     
-    def delete_status(self, file_id: str) -> bool:
-        """Delete processing status"""
+    # Validation report cache
+    async def get_validation_report(self, checksum: str) -> Optional[Dict[str, Any]]:
+        """Get cached validation report by content checksum"""
+        try:
+            data = await self.redis_client.get(f"csv:validation:{checksum}")
+            return json.loads(data) if data else None
+        except (RedisError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to get validation report for {checksum}: {e}")
+            return None
+    
+    async def set_validation_report(self, checksum: str, report: Dict[str, Any]) -> bool:
+        """Cache validation report by content checksum"""
         try:
-            key = f"csv:status:{file_id}"
-            self.redis_client.delete(key)
+            await set_json(f"csv:validation:{checksum}", report, ttl=settings.CSV_VALIDATION_CACHE_TTL)
             return True
         except RedisError as e:
-            logger.error(f"Failed to delete status for {file_id}: {e}")
+            logger.error(f"Failed to cache validation report for {checksum}: {e}")
             return False
     
-    def clear_all(self) -> bool:
+    # Direct upload sessions
+    async def set_upload_session(self, session_id: str, session: Dict[str, Any], ttl: int) -> bool:
+        """Store a direct upload session until it is completed, aborted or expires"""
+        try:
+            await set_json(f"{UPLOAD_SESSION_KEY_PREFIX}{session_id}", session, ttl=max(ttl, 1))
+            return True
+        except RedisError as e:
+            logger.error(f"Failed to store upload session {session_id}: {e}")
+            return False
+    
+    async def pop_upload_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically get and remove a direct upload session.
+        
+        Only one caller receives the session, so a session cannot be
+        completed or aborted twice concurrently.
+        """
+        key = f"{UPLOAD_SESSION_KEY_PREFIX}{session_id}"
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.delete(key)
+            data, _ = await pipe.execute()
+        return json.loads(data) if data else None
+    
+    async def clear_all(self) -> bool:
         """Clear all CSV-related data (use with caution!)"""
         try:
             # Delete all CSV-related keys
-            for key in self.redis_client.scan_iter("csv:*"):
-                self.redis_client.delete(key)
+            async for key in self.redis_client.scan_iter("csv:*"):
+                await self.redis_client.delete(key)
             logger.warning("All CSV data cleared from Redis")
             return True
         except RedisError as e:
@@ -165,4 +684,4 @@ def get_redis_client() -> RedisClient:
     global _redis_client
     if _redis_client is None:
         _redis_client = RedisClient()
-    return _redis_client
\ No newline at end of file
+    return _redis_client
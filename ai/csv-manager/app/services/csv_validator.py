@@ -0,0 +1,503 @@
+"""
+Streaming CSV validation for Prophet analysis requirements
+"""
+import asyncio
+import codecs
+import csv
+import hashlib
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, BinaryIO, Callable, Awaitable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Columns every transaction CSV must provide
+REQUIRED_COLUMNS = ['transaction_date_time', 'category', 'merchant_name', 'amount']
+
+# Formats tried after ISO 8601 when parsing transaction timestamps
+DATETIME_FORMATS = [
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%Y.%m.%d %H:%M:%S',
+    '%Y.%m.%d %H:%M',
+    '%Y.%m.%d',
+    '%Y%m%d',
+]
+
+
+class CsvValidationError(ValueError):
+    """Raised when CSV content does not meet upload requirements"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def parse_datetime(value: str) -> Optional[datetime]:
+    """
+    Parse a transaction timestamp.
+
+    Timezone-aware values are converted to naive UTC so that all rows
+    can be compared with each other.
+
+    Args:
+        value: Raw cell value
+
+    Returns:
+        Parsed datetime or None if the value is not a valid timestamp
+    """
+    value = value.strip()
+    if not value:
+        return None
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+
+    if parsed is None:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_amount(value: str) -> Optional[float]:
+    """Parse a transaction amount, returning None for missing or non-numeric values"""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        amount = float(value)
+    except ValueError:
+        return None
+    return amount if math.isfinite(amount) else None
+
+
+class _CategoryStats:
+    """Running per-category aggregates"""
+
+    __slots__ = ('rows', 'days', 'amount')
+
+    def __init__(self):
+        self.rows = 0
+        self.days: set = set()
+        self.amount = 0.0
+
+
+class StreamingCsvValidator:
+    """
+    Incremental CSV validator fed with raw bytes.
+
+    Chunks are decoded and split into records as they arrive, and every
+    record is validated immediately. Only aggregate statistics are kept
+    (per-category row counts, distinct days and amounts), so memory use
+    does not grow with the number of rows.
+
+    Usage:
+        validator = StreamingCsvValidator()
+        for chunk in chunks:
+            validator.feed(chunk)
+        report = validator.close()
+
+    Appended rows are checked with close_rows() instead, which applies the
+    row-level checks only (history requirements apply to the whole file).
+    """
+
+    def __init__(self, on_row: Optional[Callable[[List[str]], None]] = None):
+        self.on_row = on_row
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='strict')
+        self._pending = ''
+        self._record_parts: List[str] = []
+        self._quote_count = 0
+        self._header: Optional[List[str]] = None
+        self._columns: Dict[str, int] = {}
+
+        self.total_rows = 0
+        self.valid_rows = 0
+        self.invalid_amounts = 0
+        self.invalid_dates = 0
+        self.total_amount = 0.0
+        self.min_date: Optional[datetime] = None
+        self.max_date: Optional[datetime] = None
+        self.categories: Dict[str, _CategoryStats] = {}
+        self.report: Optional[Dict[str, Any]] = None
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Validate the next chunk of raw CSV bytes.
+
+        Raises:
+            CsvValidationError: On encoding, header or row format errors
+        """
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise CsvValidationError(
+                "CSV encoding error: File contains invalid characters. Please save your file as UTF-8 encoded CSV."
+            )
+        self._consume(text, final=False)
+
+    @property
+    def header(self) -> Optional[List[str]]:
+        """Parsed header row (None until the header has been read)"""
+        return self._header
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish validation and build the report.
+
+        Returns:
+            Dict with validation results and metadata
+
+        Raises:
+            CsvValidationError: If CSV doesn't meet Prophet requirements
+        """
+        self._finish()
+        self.report = self._build_report()
+        return self.report
+
+    def close_rows(self) -> Dict[str, Any]:
+        """
+        Finish validation of rows appended to an existing file.
+
+        Every row must be valid, but the history requirements (date range,
+        row and category counts) are not applied to the increment.
+
+        Returns:
+            Dict with total_rows, date_range and total_amount
+
+        Raises:
+            CsvValidationError: On format errors, invalid rows or no rows
+        """
+        self._finish()
+        if self._header is None or self.total_rows == 0:
+            raise CsvValidationError("CSV file is empty")
+
+        problems = []
+        if self.invalid_amounts > 0:
+            problems.append(f"{self.invalid_amounts} rows have invalid amount values")
+        if self.invalid_dates > 0:
+            problems.append(f"{self.invalid_dates} rows have invalid date values")
+        if self.valid_rows < self.total_rows and not problems:
+            problems.append(f"{self.total_rows - self.valid_rows} rows have no category")
+        if problems:
+            raise CsvValidationError(f"CSV validation failed. Data Issues: {'; '.join(problems)}")
+
+        return {
+            "total_rows": self.total_rows,
+            "date_range": {
+                "start": self.min_date.isoformat(),
+                "end": self.max_date.isoformat()
+            },
+            "total_amount": self.total_amount
+        }
+
+    def _finish(self) -> None:
+        """Decode and process the remaining input"""
+        try:
+            text = self._decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise CsvValidationError(
+                "CSV encoding error: File contains invalid characters. Please save your file as UTF-8 encoded CSV."
+            )
+        self._consume(text, final=True)
+        if self._record_parts:
+            raise CsvValidationError(
+                "CSV format error: File ends inside a quoted field. Please check for unbalanced quotes."
+            )
+
+    def _consume(self, text: str, final: bool) -> None:
+        """Split decoded text into complete records and process them"""
+        self._pending += text
+        lines = self._pending.split('\n')
+        self._pending = '' if final else lines.pop()
+
+        for line in lines:
+            # A record is complete once its quotes are balanced
+            self._record_parts.append(line)
+            self._quote_count += line.count('"')
+            if self._quote_count % 2:
+                continue
+
+            record = '\n'.join(self._record_parts).rstrip('\r')
+            self._record_parts = []
+            self._quote_count = 0
+            self._process_record(record)
+
+    def _process_record(self, record: str) -> None:
+        """Validate one CSV record and update aggregates"""
+        if not record.strip():
+            return  # Skip blank lines
+
+        try:
+            row = next(csv.reader([record]))
+        except csv.Error as e:
+            raise CsvValidationError(f"CSV parsing error: {str(e)}. Please check your file format and ensure it's a valid CSV.")
+
+        if self._header is None:
+            self._set_header(row)
+            return
+
+        if len(row) > len(self._header):
+            raise CsvValidationError(
+                "CSV format error: File appears to have inconsistent columns or incorrect delimiters. "
+                "Please ensure all rows have the same number of columns separated by commas."
+            )
+
+        self.total_rows += 1
+        if self.on_row is not None:
+            self.on_row(row)
+
+        def cell(column: str) -> str:
+            index = self._columns[column]
+            return row[index] if index < len(row) else ''
+
+        amount = parse_amount(cell('amount'))
+        if amount is None:
+            self.invalid_amounts += 1
+
+        timestamp = parse_datetime(cell('transaction_date_time'))
+        if timestamp is None:
+            self.invalid_dates += 1
+
+        category = cell('category').strip()
+        if amount is None or timestamp is None or not category:
+            return
+
+        # Clean row - update aggregates
+        self.valid_rows += 1
+        self.total_amount += amount
+        if self.min_date is None or timestamp < self.min_date:
+            self.min_date = timestamp
+        if self.max_date is None or timestamp > self.max_date:
+            self.max_date = timestamp
+
+        stats = self.categories.get(category)
+        if stats is None:
+            stats = self.categories[category] = _CategoryStats()
+        stats.rows += 1
+        stats.days.add(timestamp.date())
+        stats.amount += amount
+
+    def _set_header(self, header: List[str]) -> None:
+        """Check required columns and remember their positions"""
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in header]
+
+        if missing_columns:
+            error_msg = f"Missing required columns: {', '.join(missing_columns)}."
+            error_msg += f" Found columns: {', '.join(header)}."
+            error_msg += f" Required columns: {', '.join(REQUIRED_COLUMNS)}."
+
+            # Suggest potential matches
+            suggestions = []
+            for missing in missing_columns:
+                for available in header:
+                    if missing.lower() in available.lower() or available.lower() in missing.lower():
+                        suggestions.append(f"'{available}' might be '{missing}'")
+
+            if suggestions:
+                error_msg += f" Possible matches: {'; '.join(suggestions[:3])}."
+
+            raise CsvValidationError(error_msg)
+
+        self._header = header
+        self._columns = {col: header.index(col) for col in REQUIRED_COLUMNS}
+
+    def _build_report(self) -> Dict[str, Any]:
+        """Apply Prophet requirements to the collected aggregates"""
+        if self._header is None:
+            raise CsvValidationError("CSV file is empty or contains no readable data. Please check your file format.")
+
+        if self.total_rows == 0:
+            raise CsvValidationError("CSV file is empty")
+
+        validation_errors = []
+        if self.invalid_amounts > 0:
+            validation_errors.append(f"{self.invalid_amounts} rows have invalid amount values")
+        if self.invalid_dates > 0:
+            validation_errors.append(f"{self.invalid_dates} rows have invalid date values")
+
+        if self.valid_rows == 0:
+            raise CsvValidationError("No valid rows remaining after data cleaning")
+
+        total_days = (self.max_date - self.min_date).days + 1
+        total_rows = self.valid_rows
+
+        prophet_warnings = []
+        prophet_errors = []
+
+        # Check total data requirement (30 days minimum for baseline analysis)
+        if total_days < 30:
+            prophet_errors.append(f"Insufficient data period: {total_days} days (minimum 30 days required for baseline analysis)")
+
+        # Check if data spans at least 2 months for meaningful predictions
+        if total_days < 60:
+            prophet_warnings.append(f"Limited data period: {total_days} days. Recommend at least 60 days for accurate predictions.")
+
+        # Check total rows
+        if total_rows < 30:
+            prophet_errors.append(f"Insufficient transactions: {total_rows} rows (minimum 30 required)")
+
+        # Check category-wise data
+        categories_with_insufficient_data = []
+        categories_with_warnings = []
+        categories_under_week = []
+        for category, stats in self.categories.items():
+            cat_days = len(stats.days)
+            if stats.rows < 2:
+                categories_with_insufficient_data.append(f"'{category}' (only {stats.rows} transaction)")
+            elif cat_days < 7:
+                categories_with_warnings.append(f"'{category}' ({cat_days} days, {stats.rows} transactions)")
+            if cat_days < 7:
+                categories_under_week.append(f"'{category}' ({cat_days} days)")
+
+        if categories_with_insufficient_data:
+            prophet_errors.append(f"Categories with insufficient data (< 2 transactions): {', '.join(categories_with_insufficient_data[:3])}{'...' if len(categories_with_insufficient_data) > 3 else ''}")
+
+        if categories_with_warnings:
+            prophet_warnings.append(f"Categories with limited data (< 7 days): {', '.join(categories_with_warnings[:3])}{'...' if len(categories_with_warnings) > 3 else ''}")
+
+        # If there are critical errors, raise exception with detailed information
+        if validation_errors or prophet_errors:
+            error_summary = [f"File: {self.total_rows} total rows, {self.valid_rows} valid rows"]
+
+            if validation_errors:
+                error_summary.append(f"Data Issues: {'; '.join(validation_errors)}")
+
+            if prophet_errors:
+                error_summary.append(f"Prophet Requirements: {'; '.join(prophet_errors)}")
+
+            if total_days < 30:
+                error_summary.append(f"Date Range: {total_days} days (need ≥30 for baseline analysis)")
+
+            if total_rows < 30:
+                error_summary.append(f"Transaction Count: {total_rows} rows (recommend ≥30 for reliable predictions)")
+
+            if categories_under_week:
+                error_summary.append(f"Categories with <7 days data: {', '.join(categories_under_week[:5])}{'...' if len(categories_under_week) > 5 else ''}")
+
+            raise CsvValidationError(f"CSV validation failed. {' | '.join(error_summary)}")
+
+        return {
+            "status": "valid",
+            "total_rows": self.total_rows,
+            "valid_rows": self.valid_rows,
+            "date_range_days": total_days,
+            "unique_categories": len(self.categories),
+            "categories": list(self.categories.keys()),
+            "date_range": {
+                "start": self.min_date.isoformat(),
+                "end": self.max_date.isoformat()
+            },
+            "total_amount": self.total_amount,
+            "validation_errors": validation_errors,
+            "prophet_warnings": prophet_warnings,
+            "prophet_errors": prophet_errors,
+            "prophet_ready": len(prophet_errors) == 0 and total_days >= 2 and self.valid_rows >= 2,
+            "baseline_ready": len(prophet_errors) == 0 and total_days >= 30 and self.valid_rows >= 30
+        }
+
+
+def compute_checksum(file_content: BinaryIO, chunk_size: int) -> str:
+    """
+    Compute the SHA-256 checksum of a file-like object in chunks.
+
+    The stream is rewound afterwards so it can be consumed again.
+    """
+    file_content.seek(0)
+    hasher = hashlib.sha256()
+    while True:
+        chunk = file_content.read(chunk_size)
+        if not chunk:
+            break
+        hasher.update(chunk)
+    file_content.seek(0)
+    return hasher.hexdigest()
+
+
+def validate_stream(
+    file_content: BinaryIO,
+    chunk_size: int,
+    validator: Optional[StreamingCsvValidator] = None
+) -> Dict[str, Any]:
+    """
+    Validate a file-like object without storing it.
+
+    Returns:
+        Validation report
+
+    Raises:
+        CsvValidationError: If CSV doesn't meet Prophet requirements
+    """
+    file_content.seek(0)
+    validator = validator or StreamingCsvValidator()
+    while True:
+        chunk = file_content.read(chunk_size)
+        if not chunk:
+            break
+        validator.feed(chunk)
+    file_content.seek(0)
+    return validator.close()
+
+
+async def validate_with_cache(
+    file_content: BinaryIO,
+    redis_client,
+    chunk_size: int,
+    consume: Callable[[Optional[StreamingCsvValidator]], Awaitable[T]]
+) -> Tuple[T, Dict[str, Any]]:
+    """
+    Run a streaming pass over file content with validation, reusing cached reports.
+
+    The content is hashed first (much cheaper than parsing). If a report for
+    that checksum is cached, `consume` is called without a validator and the
+    cached report is returned; cached failures are raised without touching
+    storage. Otherwise `consume` receives a fresh validator and the resulting
+    report (or failure) is cached under the checksum.
+
+    Args:
+        file_content: Seekable binary file-like object
+        redis_client: Redis client holding the validation report cache
+        chunk_size: Read size for the hashing pass
+        consume: Coroutine factory performing the streaming pass
+
+    Returns:
+        Tuple of (result of consume, validation report)
+
+    Raises:
+        CsvValidationError: If the content fails validation
+    """
+    checksum = await asyncio.to_thread(compute_checksum, file_content, chunk_size)
+
+    cached = await redis_client.get_validation_report(checksum)
+    if cached is not None:
+        if not cached.get('valid'):
+            raise CsvValidationError(cached['detail'], cached.get('status_code', 400))
+        logger.info(f"Using cached validation report for checksum {checksum[:12]}")
+        return await consume(None), cached['report']
+
+    validator = StreamingCsvValidator()
+    try:
+        result = await consume(validator)
+    except CsvValidationError as e:
+        await redis_client.set_validation_report(checksum, {
+            'valid': False,
+            'status_code': e.status_code,
+            'detail': e.detail
+        })
+        raise
+
+    await redis_client.set_validation_report(checksum, {'valid': True, 'report': validator.report})
+    return result, validator.report
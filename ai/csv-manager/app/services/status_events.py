@@ -0,0 +1,174 @@
+"""
+CSV status change notifications over Redis pub/sub
+
+Status transitions are published on csv:events:{file_id} by csv-manager and
+analysis in the same Redis step that changes the status. Each process keeps
+a single pattern subscription on its own connection and fans messages out
+to in-process queues, so waiting clients do not hold Redis connections.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.redis import create_subscriber_client
+
+logger = logging.getLogger(__name__)
+
+STATUS_CHANNEL_PREFIX = "csv:events:"
+
+# Published when a file is deleted
+DELETED_EVENT = "deleted"
+
+# Queued to listeners after a (re)subscription: events may have been missed,
+# so the current status has to be read again
+RESYNC_EVENT = "__resync__"
+
+
+def status_channel(file_id: str) -> str:
+    """Pub/sub channel carrying status changes of one file"""
+    return f"{STATUS_CHANNEL_PREFIX}{file_id}"
+
+
+class StatusEventHub:
+    """Single Redis pattern subscription fanned out to per-request queues"""
+
+    def __init__(self, reconnect_delay: float = 1.0, ready_timeout: float = 5.0, poll_interval: float = 1.0):
+        self.reconnect_delay = reconnect_delay
+        self.ready_timeout = ready_timeout
+        self.poll_interval = poll_interval
+        self._queues: Dict[str, Set[asyncio.Queue]] = {}
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the subscriber task if it is not running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the subscriber task"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self._ready.clear()
+
+    @asynccontextmanager
+    async def subscribe(self, file_id: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        Receive status events for a file while the context is open.
+
+        Waits until the pattern subscription is active, so any change made
+        after entering the context is delivered.
+        """
+        self.start()
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._ready.wait(), self.ready_timeout)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.setdefault(file_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            listeners = self._queues.get(file_id)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    del self._queues[file_id]
+
+    def _dispatch(self, file_id: str, event: str):
+        for queue in self._queues.get(file_id, ()):
+            queue.put_nowait(event)
+
+    async def _run(self):
+        while True:
+            # Any connection error ends this subscription, so every
+            # reconnect goes through psubscribe and the resync below
+            # (redis-py would otherwise resubscribe silently inside listen())
+            client = create_subscriber_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{STATUS_CHANNEL_PREFIX}*")
+                self._ready.set()
+                for file_id in list(self._queues):
+                    self._dispatch(file_id, RESYNC_EVENT)
+
+                while True:
+                    message = await pubsub.get_message(timeout=self.poll_interval)
+                    if message is None or message["type"] != "pmessage":
+                        continue
+                    file_id = message["channel"][len(STATUS_CHANNEL_PREFIX):]
+                    self._dispatch(file_id, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Status event subscription lost, reconnecting: {e}")
+                self._ready.clear()
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+                with suppress(Exception):
+                    await client.aclose()
+
+
+status_event_hub = StatusEventHub()
+
+
+async def watch_status(
+    file_id: str,
+    read_status: Callable[[str], Awaitable[Optional[str]]],
+    until: Optional[str],
+    timeout: float,
+    keepalive: float
+) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Follow a file's status until it reaches `until`, the file is deleted or
+    `timeout` expires.
+
+    Subscribes before reading the current status, so no transition between
+    the read and the subscription is missed. `read_status` returns
+    DELETED_EVENT for a file that no longer exists.
+
+    Yields:
+        (event, status) pairs where event is 'status' (current status, then
+        every change), 'keepalive' (no change for `keepalive` seconds),
+        'deleted' or 'timeout' (last known status). The stream ends after
+        'deleted', 'timeout' or a 'status' equal to `until`.
+    """
+    loop = asyncio.get_running_loop()
+    async with status_event_hub.subscribe(file_id) as events:
+        current = await read_status(file_id)
+        if current == DELETED_EVENT:
+            yield "deleted", None
+            return
+        yield "status", current
+        if until is not None and current == until:
+            return
+
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield "timeout", current
+                return
+            try:
+                event = await asyncio.wait_for(events.get(), min(remaining, keepalive))
+            except asyncio.TimeoutError:
+                yield "keepalive", current
+                continue
+
+            if event == RESYNC_EVENT:
+                event = await read_status(file_id)
+            if event == DELETED_EVENT:
+                yield "deleted", None
+                return
+            if event == current:
+                continue
+
+            current = event
+            yield "status", current
+            if until is not None and current == until:
+                return
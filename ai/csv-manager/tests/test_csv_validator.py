@@ -0,0 +1,150 @@
+"""
+Tests of the streaming CSV validator and its report cache
+
+The same file is fed whole and in small chunks (down to single bytes), so
+quoted newlines, multibyte characters, the BOM and CRLF line endings are
+split across chunk boundaries; the reports must not depend on the split.
+
+Run from ai/csv-manager: python -m pytest tests
+"""
+import asyncio
+import io
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app.services.csv_validator import CsvValidationError, StreamingCsvValidator, validate_with_cache
+
+DAYS = 40
+
+
+def build_csv(newline: str = "\r\n", bom: bool = True) -> bytes:
+    """Two categories over DAYS days, with quoted newlines and Korean text"""
+    lines = ["transaction_date_time,category,merchant_name,amount"]
+    start = datetime(2024, 1, 1, 9, 30)
+    for day in range(DAYS):
+        timestamp = (start + timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f'{timestamp},카페,"스타벅스 ""강남""\n2호점",{4500 + day}')
+        lines.append(f"{timestamp},식비,김밥천국,{8000 + day}")
+    data = (newline.join(lines) + newline).encode("utf-8")
+    return b"\xef\xbb\xbf" + data if bom else data
+
+
+def feed(data: bytes, chunk_size: int, merchants: Optional[List[str]] = None) -> Dict[str, Any]:
+    on_row = (lambda row: merchants.append(row[2])) if merchants is not None else None
+    validator = StreamingCsvValidator(on_row=on_row)
+    for offset in range(0, len(data), chunk_size):
+        validator.feed(data[offset:offset + chunk_size])
+    return validator.close()
+
+
+@pytest.mark.parametrize("newline", ["\r\n", "\n"])
+@pytest.mark.parametrize("bom", [True, False])
+def test_report_does_not_depend_on_chunk_boundaries(newline, bom):
+    data = build_csv(newline, bom)
+    whole = feed(data, len(data))
+    for chunk_size in (1, 2, 3, 7, 64):
+        assert feed(data, chunk_size) == whole
+
+    assert whole["total_rows"] == DAYS * 2
+    assert whole["valid_rows"] == DAYS * 2
+    assert whole["date_range_days"] == DAYS
+    assert sorted(whole["categories"]) == ["식비", "카페"]
+
+
+def test_quoted_newlines_stay_in_one_field():
+    merchants: List[str] = []
+    feed(build_csv(), 1, merchants)
+    assert merchants[0] == '스타벅스 "강남"\n2호점'
+    assert merchants[1] == "김밥천국"
+    # CRLF is stripped from record ends, not from inside quoted fields
+    assert not any(merchant.endswith("\r") for merchant in merchants)
+
+
+def test_bom_is_not_part_of_the_header():
+    validator = StreamingCsvValidator()
+    for byte in build_csv():
+        validator.feed(bytes([byte]))
+    validator.close()
+    assert validator.header[0] == "transaction_date_time"
+
+
+def test_multibyte_character_split_at_end_of_file_is_rejected():
+    validator = StreamingCsvValidator()
+    validator.feed(build_csv()[:-1] + "카".encode("utf-8")[:2])
+    with pytest.raises(CsvValidationError, match="encoding"):
+        validator.close()
+
+
+def test_unbalanced_quote_is_rejected():
+    data = build_csv(bom=False) + b'2024-03-01 10:00:00,cafe,"open quote,100\n'
+    with pytest.raises(CsvValidationError, match="quoted field"):
+        feed(data, 5)
+
+
+class ReportCache:
+    """In-memory stand-in for the Redis validation report cache"""
+
+    def __init__(self):
+        self.reports: Dict[str, Dict[str, Any]] = {}
+
+    async def get_validation_report(self, checksum: str) -> Optional[Dict[str, Any]]:
+        return self.reports.get(checksum)
+
+    async def set_validation_report(self, checksum: str, report: Dict[str, Any]) -> None:
+        self.reports[checksum] = report
+
+
+def run_with_cache(data: bytes, cache: ReportCache):
+    """validate_with_cache over `data`; returns (consume result, report, validators passed)"""
+    passed: List[Optional[StreamingCsvValidator]] = []
+
+    async def consume(validator: Optional[StreamingCsvValidator]) -> str:
+        passed.append(validator)
+        if validator is not None:
+            for offset in range(0, len(data), 100):
+                validator.feed(data[offset:offset + 100])
+            validator.close()
+        return "stored"
+
+    result, report = asyncio.run(validate_with_cache(io.BytesIO(data), cache, 100, consume))
+    return result, report, passed
+
+
+def test_cache_miss_validates_and_stores_the_report():
+    cache = ReportCache()
+    result, report, passed = run_with_cache(build_csv(), cache)
+
+    assert result == "stored"
+    assert isinstance(passed[0], StreamingCsvValidator)
+    assert report["total_rows"] == DAYS * 2
+    assert list(cache.reports.values()) == [{"valid": True, "report": report}]
+
+
+def test_cache_hit_skips_validation():
+    cache = ReportCache()
+    _, first, _ = run_with_cache(build_csv(), cache)
+    result, report, passed = run_with_cache(build_csv(), cache)
+
+    assert result == "stored"
+    assert passed == [None]
+    assert report == first
+
+
+def test_cached_failure_is_raised_without_consuming():
+    cache = ReportCache()
+    data = build_csv().replace(b"4500", b"abc", 1)
+    with pytest.raises(CsvValidationError):
+        run_with_cache(data, cache)
+    assert [report["valid"] for report in cache.reports.values()] == [False]
+
+    consumed = []
+
+    async def consume(validator):
+        consumed.append(validator)
+
+    with pytest.raises(CsvValidationError) as raised:
+        asyncio.run(validate_with_cache(io.BytesIO(data), cache, 100, consume))
+    assert consumed == []
+    assert "invalid amount" in raised.value.detail
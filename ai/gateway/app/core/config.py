@@ -2,7 +2,7 @@
 Application configuration and settings
 """
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -76,6 +76,172 @@ class Settings(BaseSettings):
         env="JWT_ALGORITHM"
     )
     
+    # Upstream services (proxied by the gateway); comma-separate several
+    # replicas, e.g. "http://analysis-1:8002,http://analysis-2:8002"
+    CLASSIFIER_SERVICE_URL: str = Field(
+        default="http://classifier:8001",
+        env="CLASSIFIER_SERVICE_URL"
+    )
+    ANALYSIS_SERVICE_URL: str = Field(
+        default="http://analysis:8002",
+        env="ANALYSIS_SERVICE_URL"
+    )
+    CSV_MANAGER_SERVICE_URL: str = Field(
+        default="http://csv-manager:8003",
+        env="CSV_MANAGER_SERVICE_URL"
+    )
+    
+    # Upstream connection pools (one per service, kept open for the app's lifetime)
+    UPSTREAM_MAX_CONNECTIONS: int = Field(
+        default=100,
+        env="UPSTREAM_MAX_CONNECTIONS"
+    )
+    UPSTREAM_MAX_KEEPALIVE: int = Field(
+        default=20,  # Idle connections kept per service
+        env="UPSTREAM_MAX_KEEPALIVE"
+    )
+    UPSTREAM_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,  # seconds an idle connection is kept
+        env="UPSTREAM_KEEPALIVE_EXPIRY"
+    )
+    UPSTREAM_CONNECT_TIMEOUT: float = Field(
+        default=5.0,
+        env="UPSTREAM_CONNECT_TIMEOUT"
+    )
+    UPSTREAM_POOL_TIMEOUT: float = Field(
+        default=10.0,  # seconds to wait for a free pooled connection
+        env="UPSTREAM_POOL_TIMEOUT"
+    )
+    UPSTREAM_TIMEOUT: float = Field(
+        default=120.0,  # Read/write timeout of proxied requests
+        env="UPSTREAM_TIMEOUT"
+    )
+    UPSTREAM_ROUTE_TIMEOUTS: Dict[str, float] = Field(
+        default={
+            "/api/ai/classify/bulk": 300.0,
+            "/api/ai/classify/download": 600.0,
+            "/api/ai/csv/upload": 600.0
+        },  # Read/write timeout by gateway path prefix (longest match wins)
+        env="UPSTREAM_ROUTE_TIMEOUTS"
+    )
+    HEALTH_CHECK_TIMEOUT: float = Field(
+        default=5.0,
+        env="HEALTH_CHECK_TIMEOUT"
+    )
+    HEALTH_PROBE_INTERVAL: float = Field(
+        default=10.0,  # seconds between background health probes of every replica
+        env="HEALTH_PROBE_INTERVAL"
+    )
+    REPLICA_UNHEALTHY_THRESHOLD: int = Field(
+        default=2,  # Failed probes in a row before a replica is ejected
+        env="REPLICA_UNHEALTHY_THRESHOLD"
+    )
+    REPLICA_HEALTHY_THRESHOLD: int = Field(
+        default=2,  # Passing probes in a row before an ejected replica is reinstated
+        env="REPLICA_HEALTHY_THRESHOLD"
+    )
+    OPENAPI_FETCH_TIMEOUT: float = Field(
+        default=30.0,
+        env="OPENAPI_FETCH_TIMEOUT"
+    )
+    OPENAPI_REFRESH_INTERVAL: float = Field(
+        default=300.0,  # seconds between background refreshes of the service specs
+        env="OPENAPI_REFRESH_INTERVAL"
+    )
+    OPENAPI_RETRY_MIN_INTERVAL: float = Field(
+        default=1.0,  # First retry delay while a service spec is missing (doubles up to the max)
+        env="OPENAPI_RETRY_MIN_INTERVAL"
+    )
+    OPENAPI_RETRY_MAX_INTERVAL: float = Field(
+        default=30.0,
+        env="OPENAPI_RETRY_MAX_INTERVAL"
+    )
+    
+    # Upstream load shedding (503 + Retry-After instead of queueing until timeout)
+    UPSTREAM_MAX_IN_FLIGHT: int = Field(
+        default=64,  # Concurrent proxied requests per service
+        env="UPSTREAM_MAX_IN_FLIGHT"
+    )
+    UPSTREAM_SERVICE_MAX_IN_FLIGHT: Dict[str, int] = Field(
+        default={"analysis": 16},  # Per-service overrides of UPSTREAM_MAX_IN_FLIGHT
+        env="UPSTREAM_SERVICE_MAX_IN_FLIGHT"
+    )
+    UPSTREAM_ROUTE_MAX_IN_FLIGHT: Dict[str, int] = Field(
+        default={
+            "POST /api/ai/data": 4,
+            "GET /api/ai/csv/status/stream": 256,
+            "GET /api/ai/csv/status/wait": 256
+        },  # "METHOD /gateway/path/prefix" -> limit (longest match wins)
+        env="UPSTREAM_ROUTE_MAX_IN_FLIGHT"
+    )
+    UPSTREAM_SERVICE_EXEMPT_ROUTES: List[str] = Field(
+        default=[
+            "GET /api/ai/csv/status/stream",
+            "GET /api/ai/csv/status/wait"
+        ],  # Long-lived routes (SSE, long-poll) held to their route limit only, not the service's
+        env="UPSTREAM_SERVICE_EXEMPT_ROUTES"
+    )
+    UPSTREAM_QUEUE_SIZE: int = Field(
+        default=32,  # Requests waiting per limit before new ones are shed
+        env="UPSTREAM_QUEUE_SIZE"
+    )
+    UPSTREAM_QUEUE_TIMEOUT: float = Field(
+        default=10.0,  # seconds a request may wait for a slot
+        env="UPSTREAM_QUEUE_TIMEOUT"
+    )
+    UPSTREAM_RETRY_AFTER: int = Field(
+        default=5,  # Retry-After (seconds) of shed requests
+        env="UPSTREAM_RETRY_AFTER"
+    )
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5,  # Consecutive failures that open a service's circuit
+        env="CIRCUIT_FAILURE_THRESHOLD"
+    )
+    CIRCUIT_RESET_TIMEOUT: float = Field(
+        default=30.0,  # seconds the circuit stays open before a probe request
+        env="CIRCUIT_RESET_TIMEOUT"
+    )
+    CIRCUIT_FAILURE_STATUSES: List[int] = Field(
+        default=[502, 503, 504],  # Upstream statuses counted as failures (besides errors/timeouts)
+        env="CIRCUIT_FAILURE_STATUSES"
+    )
+    
+    # Edge cache for idempotent GET routes (opt-in)
+    EDGE_CACHE_ENABLED: bool = Field(
+        default=False,
+        env="EDGE_CACHE_ENABLED"
+    )
+    EDGE_CACHE_ROUTES: Dict[str, float] = Field(
+        default={
+            "/api/ai/data/leak": 30.0,
+            "/api/ai/data/baseline": 30.0,
+            "/api/ai/data/doojo": 30.0
+        },  # TTL in seconds by gateway path prefix, capped by upstream max-age
+        env="EDGE_CACHE_ROUTES"
+    )
+    EDGE_CACHE_MAX_ENTRIES: int = Field(
+        default=1000,
+        env="EDGE_CACHE_MAX_ENTRIES"
+    )
+    EDGE_CACHE_MAX_BODY_BYTES: int = Field(
+        default=1024 * 1024,  # Larger responses are not stored
+        env="EDGE_CACHE_MAX_BODY_BYTES"
+    )
+    EDGE_CACHE_VARY_HEADERS: List[str] = Field(
+        default=["authorization"],  # Part of the cache key, so callers never share entries
+        env="EDGE_CACHE_VARY_HEADERS"
+    )
+    
+    # Prometheus metrics of proxied requests (GET /api/ai/metrics)
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        env="METRICS_ENABLED"
+    )
+    METRICS_MAX_ROUTES: int = Field(
+        default=100,  # Distinct route labels; further routes are reported as "other"
+        env="METRICS_MAX_ROUTES"
+    )
+    
     # Logging
     LOG_LEVEL: str = Field(
         default="INFO",
@@ -0,0 +1,311 @@
+"""
+Edge cache for idempotent GET routes
+
+Responses of the routes configured in EDGE_CACHE_ROUTES are kept in
+memory for a short TTL, capped by the upstream Cache-Control max-age.
+Expired entries with an ETag are revalidated with If-None-Match. Concurrent
+identical requests share one upstream call (single-flight), so a burst of
+the same request reaches the service once. Hits and misses are counted
+per route.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import ProxyTiming
+from app.core.upstream import CONNECT_ERRORS, forward_headers, route_timeout, upstream_clients
+from app.core.upstream_guard import upstream_guard
+
+logger = logging.getLogger(__name__)
+
+# Upstream headers describing the connection or the caching decision itself,
+# not stored with an entry. httpx decodes the body, so entries hold (and
+# serve) it decoded and without its content-encoding, whatever
+# Accept-Encoding the client sent.
+UNCACHED_HEADERS = ["content-length", "content-encoding", "date", "age", "x-cache"]
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control directives as lowercase name -> value (None if no value)"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+class CacheEntry:
+    """A stored 200 response"""
+
+    def __init__(self, headers: List[Tuple[str, str]], body: bytes, etag: Optional[str], ttl: float):
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def refresh(self, ttl: float) -> None:
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+
+
+class RouteStats:
+    """Cache outcomes of one route"""
+
+    def __init__(self):
+        self.hits = 0  # Served from a fresh entry
+        self.coalesced = 0  # Waited for an identical request already in flight
+        self.revalidated = 0  # Expired entry confirmed by a 304
+        self.misses = 0  # Fetched from upstream
+        self.bypassed = 0  # Client asked for no-cache / no-store
+
+    def to_dict(self) -> Dict[str, Any]:
+        served = self.hits + self.coalesced + self.revalidated
+        total = served + self.misses + self.bypassed
+        return {
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": round(served / total, 4) if total else 0.0
+        }
+
+
+class EdgeCache:
+    """In-process LRU of GET responses with single-flight upstream fetches"""
+
+    def __init__(self, routes: Dict[str, float], max_entries: int, max_body_bytes: int, vary_headers: List[str]):
+        self.routes = routes
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.vary_headers = [name.lower() for name in vary_headers]
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, RouteStats] = {route: RouteStats() for route in routes}
+
+    def route_for(self, path: str) -> Optional[str]:
+        """Configured route (longest prefix) covering a gateway path"""
+        matched = None
+        for route in self.routes:
+            if path.startswith(route) and (matched is None or len(route) > len(matched)):
+                matched = route
+        return matched
+
+    def cache_key(self, request: Request) -> str:
+        """Path, sorted query and a digest of the Vary headers (e.g. the caller's token)"""
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        varied = "\n".join(request.headers.get(name, "") for name in self.vary_headers)
+        digest = hashlib.sha256(varied.encode("utf-8")).hexdigest()[:16]
+        return f"{request.url.path}?{query}#{digest}"
+
+    async def fetch(
+        self,
+        route: str,
+        service: str,
+        path: str,
+        request: Request,
+        headers: List[Tuple[str, str]],
+        timing: ProxyTiming
+    ) -> Response:
+        """
+        Cached response for a GET request, fetching it upstream if needed.
+
+        Hits are served even while the service is saturated or its circuit
+        is open; only upstream fetches go through the upstream guard, and
+        record their queue and upstream time in `timing`.
+
+        Raises:
+            httpx.HTTPError: The upstream call failed (shared with requests
+                coalesced onto it)
+            UpstreamUnavailable: The fetch was shed or the circuit is open
+        """
+        stats = self._stats[route]
+        client_directives = parse_cache_control(request.headers.get("cache-control"))
+        if "no-cache" in client_directives or "no-store" in client_directives:
+            stats.bypassed += 1
+            response, _ = await self._fetch_upstream(route, service, path, request, headers, None, timing)
+            return response
+
+        key = self.cache_key(request)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fresh:
+            stats.hits += 1
+            self._entries.move_to_end(key)
+            timing.headers_received(from_upstream=False)
+            return self._serve(entry, request, "HIT")
+
+        # The upstream call runs as its own task, so requests coalesced onto
+        # it still get the answer if the first caller disconnects
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(self._load(key, route, service, path, request, headers, entry, timing))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        else:
+            stats.coalesced += 1
+
+        response, stored = await asyncio.shield(task)
+        if not leader:
+            timing.headers_received(from_upstream=False)
+        if leader:
+            if response is None:
+                stats.revalidated += 1
+            else:
+                stats.misses += 1
+        if response is None:
+            return self._serve(stored, request, "REVALIDATED" if leader else "HIT")
+        if leader:
+            return response
+        return self._serve(stored, request, "HIT") if stored is not None else self._copy(response)
+
+    async def _load(
+        self,
+        key: str,
+        route: str,
+        service: str,
+        path: str,
+        request: Request,
+        headers: List[Tuple[str, str]],
+        entry: Optional[CacheEntry],
+        timing: ProxyTiming
+    ) -> Tuple[Optional[Response], Optional[CacheEntry]]:
+        try:
+            response, stored = await self._fetch_upstream(route, service, path, request, headers, entry, timing)
+            if stored is not None:
+                self._store(key, stored)
+            return response, stored
+        finally:
+            del self._inflight[key]
+
+    async def _fetch_upstream(
+        self,
+        route: str,
+        service: str,
+        path: str,
+        request: Request,
+        headers: List[Tuple[str, str]],
+        entry: Optional[CacheEntry],
+        timing: ProxyTiming
+    ) -> Tuple[Optional[Response], Optional[CacheEntry]]:
+        """
+        Upstream response and the entry to store, if the response is cacheable.
+
+        A 304 to the revalidation of `entry` returns (None, entry) with the
+        entry's lifetime renewed.
+        """
+        upstream_headers = [(name, value) for name, value in headers if name.lower() != "if-none-match"]
+        if entry is not None and entry.etag:
+            upstream_headers.append(("if-none-match", entry.etag))
+        ticket = await upstream_guard.enter(service, "GET", request.url.path)
+        timing.admitted()
+        replica = None
+        try:
+            replica = upstream_clients.pick(service)
+            timing.sending()
+            upstream = await replica.client.get(
+                f"/{path}",
+                headers=upstream_headers,
+                params=request.query_params,
+                timeout=route_timeout(request.url.path)
+            )
+            timing.headers_received()
+            ticket.finish(upstream.status_code)
+        except httpx.HTTPError as e:
+            if isinstance(e, CONNECT_ERRORS):
+                replica.eject(f"connection failed: {e}")
+            ticket.finish(error=True)
+            raise
+        finally:
+            if replica is not None:
+                replica.release()
+            ticket.release()
+
+        directives = parse_cache_control(upstream.headers.get("cache-control"))
+        ttl = self.routes[route]
+        if "max-age" in directives:
+            try:
+                ttl = min(ttl, float(directives["max-age"]))
+            except (TypeError, ValueError):
+                pass
+        if "no-cache" in directives:
+            ttl = 0.0
+
+        if upstream.status_code == 304 and entry is not None:
+            entry.refresh(ttl)
+            return None, entry
+
+        response_headers = forward_headers(upstream.headers.multi_items(), drop=UNCACHED_HEADERS)
+        response = self._build(response_headers, upstream.content, upstream.status_code, "MISS")
+        storable = (
+            upstream.status_code == 200
+            and "no-store" not in directives
+            and "private" not in directives
+            and "set-cookie" not in upstream.headers
+            and len(upstream.content) <= self.max_body_bytes
+            and (ttl > 0 or upstream.headers.get("etag"))
+        )
+        if not storable:
+            return response, None
+        return response, CacheEntry(response_headers, upstream.content, upstream.headers.get("etag"), ttl)
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _serve(self, entry: CacheEntry, request: Request, outcome: str) -> Response:
+        """Response from an entry (304 if the client already has this ETag)"""
+        if entry.etag and request.headers.get("if-none-match") == entry.etag:
+            response = Response(status_code=304)
+            response.headers["etag"] = entry.etag
+            response.headers["x-cache"] = outcome
+        else:
+            response = self._build(entry.headers, entry.body, 200, outcome)
+        response.headers["age"] = str(int(time.monotonic() - entry.stored_at))
+        return response
+
+    @staticmethod
+    def _build(headers: List[Tuple[str, str]], body: bytes, status_code: int, outcome: str) -> Response:
+        response = Response(content=body, status_code=status_code)
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers + [("content-length", str(len(body))), ("x-cache", outcome)]
+        ]
+        return response
+
+    @staticmethod
+    def _copy(response: Response) -> Response:
+        """Uncacheable response shared with a coalesced request"""
+        copy = Response(content=response.body, status_code=response.status_code)
+        copy.raw_headers = list(response.raw_headers)
+        return copy
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.EDGE_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "routes": {route: stats.to_dict() for route, stats in self._stats.items()}
+        }
+
+
+edge_cache = EdgeCache(
+    routes=settings.EDGE_CACHE_ROUTES,
+    max_entries=settings.EDGE_CACHE_MAX_ENTRIES,
+    max_body_bytes=settings.EDGE_CACHE_MAX_BODY_BYTES,
+    vary_headers=settings.EDGE_CACHE_VARY_HEADERS
+)
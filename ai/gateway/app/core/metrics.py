@@ -0,0 +1,132 @@
+"""
+Prometheus metrics of proxied requests
+
+Every proxied request is counted per route, method, upstream service and
+status class, and its latency is split into:
+    - queue: waiting for a slot of the upstream limits
+    - upstream: from sending the request until the upstream's response
+      headers arrived (the service's own work)
+    - body: streaming the response body to the client
+    - overhead: everything else the gateway spends (routing, header
+      handling, edge cache lookups)
+Routes are the gateway path cut to two segments below the service prefix.
+A new route becomes a label only once it was answered with something other
+than 404 (so scanners probing random paths do not use up the labels), and
+their number is capped at METRICS_MAX_ROUTES; other requests are reported
+as route "other", so label cardinality stays bounded.
+"""
+import time
+from typing import Optional, Set
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+# Service latencies reach minutes (analysis, CSV downloads)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Gateway time is expected in the sub-millisecond to millisecond range
+OVERHEAD_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+LABELS = ["route", "method", "upstream"]
+
+REQUESTS = Counter(
+    "gateway_requests_total",
+    "Proxied requests by route, upstream and status class",
+    LABELS + ["status_class"]
+)
+REQUEST_DURATION = Histogram(
+    "gateway_request_duration_seconds",
+    "Total time of a proxied request, until the response body was sent",
+    LABELS,
+    buckets=LATENCY_BUCKETS
+)
+QUEUE_DURATION = Histogram(
+    "gateway_queue_duration_seconds",
+    "Time waiting for a slot of the upstream concurrency limits",
+    LABELS,
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_DURATION = Histogram(
+    "gateway_upstream_duration_seconds",
+    "Time from sending the request upstream until the response headers arrived",
+    LABELS,
+    buckets=LATENCY_BUCKETS
+)
+BODY_DURATION = Histogram(
+    "gateway_body_duration_seconds",
+    "Time streaming the response body to the client",
+    LABELS,
+    buckets=LATENCY_BUCKETS
+)
+OVERHEAD_DURATION = Histogram(
+    "gateway_overhead_duration_seconds",
+    "Gateway time of a proxied request, excluding queue, upstream and body time",
+    LABELS,
+    buckets=OVERHEAD_BUCKETS
+)
+
+_routes: Set[str] = set()
+
+
+def route_label(path: str, prefix: str) -> str:
+    """Route of a request: the service prefix plus at most two path segments"""
+    rest = path[len(prefix):].strip("/") if path.startswith(prefix) else ""
+    segments = [segment for segment in rest.split("/") if segment][:2]
+    return "/".join([prefix.rstrip("/")] + segments)
+
+
+def bounded_route(route: str, status_code: int) -> str:
+    """Label of a route; new routes are registered unless answered 404, up to METRICS_MAX_ROUTES"""
+    if route not in _routes:
+        if status_code == 404 or len(_routes) >= settings.METRICS_MAX_ROUTES:
+            return "other"
+        _routes.add(route)
+    return route
+
+
+class ProxyTiming:
+    """Phase timestamps of one proxied request, observed once it is done"""
+
+    def __init__(self, route: str, method: str, upstream: str):
+        self.route = route
+        self.method = method
+        self.upstream_name = upstream
+        self.started = time.perf_counter()
+        self.queue = 0.0
+        self.upstream: Optional[float] = None
+        self._sent_at: Optional[float] = None
+        self._headers_at: Optional[float] = None
+        self._observed = False
+
+    def admitted(self) -> None:
+        """The request got its limiter slots"""
+        self.queue = time.perf_counter() - self.started
+
+    def sending(self) -> None:
+        self._sent_at = time.perf_counter()
+
+    def headers_received(self, from_upstream: bool = True) -> None:
+        """Upstream response headers arrived (or the edge cache answered without it)"""
+        self._headers_at = time.perf_counter()
+        if from_upstream and self._sent_at is not None:
+            self.upstream = self._headers_at - self._sent_at
+
+    def observe(self, status_code: int) -> None:
+        """Record the request (once), when the body was sent or it failed"""
+        if self._observed or not settings.METRICS_ENABLED:
+            return
+        self._observed = True
+        now = time.perf_counter()
+        total = now - self.started
+        body = now - self._headers_at if self._headers_at is not None else 0.0
+        upstream = self.upstream or 0.0
+        labels = (bounded_route(self.route, status_code), self.method, self.upstream_name)
+
+        REQUESTS.labels(*labels, f"{status_code // 100}xx").inc()
+        REQUEST_DURATION.labels(*labels).observe(total)
+        QUEUE_DURATION.labels(*labels).observe(self.queue)
+        if self.upstream is not None:
+            UPSTREAM_DURATION.labels(*labels).observe(upstream)
+        if self._headers_at is not None:
+            BODY_DURATION.labels(*labels).observe(body)
+        OVERHEAD_DURATION.labels(*labels).observe(max(total - self.queue - upstream - body, 0.0))
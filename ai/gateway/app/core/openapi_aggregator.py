@@ -0,0 +1,245 @@
+"""
+Background aggregation of the services' OpenAPI specs
+
+The gateway serves one OpenAPI document combining its own routes with the
+specs of the services behind it. A background task fetches the service
+specs concurrently (retrying with backoff until every service answered,
+then every OPENAPI_REFRESH_INTERVAL seconds). A service's spec is turned
+into a prefixed fragment only when its content changed, and the merged
+document is rebuilt from the fragments and versioned, so
+/api/ai/openapi.json is always served from a precomputed document and
+startup never waits for the services.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.upstream import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+# Service paths that are not part of the combined API
+SKIPPED_PATHS = ['/', '/health', '/openapi.json', '/docs', '/redoc']
+
+
+def update_refs_in_dict(obj: Any, service_name: str, schema_mappings: Dict[str, str]) -> Any:
+    """Recursively update $ref references in a dictionary"""
+    if isinstance(obj, dict):
+        new_obj = {}
+        for key, value in obj.items():
+            if key == '$ref' and isinstance(value, str):
+                # Update schema reference
+                if value.startswith('#/components/schemas/'):
+                    schema_name = value.split('/')[-1]
+                    if schema_name in schema_mappings:
+                        new_obj[key] = f"#/components/schemas/{schema_mappings[schema_name]}"
+                    else:
+                        new_obj[key] = value
+                else:
+                    new_obj[key] = value
+            else:
+                new_obj[key] = update_refs_in_dict(value, service_name, schema_mappings)
+        return new_obj
+    elif isinstance(obj, list):
+        return [update_refs_in_dict(item, service_name, schema_mappings) for item in obj]
+    else:
+        return obj
+
+
+def build_service_fragment(service_name: str, service_config: dict, spec: dict) -> dict:
+    """Schemas, security schemes and paths of a service spec, prefixed for the gateway"""
+    prefix = service_config['prefix']
+    fragment = {"schemas": {}, "securitySchemes": {}, "paths": {}}
+    components = spec.get('components', {})
+
+    # Create schema name mappings for this service
+    schema_mappings = {
+        schema_name: f"{service_name}_{schema_name}"
+        for schema_name in components.get('schemas', {})
+    }
+
+    # Merge schemas with updated references
+    for schema_name, schema in components.get('schemas', {}).items():
+        # Update any $ref inside the schema itself
+        fragment["schemas"][schema_mappings[schema_name]] = update_refs_in_dict(schema, service_name, schema_mappings)
+
+    # Security schemes from services (HTTPBearer for JWT)
+    fragment["securitySchemes"] = dict(components.get('securitySchemes', {}))
+
+    for path, path_item in spec.get('paths', {}).items():
+        # Skip root and health endpoints from services
+        if path in SKIPPED_PATHS:
+            continue
+
+        # Adjust the path to include service prefix if not already present
+        if not path.startswith(prefix):
+            if path.startswith('/api/ai/'):
+                # Path already has /api/ai/ prefix, use as is
+                new_path = path
+            elif path.startswith('/ai/'):
+                # Convert /ai/ to /api/ai/
+                new_path = path.replace('/ai/', '/api/ai/', 1)
+            else:
+                # Add the service prefix
+                new_path = f"{prefix}{path}"
+        else:
+            new_path = path
+
+        # Update the entire path_item with new references
+        updated_path_item = update_refs_in_dict(path_item, service_name, schema_mappings)
+
+        # Update operation IDs and tags
+        for method, operation in updated_path_item.items():
+            if isinstance(operation, dict):
+                # Add service tag
+                operation['tags'] = [service_config['name']]
+                # Update operation ID to avoid conflicts
+                if 'operationId' in operation:
+                    operation['operationId'] = f"{service_name}_{operation['operationId']}"
+                # Update summary to include service name
+                if 'summary' in operation:
+                    operation['summary'] = f"[{service_config['name']}] {operation['summary']}"
+                # Security requirements of the original spec are preserved
+
+        fragment["paths"][new_path] = updated_path_item
+
+    return fragment
+
+
+def merge_openapi_specs(gateway_spec: dict, fragments: Dict[str, dict]) -> dict:
+    """Gateway spec with the service fragments added (shallow, no re-walk of the specs)"""
+    merged = copy.deepcopy(gateway_spec)
+
+    # Ensure components and schemas exist
+    components = merged.setdefault('components', {})
+    components.setdefault('schemas', {})
+    components.setdefault('securitySchemes', {})
+    merged.setdefault('paths', {})
+
+    for fragment in fragments.values():
+        components['schemas'].update(fragment["schemas"])
+        for scheme_name, scheme in fragment["securitySchemes"].items():
+            components['securitySchemes'].setdefault(scheme_name, scheme)
+        merged['paths'].update(fragment["paths"])
+
+    # Add tags description - must match exactly with operation tags
+    merged['tags'] = [
+        {"name": "Gateway", "description": "API Gateway endpoints"},
+        {"name": "CSV Management", "description": "CSV file upload and management endpoints"},
+        {"name": "Expense Classifier", "description": "Expense classification endpoints"},
+        {"name": "Data Analysis", "description": "Data analysis endpoints"}
+    ]
+
+    return merged
+
+
+class OpenAPIAggregator:
+    """Keeps the combined OpenAPI document current without blocking requests"""
+
+    def __init__(self):
+        self._services: Dict[str, dict] = {}
+        self._gateway_spec: Callable[[], dict] = dict
+        self._base: Optional[dict] = None
+        self._digests: Dict[str, str] = {}
+        self._fragments: Dict[str, dict] = {}
+        self._document: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self.version = 0
+        self.refreshed_at: Optional[float] = None
+
+    def configure(self, services: Dict[str, dict], gateway_spec: Callable[[], dict]) -> None:
+        """Services to aggregate and the factory of the gateway's own spec"""
+        self._services = services
+        self._gateway_spec = gateway_spec
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def document(self) -> dict:
+        """Current combined document (the gateway routes only until a service answered)"""
+        if self._document is None:
+            self._rebuild()
+        return self._document
+
+    @property
+    def missing(self) -> List[str]:
+        return [name for name in self._services if name not in self._fragments]
+
+    async def refresh(self) -> Dict[str, bool]:
+        """
+        Fetch every service spec concurrently and merge the changed ones.
+
+        Returns:
+            Service name -> whether its spec was fetched; services that fail
+            keep their last fetched spec in the document
+        """
+        names = list(self._services)
+        specs = await asyncio.gather(*(self._fetch(name) for name in names))
+        changed = []
+        for name, spec in zip(names, specs):
+            if spec is None:
+                continue
+            digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+            if self._digests.get(name) == digest:
+                continue
+            self._fragments[name] = build_service_fragment(name, self._services[name], spec)
+            self._digests[name] = digest
+            changed.append(name)
+            logger.info(f"Merged OpenAPI spec of {name} with {len(spec.get('paths', {}))} endpoints")
+        self.refreshed_at = time.time()
+        if changed or self._document is None:
+            self._rebuild()
+        return {name: spec is not None for name, spec in zip(names, specs)}
+
+    async def _fetch(self, service_name: str) -> Optional[dict]:
+        try:
+            client = upstream_clients.get(service_name)
+            response = await client.get("/openapi.json", timeout=settings.OPENAPI_FETCH_TIMEOUT)
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"Failed to fetch OpenAPI spec from {service_name}: Status {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Failed to fetch OpenAPI spec from {service_name}: {e}")
+        return None
+
+    def _rebuild(self) -> None:
+        if self._base is None:
+            self._base = self._gateway_spec()
+        document = merge_openapi_specs(self._base, self._fragments)
+        self.version += 1
+        document.setdefault("info", {})["x-schema-version"] = self.version
+        self._document = document
+        logger.info(f"Built OpenAPI document v{self.version} with schemas for {sorted(self._fragments)}")
+
+    async def _refresh_loop(self) -> None:
+        delay = settings.OPENAPI_RETRY_MIN_INTERVAL
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"OpenAPI refresh failed: {e}")
+            if self.missing:
+                # Services still starting: retry soon, backing off
+                logger.info(f"OpenAPI specs missing for {self.missing}, retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.OPENAPI_RETRY_MAX_INTERVAL)
+            else:
+                delay = settings.OPENAPI_RETRY_MIN_INTERVAL
+                await asyncio.sleep(settings.OPENAPI_REFRESH_INTERVAL)
+
+
+openapi_aggregator = OpenAPIAggregator()
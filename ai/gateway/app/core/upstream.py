@@ -0,0 +1,227 @@
+"""
+Pooled HTTP clients for the upstream services
+
+Each service has one or more replicas. One httpx.AsyncClient per replica
+is opened in the app lifespan and reused by every proxied request, health
+probe and OpenAPI fetch, so connections to the service containers are kept
+alive instead of being set up for each call.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Headers that apply to a single connection and are not forwarded (RFC 9110 7.6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade"
+}
+
+
+def forward_headers(headers: Iterable[Tuple[str, str]], drop: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Headers to pass on to the other side of the proxy.
+
+    Hop-by-hop headers, the headers the Connection header names and the
+    `drop` names are removed; repeated headers (e.g. Set-Cookie) are kept.
+    """
+    headers = list(headers)
+    excluded = HOP_BY_HOP_HEADERS | {name.lower() for name in drop}
+    for name, value in headers:
+        if name.lower() == "connection":
+            excluded |= {option.strip().lower() for option in value.split(",")}
+    return [(name, value) for name, value in headers if name.lower() not in excluded]
+
+
+# Errors meaning the replica itself is unreachable (ejected right away)
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def replica_urls(value: str) -> List[str]:
+    """Replica base URLs from a comma-separated service URL setting"""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+def route_timeout(path: str) -> httpx.Timeout:
+    """Timeout for a proxied request, by the longest matching route prefix"""
+    read_timeout = settings.UPSTREAM_TIMEOUT
+    matched = ""
+    for prefix, timeout in settings.UPSTREAM_ROUTE_TIMEOUTS.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, read_timeout = prefix, timeout
+    return httpx.Timeout(
+        read_timeout,
+        connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+        pool=settings.UPSTREAM_POOL_TIMEOUT
+    )
+
+
+class Replica:
+    """One instance of a service, with its pooled client and health state"""
+
+    def __init__(self, url: str, client: httpx.AsyncClient):
+        self.url = url
+        self.client = client
+        self.outstanding = 0  # Proxied requests currently using the replica
+        self.healthy = True  # Assumed until the first probe says otherwise
+        self.passes = 0  # Consecutive successful / failed probes
+        self.failures = 0
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def release(self) -> None:
+        """End of a request picked with UpstreamClients.pick"""
+        self.outstanding -= 1
+
+    def record_probe(self, status_code: Optional[int], error: Optional[str] = None) -> None:
+        """Apply a health probe result; ejects or reinstates after the configured streaks"""
+        self.status_code = status_code
+        self.error = error
+        self.checked_at = time.time()
+        if status_code == 200:
+            self.passes += 1
+            self.failures = 0
+            if not self.healthy and self.passes >= settings.REPLICA_HEALTHY_THRESHOLD:
+                self.healthy = True
+                logger.info(f"Reinstated upstream replica {self.url}")
+        else:
+            self.failures += 1
+            self.passes = 0
+            if self.healthy and self.failures >= settings.REPLICA_UNHEALTHY_THRESHOLD:
+                self.eject(error or f"health check returned {status_code}")
+
+    def eject(self, reason: str) -> None:
+        """Stop routing to the replica until probes pass again"""
+        if self.healthy:
+            logger.warning(f"Ejected upstream replica {self.url}: {reason}")
+        self.healthy = False
+        self.passes = 0
+        self.error = reason
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "status_code": self.status_code,
+            "error": self.error,
+            "checked_at": self.checked_at
+        }
+
+
+class UpstreamClients:
+    """
+    Per-service replica pools, created on start and closed on shutdown.
+
+    Requests go to the healthy replica with the fewest outstanding requests.
+    A background task probes every replica's /health concurrently each
+    HEALTH_PROBE_INTERVAL seconds; replicas failing REPLICA_UNHEALTHY_THRESHOLD
+    probes in a row (or refusing a connection) are ejected and reinstated
+    after REPLICA_HEALTHY_THRESHOLD passing probes.
+    """
+
+    def __init__(self):
+        self._replicas: Dict[str, List[Replica]] = {}
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def start(self, services: Dict[str, dict]) -> None:
+        """Open one pooled client per replica (URLs from the service config) and start probing"""
+        limits = httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY
+        )
+        for service_name, service_config in services.items():
+            self._replicas[service_name] = [
+                Replica(url, httpx.AsyncClient(
+                    base_url=url,
+                    limits=limits,
+                    timeout=httpx.Timeout(
+                        settings.UPSTREAM_TIMEOUT,
+                        connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+                        pool=settings.UPSTREAM_POOL_TIMEOUT
+                    ),
+                    follow_redirects=True
+                ))
+                for url in service_config["urls"]
+            ]
+        counts = {name: len(replicas) for name, replicas in self._replicas.items()}
+        logger.info(f"Opened upstream connection pools for {counts} (replicas per service)")
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    def pick(self, service_name: str) -> Replica:
+        """
+        Healthy replica with the fewest outstanding requests (ties at random).
+
+        The caller must call `release()` on it when the request is done. If
+        every replica is ejected, all of them are candidates, so requests
+        still fail (or succeed) against the service instead of being refused.
+        """
+        replicas = self._replicas.get(service_name)
+        if not replicas:
+            raise RuntimeError(f"No upstream client for '{service_name}' (gateway not started?)")
+        candidates = [replica for replica in replicas if replica.healthy] or replicas
+        fewest = min(replica.outstanding for replica in candidates)
+        replica = random.choice([replica for replica in candidates if replica.outstanding == fewest])
+        replica.outstanding += 1
+        return replica
+
+    def get(self, service_name: str) -> httpx.AsyncClient:
+        """Client of a healthy replica, for one-off calls not counted as outstanding"""
+        replica = self.pick(service_name)
+        replica.release()
+        return replica.client
+
+    def health(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Last probed state of every replica, by service"""
+        return {
+            service_name: [replica.stats() for replica in replicas]
+            for service_name, replicas in self._replicas.items()
+        }
+
+    async def probe(self) -> None:
+        """Probe all replicas of all services concurrently"""
+        await asyncio.gather(*(
+            self._probe(replica)
+            for replicas in self._replicas.values()
+            for replica in replicas
+        ))
+
+    async def _probe(self, replica: Replica) -> None:
+        try:
+            response = await replica.client.get("/health", timeout=settings.HEALTH_CHECK_TIMEOUT)
+            replica.record_probe(response.status_code)
+        except httpx.HTTPError as e:
+            replica.record_probe(None, str(e) or type(e).__name__)
+
+    async def _probe_loop(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Upstream health probe failed: {e}")
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    async def close(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for replicas in self._replicas.values():
+            for replica in replicas:
+                await replica.client.aclose()
+        self._replicas.clear()
+
+
+upstream_clients = UpstreamClients()
@@ -0,0 +1,282 @@
+"""
+Load shedding and circuit breaking for upstream calls
+
+Each service has an in-flight limit, and configured routes (e.g. the
+analysis service's CPU-heavy POST /api/ai/data) have their own, smaller
+one. Requests over a limit wait in a bounded queue for at most
+UPSTREAM_QUEUE_TIMEOUT seconds. When the queue is full or the wait times
+out, the gateway answers 503 with Retry-After right away instead of
+piling requests onto a saturated service. Long-lived routes (csv-manager's
+status SSE stream and long-poll) hold a connection for up to a minute or
+two while the service does no work, so UPSTREAM_SERVICE_EXEMPT_ROUTES are
+held to their own route limit only and never take the service's slots.
+
+A circuit breaker per service opens after CIRCUIT_FAILURE_THRESHOLD
+consecutive failures (connection errors, timeouts, 502/503/504) and fails
+requests fast for CIRCUIT_RESET_TIMEOUT seconds. After that, a single probe
+request is let through, and its outcome closes or reopens the circuit.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """The request was shed or the circuit is open (answered with 503)"""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """In-flight limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting in the queue if all are in use.
+
+        Raises:
+            UpstreamUnavailable: The queue is full or the wait timed out
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                raise UpstreamUnavailable(f"{self.name} is saturated", settings.UPSTREAM_RETRY_AFTER)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise UpstreamUnavailable(
+                    f"{self.name} is saturated (queued {self.queue_timeout:g}s)",
+                    settings.UPSTREAM_RETRY_AFTER
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "shed": self.shed
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def check(self) -> bool:
+        """
+        Admit a request.
+
+        Returns:
+            True if the request is the half-open probe
+
+        Raises:
+            UpstreamUnavailable: The circuit is open (or a probe is running)
+        """
+        if self.state == self.CLOSED:
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise UpstreamUnavailable(
+            f"{self.name} is unavailable (circuit open)",
+            max(1, math.ceil(remaining))
+        )
+
+    def record(self, failed: bool, probe: bool) -> None:
+        if probe:
+            self._probing = False
+        if not failed:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def cancel_probe(self) -> None:
+        """The probe never reached the service; let the next request probe"""
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+class GuardTicket:
+    """Admission of one upstream call; holds its limiter slots until released"""
+
+    def __init__(self, breaker: CircuitBreaker, limiters: List[ConcurrencyLimiter], probe: bool):
+        self._breaker = breaker
+        self._limiters = limiters
+        self._probe = probe
+        self._finished = False
+
+    def finish(self, status_code: Optional[int] = None, error: bool = False) -> None:
+        """Report the call's outcome to the circuit breaker (once)"""
+        if self._finished:
+            return
+        self._finished = True
+        failed = error or status_code in settings.CIRCUIT_FAILURE_STATUSES
+        self._breaker.record(failed, self._probe)
+
+    def release(self) -> None:
+        """Free the limiter slots (once); a call without an outcome is not counted"""
+        if not self._finished:
+            self._finished = True
+            if self._probe:
+                self._breaker.cancel_probe()
+        for limiter in self._limiters:
+            limiter.release()
+        self._limiters = []
+
+
+class UpstreamGuard:
+    """Circuit breakers and limiters of all services"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._service_limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._route_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    def _service_limiter(self, service: str) -> ConcurrencyLimiter:
+        if service not in self._service_limiters:
+            self._service_limiters[service] = ConcurrencyLimiter(
+                service,
+                settings.UPSTREAM_SERVICE_MAX_IN_FLIGHT.get(service, settings.UPSTREAM_MAX_IN_FLIGHT),
+                settings.UPSTREAM_QUEUE_SIZE,
+                settings.UPSTREAM_QUEUE_TIMEOUT
+            )
+        return self._service_limiters[service]
+
+    def _route_limiter(self, method: str, path: str) -> Optional[ConcurrencyLimiter]:
+        """Limiter of the longest configured "METHOD /prefix" matching the request"""
+        matched = None
+        for route in settings.UPSTREAM_ROUTE_MAX_IN_FLIGHT:
+            route_method, _, prefix = route.partition(" ")
+            if route_method == method and path.startswith(prefix):
+                if matched is None or len(route) > len(matched):
+                    matched = route
+        if matched is None:
+            return None
+        if matched not in self._route_limiters:
+            self._route_limiters[matched] = ConcurrencyLimiter(
+                matched,
+                settings.UPSTREAM_ROUTE_MAX_IN_FLIGHT[matched],
+                settings.UPSTREAM_QUEUE_SIZE,
+                settings.UPSTREAM_QUEUE_TIMEOUT
+            )
+        return self._route_limiters[matched]
+
+    @staticmethod
+    def _service_exempt(method: str, path: str) -> bool:
+        """Whether the request matches a "METHOD /prefix" of UPSTREAM_SERVICE_EXEMPT_ROUTES"""
+        for route in settings.UPSTREAM_SERVICE_EXEMPT_ROUTES:
+            route_method, _, prefix = route.partition(" ")
+            if route_method == method and path.startswith(prefix):
+                return True
+        return False
+
+    def _breaker(self, service: str) -> CircuitBreaker:
+        if service not in self._breakers:
+            self._breakers[service] = CircuitBreaker(
+                service,
+                settings.CIRCUIT_FAILURE_THRESHOLD,
+                settings.CIRCUIT_RESET_TIMEOUT
+            )
+        return self._breakers[service]
+
+    async def enter(self, service: str, method: str, path: str) -> GuardTicket:
+        """
+        Admit a call to a service, waiting for free slots if needed.
+
+        Raises:
+            UpstreamUnavailable: The circuit is open or a limiter shed it
+        """
+        breaker = self._breaker(service)
+        probe = breaker.check()
+        route_limiter = self._route_limiter(method, path)
+        limiters = [route_limiter, self._service_limiter(service)]
+        if route_limiter is not None and self._service_exempt(method, path):
+            # Exempt routes without a route limit still take a service slot
+            limiters = [route_limiter]
+        acquired: List[ConcurrencyLimiter] = []
+        try:
+            # Route limit first, so calls queued on a slow route do not hold
+            # service slots other routes could use
+            for limiter in limiters:
+                if limiter is not None:
+                    await limiter.acquire()
+                    acquired.append(limiter)
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            if probe:
+                breaker.cancel_probe()
+            raise
+        return GuardTicket(breaker, acquired, probe)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "services": {
+                service: {
+                    "circuit": self._breaker(service).stats(),
+                    "limiter": limiter.stats()
+                }
+                for service, limiter in self._service_limiters.items()
+            },
+            "routes": {route: limiter.stats() for route, limiter in self._route_limiters.items()}
+        }
+
+
+upstream_guard = UpstreamGuard()
@@ -1,12 +1,20 @@
 from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.openapi.utils import get_openapi
+import anyio
 import httpx
-import json
-from typing import Optional, Dict, Any
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import logging
-import asyncio
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.core.upstream import upstream_clients, route_timeout, forward_headers, replica_urls, CONNECT_ERRORS
+from app.core.edge_cache import edge_cache
+from app.core.upstream_guard import upstream_guard, UpstreamUnavailable
+from app.core.openapi_aggregator import openapi_aggregator
+from app.core.metrics import ProxyTiming, route_label
 
 # CSV router removed - now handled by csv-manager service
 
@@ -14,6 +22,20 @@ import asyncio
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream clients are shared by all requests and closed on shutdown
+    upstream_clients.start(SERVICES)
+    # Service specs are aggregated in the background; the gateway serves
+    # requests right away
+    openapi_aggregator.configure(SERVICES, gateway_openapi)
+    openapi_aggregator.start()
+    yield
+    await openapi_aggregator.stop()
+    await upstream_clients.close()
+
+
 app = FastAPI(
     title="AI Fintech API Gateway",
     description="Unified API Gateway for AI Fintech Microservices with CSV Management",
@@ -25,7 +47,8 @@ app = FastAPI(
         "docExpansion": "list",  # 'none', 'list', or 'full'
         "defaultModelsExpandDepth": 1,
         "persistAuthorization": True
-    }
+    },
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -48,166 +71,23 @@ app.add_middleware(
 # Service endpoints
 SERVICES = {
     "classifier": {
-        "url": "http://classifier:8001",
+        "urls": replica_urls(settings.CLASSIFIER_SERVICE_URL),
         "prefix": "/api/ai/classify",
         "name": "Expense Classifier"
     },
     "analysis": {
-        "url": "http://analysis:8002", 
+        "urls": replica_urls(settings.ANALYSIS_SERVICE_URL),
         "prefix": "/api/ai/data",
         "name": "Data Analysis"
     },
     "csv-manager": {
-        "url": "http://csv-manager:8003",
+        "urls": replica_urls(settings.CSV_MANAGER_SERVICE_URL),
         "prefix": "/api/ai/csv",
         "name": "CSV Management"
     }
 }
 
 
-async def fetch_service_openapi(service_name: str, service_config: dict) -> Optional[dict]:
-    """Fetch OpenAPI spec from a service with retry logic"""
-    max_retries = 3
-    for retry in range(max_retries):
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:  # Increased timeout
-                response = await client.get(f"{service_config['url']}/openapi.json")
-                if response.status_code == 200:
-                    spec = response.json()
-                    paths = spec.get('paths', {})
-                    logger.info(f"Successfully fetched OpenAPI spec from {service_name} with {len(paths)} endpoints")
-                    return spec
-                else:
-                    logger.error(f"Failed to fetch OpenAPI spec from {service_name}: Status {response.status_code}, attempt {retry + 1}/{max_retries}")
-        except Exception as e:
-            logger.error(f"Failed to fetch OpenAPI spec from {service_name}: {e}, attempt {retry + 1}/{max_retries}")
-
-        if retry < max_retries - 1:
-            await asyncio.sleep(2)
-
-    return None
-
-
-def update_refs_in_dict(obj: Any, service_name: str, schema_mappings: Dict[str, str]) -> Any:
-    """Recursively update $ref references in a dictionary"""
-    if isinstance(obj, dict):
-        new_obj = {}
-        for key, value in obj.items():
-            if key == '$ref' and isinstance(value, str):
-                # Update schema reference
-                if value.startswith('#/components/schemas/'):
-                    schema_name = value.split('/')[-1]
-                    if schema_name in schema_mappings:
-                        new_obj[key] = f"#/components/schemas/{schema_mappings[schema_name]}"
-                    else:
-                        new_obj[key] = value
-                else:
-                    new_obj[key] = value
-            else:
-                new_obj[key] = update_refs_in_dict(value, service_name, schema_mappings)
-        return new_obj
-    elif isinstance(obj, list):
-        return [update_refs_in_dict(item, service_name, schema_mappings) for item in obj]
-    else:
-        return obj
-
-
-def merge_openapi_specs(gateway_spec: dict, service_specs: Dict[str, dict]) -> dict:
-    """Merge multiple OpenAPI specs into one"""
-    merged = gateway_spec.copy()
-
-    # Ensure components and schemas exist
-    if 'components' not in merged:
-        merged['components'] = {}
-    if 'schemas' not in merged['components']:
-        merged['components']['schemas'] = {}
-    if 'securitySchemes' not in merged['components']:
-        merged['components']['securitySchemes'] = {}
-
-    # Merge each service spec
-    for service_name, spec in service_specs.items():
-        if not spec:
-            continue
-            
-        service_config = SERVICES[service_name]
-        prefix = service_config['prefix']
-        
-        # Create schema name mappings for this service
-        schema_mappings = {}
-        
-        # First, create schema mappings
-        if 'components' in spec and 'schemas' in spec['components']:
-            for schema_name in spec['components']['schemas'].keys():
-                # Create prefixed name
-                prefixed_name = f"{service_name}_{schema_name}"
-                schema_mappings[schema_name] = prefixed_name
-        
-        # Then merge schemas with updated references
-        if 'components' in spec and 'schemas' in spec['components']:
-            for schema_name, schema in spec['components']['schemas'].items():
-                prefixed_name = schema_mappings[schema_name]
-                # Update any $ref inside the schema itself
-                updated_schema = update_refs_in_dict(schema, service_name, schema_mappings)
-                merged['components']['schemas'][prefixed_name] = updated_schema
-
-        # Merge security schemes from services
-        if 'components' in spec and 'securitySchemes' in spec['components']:
-            for scheme_name, scheme in spec['components']['securitySchemes'].items():
-                # Add security scheme (HTTPBearer for JWT)
-                if scheme_name not in merged['components']['securitySchemes']:
-                    merged['components']['securitySchemes'][scheme_name] = scheme
-        
-        # Then merge paths with updated references
-        if 'paths' in spec:
-            for path, path_item in spec['paths'].items():
-                # Skip root and health endpoints from services
-                if path in ['/', '/health', '/openapi.json', '/docs', '/redoc']:
-                    continue
-                    
-                # Adjust the path to include service prefix if not already present
-                if not path.startswith(prefix):
-                    if path.startswith('/api/ai/'):
-                        # Path already has /api/ai/ prefix, use as is
-                        new_path = path
-                    elif path.startswith('/ai/'):
-                        # Convert /ai/ to /api/ai/
-                        new_path = path.replace('/ai/', '/api/ai/', 1)
-                    else:
-                        # Add the service prefix
-                        new_path = f"{prefix}{path}"
-                else:
-                    new_path = path
-                
-                # Update the entire path_item with new references
-                updated_path_item = update_refs_in_dict(path_item, service_name, schema_mappings)
-                
-                # Update operation IDs and tags
-                for method, operation in updated_path_item.items():
-                    if isinstance(operation, dict):
-                        # Add service tag
-                        operation['tags'] = [service_config['name']]
-                        # Update operation ID to avoid conflicts
-                        if 'operationId' in operation:
-                            operation['operationId'] = f"{service_name}_{operation['operationId']}"
-                        # Update summary to include service name
-                        if 'summary' in operation:
-                            operation['summary'] = f"[{service_config['name']}] {operation['summary']}"
-                        # Preserve security requirements from original spec
-                        # This ensures endpoints that require auth maintain their security settings
-                
-                merged['paths'][new_path] = updated_path_item
-    
-    # Add tags description - must match exactly with operation tags
-    merged['tags'] = [
-        {"name": "Gateway", "description": "API Gateway endpoints"},
-        {"name": "CSV Management", "description": "CSV file upload and management endpoints"},
-        {"name": "Expense Classifier", "description": "Expense classification endpoints"},
-        {"name": "Data Analysis", "description": "Data analysis endpoints"}
-    ]
-    
-    return merged
-
-
 @app.get("/", include_in_schema=False)
 async def root_redirect():
     """Redirect root to /api/ai"""
@@ -248,25 +128,25 @@ async def root():
 
 @app.get("/api/ai/health", tags=["Gateway"])
 async def health_check():
-    """Check health of all services"""
+    """Health of all services (replica states from the background probes)"""
     health_status = {
         "gateway": "healthy",
         "services": {}
     }
     
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        for service_name, service_config in SERVICES.items():
-            try:
-                response = await client.get(f"{service_config['url']}/health")
-                health_status["services"][service_name] = {
-                    "status": "healthy" if response.status_code == 200 else "unhealthy",
-                    "status_code": response.status_code
-                }
-            except Exception as e:
-                health_status["services"][service_name] = {
-                    "status": "unreachable",
-                    "error": str(e)
-                }
+    for service_name, replicas in upstream_clients.health().items():
+        healthy = sum(1 for replica in replicas if replica["healthy"])
+        if healthy == len(replicas):
+            status = "healthy"
+        elif healthy:
+            status = "degraded"
+        else:
+            status = "unhealthy"
+        health_status["services"][service_name] = {
+            "status": status,
+            "healthy_replicas": healthy,
+            "replicas": replicas
+        }
     
     # Set overall status
     all_healthy = all(
@@ -285,34 +165,48 @@ async def list_services():
     """List all available services and their endpoints"""
     services_info = {}
     
-    tasks = {}
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        for service_name, service_config in SERVICES.items():
-            tasks[service_name] = client.get(f"{service_config['url']}/openapi.json")
-        
-        for service_name, task in tasks.items():
-            try:
-                response = await task
-                if response.status_code == 200:
-                    spec = response.json()
-                    services_info[service_name] = {
-                        "name": SERVICES[service_name]['name'],
-                        "prefix": SERVICES[service_name]['prefix'],
-                        "title": spec.get("info", {}).get("title", ""),
-                        "version": spec.get("info", {}).get("version", ""),
-                        "description": spec.get("info", {}).get("description", ""),
-                        "endpoints": len(spec.get("paths", {}))
-                    }
-            except Exception as e:
+    for service_name in SERVICES:
+        try:
+            client = upstream_clients.get(service_name)
+            response = await client.get("/openapi.json", timeout=settings.HEALTH_CHECK_TIMEOUT)
+            if response.status_code == 200:
+                spec = response.json()
                 services_info[service_name] = {
                     "name": SERVICES[service_name]['name'],
                     "prefix": SERVICES[service_name]['prefix'],
-                    "error": f"Could not fetch service info: {str(e)}"
+                    "title": spec.get("info", {}).get("title", ""),
+                    "version": spec.get("info", {}).get("version", ""),
+                    "description": spec.get("info", {}).get("description", ""),
+                    "endpoints": len(spec.get("paths", {}))
                 }
+        except Exception as e:
+            services_info[service_name] = {
+                "name": SERVICES[service_name]['name'],
+                "prefix": SERVICES[service_name]['prefix'],
+                "error": f"Could not fetch service info: {str(e)}"
+            }
     
     return services_info
 
 
+@app.get("/api/ai/cache/stats", tags=["Gateway"])
+async def cache_stats():
+    """Edge cache entries and hit ratio per cached route"""
+    return edge_cache.stats()
+
+
+@app.get("/api/ai/upstreams/stats", tags=["Gateway"])
+async def upstream_stats():
+    """Circuit state, in-flight and queued requests and shed count per service and limited route"""
+    return upstream_guard.stats()
+
+
+@app.get("/api/ai/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (request counts, latency split into queue/upstream/body/overhead)"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 async def proxy_request(
     service: str,
     path: str,
@@ -324,49 +218,113 @@ async def proxy_request(
     if service not in SERVICES:
         raise HTTPException(status_code=404, detail=f"Service '{service}' not found")
     
-    service_config = SERVICES[service]
-    target_url = f"{service_config['url']}/{path}"
+    # Latency of each phase, recorded once the body is sent or the request failed
+    timing = ProxyTiming(route_label(request.url.path, SERVICES[service]["prefix"]), method, service)
     
-    # Prepare headers (remove host header)
-    headers = dict(request.headers)
-    headers.pop("host", None)
+    # Prepare headers (remove host and hop-by-hop headers)
+    headers = forward_headers(request.headers.items(), drop=["host"])
     
     try:
-        async with httpx.AsyncClient(timeout=120.0, follow_redirects=True) as client:
-            # Get request body if present
-            body = None
-            if method in ["POST", "PUT", "PATCH"]:
-                body = await request.body()
-            
-            # Make the proxied request
-            response = await client.request(
+        # Configured GET routes are answered from the edge cache when enabled
+        cache_route = edge_cache.route_for(request.url.path) if method == "GET" else None
+        if settings.EDGE_CACHE_ENABLED and cache_route is not None:
+            cached = await edge_cache.fetch(cache_route, service, path, request, headers, timing)
+            cached.background = BackgroundTask(timing.observe, cached.status_code)
+            return cached
+        
+        # Stream the request body through instead of buffering it
+        body = None
+        if method in ["POST", "PUT", "PATCH"]:
+            body = request.stream()
+        
+        # Wait for a slot of the service (and route) limit; shed with 503 when
+        # saturated or while the service's circuit is open
+        ticket = await upstream_guard.enter(service, method, request.url.path)
+        timing.admitted()
+        replica = None
+        
+        def release():
+            if replica is not None:
+                replica.release()
+            ticket.release()
+        
+        # Make the proxied request; the response body is read as the client
+        # consumes it, so slow clients slow the upstream read (backpressure)
+        try:
+            # Healthy replica with the fewest outstanding requests (pooled
+            # client with keep-alive connections)
+            replica = upstream_clients.pick(service)
+            upstream_request = replica.client.build_request(
                 method=method,
-                url=target_url,
+                url=f"/{path}",
                 headers=headers,
                 content=body,
-                params=request.query_params
-            )
-            
-            # Return the response
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=dict(response.headers)
+                params=request.query_params,
+                timeout=route_timeout(request.url.path)
             )
-            
+            timing.sending()
+            response = await replica.client.send(upstream_request, stream=True)
+            timing.headers_received()
+        except httpx.HTTPError as e:
+            if isinstance(e, CONNECT_ERRORS):
+                replica.eject(f"connection failed: {e}")
+            ticket.finish(error=True)
+            release()
+            raise
+        except BaseException:
+            release()
+            raise
+        ticket.finish(response.status_code)
+        
+        async def stream_upstream():
+            # The upstream connection, the replica and the limiter slots are
+            # released however streaming ends: body sent, upstream failure
+            # mid-body or client disconnect (a background task would be
+            # skipped when sending the body fails)
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                try:
+                    # On client disconnect this runs in a cancelled scope
+                    with anyio.CancelScope(shield=True):
+                        await response.aclose()
+                finally:
+                    release()
+                    timing.observe(response.status_code)
+        
+        # Return the response as it arrives (raw bytes, so content-encoding
+        # and content-length stay valid)
+        proxied = StreamingResponse(stream_upstream(), status_code=response.status_code)
+        proxied.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in forward_headers(response.headers.multi_items())
+        ]
+        return proxied
+        
+    except UpstreamUnavailable as e:
+        timing.observe(503)
+        raise HTTPException(
+            status_code=503,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except httpx.TimeoutException:
+        timing.observe(504)
         raise HTTPException(
             status_code=504,
             detail=f"Request to {service} service timed out"
         )
     except httpx.RequestError as e:
         logger.error(f"Request error to {service}: {str(e)}")
+        timing.observe(503)
         raise HTTPException(
             status_code=503,
             detail=f"Service {service} is unavailable"
         )
     except Exception as e:
         logger.error(f"Unexpected error proxying to {service}: {str(e)}")
+        timing.observe(500)
         raise HTTPException(
             status_code=500,
             detail=f"Internal gateway error"
@@ -502,95 +460,20 @@ async def proxy_csv_root_slash(request: Request):
     )
 
 
-# Store fetched schemas
-_service_schemas_cache = {}
-
-
-async def fetch_and_cache_schemas():
-    """Fetch and cache service schemas on startup"""
-    global _service_schemas_cache
-    for service_name, service_config in SERVICES.items():
-        spec = await fetch_service_openapi(service_name, service_config)
-        if spec:
-            _service_schemas_cache[service_name] = spec
-            logger.info(f"Cached schema for {service_name}")
-        else:
-            logger.warning(f"Failed to fetch schema for {service_name}")
-
-
-@app.on_event("startup")
-async def startup_event():
-    """Fetch service schemas on startup"""
-    import asyncio
-    # Wait a bit for services to be ready
-    await asyncio.sleep(5)  # Increased wait time for services to fully initialize
-
-    # Try multiple times to fetch schemas
-    max_retries = 10  # Increased retries
-    for attempt in range(max_retries):
-        await fetch_and_cache_schemas()
-        if len(_service_schemas_cache) == len(SERVICES):  # Check if all services cached
-            logger.info(f"All service schemas fetched successfully on attempt {attempt + 1}")
-            break
-        else:
-            missing = [s for s in SERVICES.keys() if s not in _service_schemas_cache]
-            logger.warning(f"Attempt {attempt + 1}: Missing schemas for {missing}, retrying...")
-            await asyncio.sleep(3)  # Increased retry delay
-
-    # Log final status
-    if _service_schemas_cache:
-        logger.info(f"Cached schemas for: {list(_service_schemas_cache.keys())}")
-        for service, spec in _service_schemas_cache.items():
-            paths = spec.get('paths', {})
-            logger.info(f"Service '{service}' has {len(paths)} endpoints")
-    else:
-        logger.error("Failed to fetch any service schemas after all retries")
-
-
-# Custom OpenAPI schema
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
-
-    # Get base gateway schema
-    gateway_schema = get_openapi(
+def gateway_openapi() -> dict:
+    """OpenAPI spec of the gateway's own routes"""
+    return get_openapi(
         title=app.title,
         version=app.version,
         description=app.description,
         routes=app.routes,
     )
 
-    # Use cached schemas or fetch synchronously
-    service_specs = _service_schemas_cache.copy()
-
-    # If cache is empty or incomplete, try to fetch synchronously (fallback)
-    if len(service_specs) < len(SERVICES):
-        missing = [s for s in SERVICES.keys() if s not in service_specs]
-        logger.warning(f"Service schemas missing for {missing}, attempting synchronous fetch...")
-
-        # Try to fetch missing schemas synchronously
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            for service_name in missing:
-                service_config = SERVICES[service_name]
-                spec = loop.run_until_complete(fetch_service_openapi(service_name, service_config))
-                if spec:
-                    service_specs[service_name] = spec
-                    _service_schemas_cache[service_name] = spec
-                    logger.info(f"Successfully fetched {service_name} schema synchronously")
-        finally:
-            loop.close()
 
-    # Log what we have
-    logger.info(f"Building OpenAPI with schemas for: {list(service_specs.keys())}")
-
-    # Merge schemas
-    merged_schema = merge_openapi_specs(gateway_schema, service_specs)
-
-    app.openapi_schema = merged_schema
-    return app.openapi_schema
+# Custom OpenAPI schema: precomputed by the background aggregator, never
+# fetched while serving a request
+def custom_openapi():
+    return openapi_aggregator.document()
 
 
 app.openapi = custom_openapi
@@ -599,21 +482,19 @@ app.openapi = custom_openapi
 # Add endpoint to manually refresh schemas
 @app.post("/api/ai/refresh-schemas", tags=["Gateway"])
 async def refresh_schemas():
-    """Manually refresh service schemas"""
-    global _service_schemas_cache
-    app.openapi_schema = None  # Clear cache
-    _service_schemas_cache.clear()  # Clear existing cache
-    await fetch_and_cache_schemas()
+    """Manually refresh service schemas (unchanged specs are not re-merged)"""
+    fetched = await openapi_aggregator.refresh()
     
-    # Report which services were successfully cached
-    successful = list(_service_schemas_cache.keys())
-    failed = [s for s in SERVICES.keys() if s not in successful]
+    # Report which services answered; failed ones keep their last spec
+    successful = [name for name, ok in fetched.items() if ok]
+    failed = [name for name, ok in fetched.items() if not ok]
     
     return {
         "status": "Schemas refreshed", 
         "successful": successful,
         "failed": failed,
-        "total": len(SERVICES)
+        "total": len(SERVICES),
+        "version": openapi_aggregator.version
     }
 
 
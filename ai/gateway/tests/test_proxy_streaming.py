@@ -0,0 +1,132 @@
+"""
+Regression tests: proxied requests release their upstream resources
+however they end
+
+The gateway app is driven through ASGI directly, and the analysis service
+is replaced by an httpx transport whose response body fails or never ends
+(or by no replica at all). After each request the replica must have no
+outstanding requests and the service limiter no slots in flight.
+
+Run from ai/gateway: python -m pytest tests
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.upstream import Replica, upstream_clients
+from app.core.upstream_guard import upstream_guard
+from app.main import app
+
+
+class FailingBody(httpx.AsyncByteStream):
+    """Sends one chunk, then the upstream connection breaks"""
+
+    async def __aiter__(self):
+        yield b"first chunk"
+        raise httpx.ReadError("upstream closed the connection")
+
+
+class EndlessBody(httpx.AsyncByteStream):
+    """Sends chunks until it is closed"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        while True:
+            yield b"chunk"
+            await asyncio.sleep(0.01)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def use_analysis_body(body: httpx.AsyncByteStream) -> Replica:
+    """Route the analysis service to a single replica answering with `body`"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=body))
+    replica = Replica("http://analysis", httpx.AsyncClient(base_url="http://analysis", transport=transport))
+    upstream_clients._replicas["analysis"] = [replica]
+    return replica
+
+
+def analysis_in_flight() -> int:
+    return upstream_guard.stats()["services"]["analysis"]["limiter"]["in_flight"]
+
+
+async def call_gateway(path: str, disconnect_after_body: bool = False):
+    """Send a GET through the gateway; returns the ASGI messages it sent"""
+    sent = []
+    body_started = asyncio.Event()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"gateway")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("gateway", 80)
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if disconnect_after_body:
+            await body_started.wait()
+        else:
+            await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            body_started.set()
+
+    await app(scope, receive, send)
+    return sent
+
+
+def test_upstream_failure_mid_body_releases_slots():
+    async def scenario():
+        replica = use_analysis_body(FailingBody())
+        with pytest.raises(httpx.ReadError):
+            await call_gateway("/api/ai/data/leak")
+        return replica
+
+    replica = asyncio.run(scenario())
+    assert replica.outstanding == 0
+    assert analysis_in_flight() == 0
+
+
+def test_client_disconnect_releases_slots_and_closes_upstream():
+    body = EndlessBody()
+
+    async def scenario():
+        replica = use_analysis_body(body)
+        sent = await asyncio.wait_for(call_gateway("/api/ai/data/leak", disconnect_after_body=True), 5)
+        return replica, sent
+
+    replica, sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 200
+    assert body.closed
+    assert replica.outstanding == 0
+    assert analysis_in_flight() == 0
+
+
+@pytest.mark.parametrize("edge_cache_enabled", [False, True])
+def test_missing_replica_releases_slots(monkeypatch, edge_cache_enabled):
+    monkeypatch.setattr(settings, "EDGE_CACHE_ENABLED", edge_cache_enabled)
+    monkeypatch.setitem(upstream_clients._replicas, "analysis", [])
+
+    sent = asyncio.run(call_gateway("/api/ai/data/leak"))
+    assert sent[0]["status"] == 500
+    assert analysis_in_flight() == 0